@@ -0,0 +1,214 @@
+"""partition login_histories by month
+
+Revision ID: 7c1d2e9a4b3f
+Revises: 2440ef57f386
+Create Date: 2026-10-19 10:10:12.518204
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1d2e9a4b3f"
+down_revision: Union[str, None] = "2440ef57f386"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DEVICE_TYPES = (
+    "console",
+    "mobile",
+    "tablet",
+    "smarttv",
+    "wearable",
+    "embedded",
+    "undefined",
+)
+MONTHS_AHEAD = 3
+
+
+def add_months(month_start: date, months: int) -> date:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_exists(name: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT to_regclass(:name) IS NOT NULL"),
+        {"name": name},
+    ).scalar()
+
+
+def drop_unique_constraints(table_name: str) -> None:
+    # Primary key and unique constraints of the detached partition don't
+    # include logged_in_at, so they can't be attached to the new ones
+    op.execute(
+        f"""
+        DO $$
+        DECLARE constraint_name text;
+        BEGIN
+            FOR constraint_name IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = '{table_name}'::regclass
+                AND contype IN ('p', 'u')
+            LOOP
+                EXECUTE format(
+                    'ALTER TABLE {table_name} DROP CONSTRAINT %I',
+                    constraint_name
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def upgrade() -> None:
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+
+    # Existing list partitions are kept as partitions with the rows logged
+    # in before the current month
+    legacy_partitions = {}
+    for device_type in DEVICE_TYPES:
+        partition_name = f"login_histories_{device_type}"
+        if not partition_exists(partition_name):
+            continue
+
+        legacy_partition_name = (
+            f"{partition_name}_before_{current_month:%Y_%m}"
+        )
+        op.execute(
+            f"ALTER TABLE login_histories DETACH PARTITION {partition_name}"
+        )
+        op.execute(
+            f"ALTER TABLE {partition_name} RENAME TO {legacy_partition_name}"
+        )
+        drop_unique_constraints(legacy_partition_name)
+        legacy_partitions[device_type] = legacy_partition_name
+
+    # PostgreSQL doesn't create a unique constraint which duplicates the
+    # primary key, so the constraint of the initial migration may be missing
+    op.execute(
+        """
+        ALTER TABLE login_histories
+        DROP CONSTRAINT IF EXISTS uq_login_histories_id_device_type
+        """
+    )
+    op.drop_constraint(
+        "pk_login_histories",
+        "login_histories",
+        type_="primary",
+    )
+    op.create_primary_key(
+        "pk_login_histories",
+        "login_histories",
+        ["id", "device_type", "logged_in_at"],
+    )
+    op.create_index(
+        "ix_login_histories_user_id_logged_in_at",
+        "login_histories",
+        ["user_id", "logged_in_at"],
+    )
+
+    for device_type in DEVICE_TYPES:
+        op.execute(
+            f"""
+            CREATE TABLE login_histories_{device_type}
+            PARTITION OF login_histories
+            FOR VALUES IN ('{device_type}')
+            PARTITION BY RANGE (logged_in_at)
+            """
+        )
+        for offset in range(MONTHS_AHEAD + 1):
+            lower_bound = add_months(current_month, offset)
+            upper_bound = add_months(current_month, offset + 1)
+            op.execute(
+                f"""
+                CREATE TABLE login_histories_{device_type}_{lower_bound:%Y_%m}
+                PARTITION OF login_histories_{device_type}
+                FOR VALUES
+                FROM ('{lower_bound} 00:00:00+00')
+                TO ('{upper_bound} 00:00:00+00')
+                """
+            )
+
+        legacy_partition_name = legacy_partitions.get(device_type)
+        if not legacy_partition_name:
+            continue
+
+        # Rows of the current month are moved into the new month partition
+        op.execute(
+            f"""
+            WITH moved_rows AS (
+                DELETE FROM {legacy_partition_name}
+                WHERE logged_in_at >= '{current_month} 00:00:00+00'
+                RETURNING *
+            )
+            INSERT INTO login_histories SELECT * FROM moved_rows
+            """
+        )
+        op.execute(
+            f"""
+            ALTER TABLE login_histories_{device_type}
+            ATTACH PARTITION {legacy_partition_name}
+            FOR VALUES
+            FROM (MINVALUE)
+            TO ('{current_month} 00:00:00+00')
+            """
+        )
+
+
+def downgrade() -> None:
+    for device_type in DEVICE_TYPES:
+        op.execute(
+            f"""
+            ALTER TABLE login_histories
+            DETACH PARTITION login_histories_{device_type}
+            """
+        )
+        op.execute(
+            f"""
+            ALTER TABLE login_histories_{device_type}
+            RENAME TO login_histories_{device_type}_by_month
+            """
+        )
+
+    op.drop_index(
+        "ix_login_histories_user_id_logged_in_at",
+        table_name="login_histories",
+    )
+    op.drop_constraint(
+        "pk_login_histories",
+        "login_histories",
+        type_="primary",
+    )
+    op.create_primary_key(
+        "pk_login_histories",
+        "login_histories",
+        ["id", "device_type"],
+    )
+    op.create_unique_constraint(
+        "uq_login_histories_id_device_type",
+        "login_histories",
+        ["id", "device_type"],
+    )
+
+    for device_type in DEVICE_TYPES:
+        op.execute(
+            f"""
+            CREATE TABLE login_histories_{device_type}
+            PARTITION OF login_histories
+            FOR VALUES IN ('{device_type}')
+            """
+        )
+        op.execute(
+            f"""
+            INSERT INTO login_histories_{device_type}
+            SELECT * FROM login_histories_{device_type}_by_month
+            """
+        )
+        op.execute(f"DROP TABLE login_histories_{device_type}_by_month")
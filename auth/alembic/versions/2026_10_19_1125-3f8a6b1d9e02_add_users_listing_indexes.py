@@ -0,0 +1,61 @@
+"""add users listing indexes
+
+Revision ID: 3f8a6b1d9e02
+Revises: 7c1d2e9a4b3f
+Create Date: 2026-10-19 11:25:43.096511
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8a6b1d9e02"
+down_revision: Union[str, None] = "7c1d2e9a4b3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FLAG_INDEXES = {
+    "ix_users_is_active_username": ["is_active", "username"],
+    "ix_users_is_staff_username": ["is_staff", "username"],
+    "ix_users_is_subscriber_username": ["is_subscriber", "username"],
+}
+
+
+def upgrade() -> None:
+    # Indexes are built concurrently to avoid locking the users table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_username_pattern",
+            "users",
+            ["username"],
+            postgresql_ops={"username": "varchar_pattern_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for index_name, columns in FLAG_INDEXES.items():
+            op.create_index(
+                index_name,
+                "users",
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name in FLAG_INDEXES:
+            op.drop_index(
+                index_name,
+                table_name="users",
+                postgresql_concurrently=True,
+            )
+        op.drop_index(
+            "ix_users_username_pattern",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,37 @@
+"""add server side timestamp defaults
+
+Revision ID: 5b7d0e3c8f14
+Revises: 3f8a6b1d9e02
+Create Date: 2026-10-19 12:40:51.733920
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b7d0e3c8f14"
+down_revision: Union[str, None] = "3f8a6b1d9e02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for column_name in ("created_at", "updated_at"):
+        op.alter_column(
+            "users",
+            column_name,
+            server_default=sa.func.now(),
+        )
+
+
+def downgrade() -> None:
+    for column_name in ("created_at", "updated_at"):
+        op.alter_column(
+            "users",
+            column_name,
+            server_default=None,
+        )
@@ -0,0 +1,50 @@
+"""add login_histories default partitions
+
+Revision ID: 9e4c2a7f1d60
+Revises: 5b7d0e3c8f14
+Create Date: 2026-10-19 14:05:37.402816
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4c2a7f1d60"
+down_revision: Union[str, None] = "5b7d0e3c8f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DEVICE_TYPES = (
+    "console",
+    "mobile",
+    "tablet",
+    "smarttv",
+    "wearable",
+    "embedded",
+    "undefined",
+)
+
+
+def upgrade() -> None:
+    # Rows logged in outside of the existing month partitions are kept in
+    # the default partitions until the month partition is created
+    for device_type in DEVICE_TYPES:
+        op.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS login_histories_{device_type}_default
+            PARTITION OF login_histories_{device_type}
+            DEFAULT
+            """
+        )
+
+
+def downgrade() -> None:
+    for device_type in DEVICE_TYPES:
+        op.execute(
+            f"DROP TABLE IF EXISTS login_histories_{device_type}_default"
+        )
@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from redis.asyncio import Redis
@@ -6,6 +7,10 @@ from fastapi_pagination import add_pagination
 
 from src.db import redis
 from src.core.config import settings
+from src.services.login_history import (
+    login_history_writer,
+    run_login_history_partition_maintenance,
+)
 from src.routers.auth import router as auth_router
 from src.routers.admin import router as admin_router
 from src.routers.user import router as user_router
@@ -18,7 +23,15 @@ async def lifespan(_: FastAPI):
         port=settings.service_settings.redis_port,
         db=1
     )
+    login_history_writer.start()
+    partition_maintenance = asyncio.create_task(
+        run_login_history_partition_maintenance()
+    )
     yield
+    partition_maintenance.cancel()
+    with suppress(asyncio.CancelledError):
+        await partition_maintenance
+    await login_history_writer.stop()
     await redis.redis.close()
 
 
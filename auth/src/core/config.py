@@ -29,6 +29,16 @@ class AuthJWT(BaseModel):
     reset_password_token_expire_minutes: int = 5
 
 
+class LoginHistorySettings(BaseModel):
+    batch_size: int = 500
+    flush_interval_seconds: float = 1.0
+    queue_max_size: int = 10_000
+    user_agent_cache_size: int = 1024
+    partition_months_ahead: int = 3
+    retention_months: int = 12
+    partition_maintenance_interval_seconds: int = 24 * 60 * 60
+
+
 class EnvSettings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=ENV_FILE_PATH, env_file_encoding="utf-8", extra="ignore"
@@ -66,6 +76,7 @@ class Settings(BaseSettings):
     project_settings: ProjectSettings = ProjectSettings()
     service_settings: ServiceSettings = ServiceSettings()
     jwt_settings: AuthJWT = AuthJWT()
+    login_history_settings: LoginHistorySettings = LoginHistorySettings()
 
     REQUEST_LIMIT_PER_MINUTE: int = 20
 
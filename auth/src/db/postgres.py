@@ -1,3 +1,4 @@
+from sqlalchemy import insert, inspect
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -46,6 +47,27 @@ class DatabaseHelper:
             await conn.run_sync(Base.metadata.drop_all)
 
 
+async def insert_returning(session: AsyncSession, instance: Base) -> Base:
+    """
+    Insert the transient ORM instance with the single INSERT ... RETURNING
+    statement and return the persistent instance with the database
+    generated values, so no refresh SELECT is needed after the commit.
+
+    The services are built from their own directories and share no code,
+    so the same helper lives in billing_service/src/db/postgres.py;
+    change both.
+    """
+    model = type(instance)
+    values = {
+        column_attr.key: getattr(instance, column_attr.key)
+        for column_attr in inspect(model).column_attrs
+        if getattr(instance, column_attr.key) is not None
+    }
+    stmt = insert(model).values(**values).returning(model)
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
 db_helper = DatabaseHelper(
     url=settings.db_url,
     echo=settings.db_echo,
@@ -1,18 +1,21 @@
 from __future__ import annotations
+import re
 import uuid
+from datetime import date, datetime, timezone
 from typing import TYPE_CHECKING
 
 from sqlalchemy import (
     DateTime,
     String,
     ForeignKey,
-    UniqueConstraint,
+    Index,
     PrimaryKeyConstraint,
     text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
+from src.core.config import settings
 from src.models.base import Base
 
 
@@ -20,73 +23,174 @@ if TYPE_CHECKING:
     from src.models.user import User
 
 
-def create_partition(target, connection, **kwargs) -> None:
+LOGIN_DEVICE_TYPES = (
+    'console',
+    'mobile',
+    'tablet',
+    'smarttv',
+    'wearable',
+    'embedded',
+    'undefined',
+)
+
+# Matches month partitions (`login_histories_mobile_2024_11`) and partitions
+# with the rows logged in before the month (`login_histories_mobile_before_2024_11`)
+MONTH_PARTITION_NAME_PATTERN = re.compile(r'_(before_)?(\d{4})_(\d{2})$')
+
+
+def add_months(month_start: date, months: int) -> date:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def create_month_partitions(connection, months_ahead: int) -> None:
     '''
-        Creating table partition by user sign in device:
-        console, mobile, tablet, smarttv, wearable, embedded, undefined
+        Creating monthly partitions by logged in at time for every device
+        partition from the current month to `months_ahead` months ahead.
+        Rows of the month which were written into the default partition
+        before the month partition existed are moved into it
     '''
-    connection.execute(
-        text(
-            '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_console'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('console')
-            '''
-        ),
-    )
-    connection.execute(
-        text(
-            '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_mobile'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('mobile')
-            '''
-        ),
-    )
-    connection.execute(
-        text(
-            '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_tablet'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('tablet')
-            '''
-        ),
-    )
-    connection.execute(
-        text(
-            '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_smarttv'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('smarttv')
-            '''
-        ),
-    )
-    connection.execute(
-        text(
-            '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_wearable'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('wearable')
-            '''
-        ),
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+
+    for device_type in LOGIN_DEVICE_TYPES:
+        for offset in range(months_ahead + 1):
+            lower_bound = add_months(current_month, offset)
+            upper_bound = add_months(current_month, offset + 1)
+            partition_name = (
+                f'login_histories_{device_type}_{lower_bound:%Y_%m}'
+            )
+            partition_exists = connection.execute(
+                text('SELECT to_regclass(:name) IS NOT NULL'),
+                {'name': partition_name},
+            ).scalar()
+            if partition_exists:
+                continue
+
+            # The partition can't be attached while the default partition
+            # has rows in its range, so they are moved first
+            connection.execute(
+                text(
+                    f'''
+                        CREATE TABLE {partition_name}
+                        (LIKE login_histories INCLUDING DEFAULTS)
+                    '''
+                ),
+            )
+            connection.execute(
+                text(
+                    f'''
+                        WITH moved_rows AS (
+                            DELETE FROM login_histories_{device_type}_default
+                            WHERE logged_in_at >= '{lower_bound} 00:00:00+00'
+                            AND logged_in_at < '{upper_bound} 00:00:00+00'
+                            RETURNING *
+                        )
+                        INSERT INTO {partition_name}
+                        SELECT * FROM moved_rows
+                    '''
+                ),
+            )
+            connection.execute(
+                text(
+                    f'''
+                        ALTER TABLE login_histories_{device_type}
+                        ATTACH PARTITION {partition_name}
+                        FOR VALUES
+                        FROM ('{lower_bound} 00:00:00+00')
+                        TO ('{upper_bound} 00:00:00+00')
+                    '''
+                ),
+            )
+
+
+def drop_expired_month_partitions(connection, retention_months: int) -> list[str]:
+    '''
+        Dropping partitions which contain only rows logged in earlier
+        than `retention_months` months ago and deleting such rows from
+        the default partitions
+    '''
+    cutoff = add_months(
+        datetime.now(timezone.utc).date().replace(day=1),
+        -retention_months,
     )
-    connection.execute(
+    result = connection.execute(
         text(
             '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_embedded'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('embedded')
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = ANY(:parents)
             '''
         ),
+        {
+            'parents': [
+                f'login_histories_{device_type}'
+                for device_type in LOGIN_DEVICE_TYPES
+            ],
+        },
     )
-    connection.execute(
-        text(
-            '''
-                CREATE TABLE IF NOT EXISTS 'login_histories_undefined'
-                PARTITION OF 'login_histories'
-                FOR VALUES IN ('undefined')
-            '''
-        ),
+
+    dropped_partitions = []
+    for partition_name in result.scalars():
+        match = MONTH_PARTITION_NAME_PATTERN.search(partition_name)
+        if not match:
+            continue
+
+        before, year, month = match.groups()
+        upper_bound = date(int(year), int(month), 1)
+        if not before:
+            upper_bound = add_months(upper_bound, 1)
+
+        if upper_bound <= cutoff:
+            connection.execute(text(f'DROP TABLE IF EXISTS {partition_name}'))
+            dropped_partitions.append(partition_name)
+
+    for device_type in LOGIN_DEVICE_TYPES:
+        connection.execute(
+            text(
+                f'''
+                    DELETE FROM login_histories_{device_type}_default
+                    WHERE logged_in_at < '{cutoff} 00:00:00+00'
+                '''
+            ),
+        )
+
+    return dropped_partitions
+
+
+def create_partition(target, connection, **kwargs) -> None:
+    '''
+        Creating table partition by user sign in device:
+        console, mobile, tablet, smarttv, wearable, embedded, undefined.
+        Every device partition is partitioned by month of logging in,
+        rows outside of the month partitions go to its default partition
+    '''
+    for device_type in LOGIN_DEVICE_TYPES:
+        connection.execute(
+            text(
+                f'''
+                    CREATE TABLE IF NOT EXISTS login_histories_{device_type}
+                    PARTITION OF login_histories
+                    FOR VALUES IN ('{device_type}')
+                    PARTITION BY RANGE (logged_in_at)
+                '''
+            ),
+        )
+        connection.execute(
+            text(
+                f'''
+                    CREATE TABLE IF NOT EXISTS
+                    login_histories_{device_type}_default
+                    PARTITION OF login_histories_{device_type}
+                    DEFAULT
+                '''
+            ),
+        )
+
+    create_month_partitions(
+        connection,
+        settings.login_history_settings.partition_months_ahead,
     )
 
 
@@ -94,8 +198,12 @@ class LoginHistory(Base):
     __tablename__ = 'login_histories'
 
     __table_args__ = (
-        PrimaryKeyConstraint('id', 'device_type'),
-        UniqueConstraint('id', 'device_type'),
+        PrimaryKeyConstraint('id', 'device_type', 'logged_in_at'),
+        Index(
+            'ix_login_histories_user_id_logged_in_at',
+            'user_id',
+            'logged_in_at',
+        ),
         {
             'postgresql_partition_by': 'LIST (device_type)',
             'listeners': [('after_create', create_partition)],
@@ -109,7 +217,10 @@ class LoginHistory(Base):
     OS: Mapped[str] = mapped_column(String(32), nullable=True)
     browser: Mapped[str] = mapped_column(String(32), nullable=True)
     device_type: Mapped[str] = mapped_column(String(32))
-    logged_in_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True))
+    logged_in_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False
+    )
     user_id: Mapped[UUID] = mapped_column(
         ForeignKey('users.id', ondelete='CASCADE'),
         nullable=True
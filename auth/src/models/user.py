@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, String, Boolean
+from sqlalchemy import DateTime, String, Boolean, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from passlib.context import CryptContext
 
@@ -20,6 +20,19 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 class User(Base):
     __tablename__ = "users"
 
+    __table_args__ = (
+        # Username prefix search
+        Index(
+            "ix_users_username_pattern",
+            "username",
+            postgresql_ops={"username": "varchar_pattern_ops"},
+        ),
+        # Keyset pagination over users filtered by the flags
+        Index("ix_users_is_active_username", "is_active", "username"),
+        Index("ix_users_is_staff_username", "is_staff", "username"),
+        Index("ix_users_is_subscriber_username", "is_subscriber", "username"),
+    )
+
     username: Mapped[str] = mapped_column(String(32), unique=True, nullable=False)
     email: Mapped[str] = mapped_column(String(32), unique=True)
     password: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -35,12 +48,12 @@ class User(Base):
     )
     updated_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
         onupdate=lambda: datetime.now(timezone.utc),
     )
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
     )
 
     refresh_tokens: Mapped[list[RefreshToken]] = relationship(
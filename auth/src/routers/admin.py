@@ -6,17 +6,20 @@ from fastapi import (
     Depends,
     HTTPException,
     Path,
+    Query,
 )
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, Result
+from sqlalchemy import select
 from redis.asyncio import Redis
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page
+from fastapi_pagination.ext.sqlalchemy import paginate
 
 from src.db.postgres import db_helper
 from src.db.redis import get_redis
 from src.schemas.user import (
     UserRead,
+    UserPage,
     UserUpdate
 )
 from src.schemas.login_history import LoginHistoryBase
@@ -31,20 +34,45 @@ from src.utils.decorators import permission_required
 router = APIRouter()
 
 
-@router.get('/users', response_model=list[UserRead])
+@router.get('/users', response_model=UserPage)
 @permission_required(role_required=DefaultRoleEnum.ADMIN)
 async def get_users(
+    limit: Annotated[int, Query(ge=1, le=500, description='Page size')] = 50,
+    cursor: Annotated[
+        str | None,
+        Query(description='Username of the last user of the previous page'),
+    ] = None,
+    is_active: Annotated[bool | None, Query()] = None,
+    is_staff: Annotated[bool | None, Query()] = None,
+    is_subscriber: Annotated[bool | None, Query()] = None,
+    username_prefix: Annotated[str | None, Query(max_length=32)] = None,
     credentials: HTTPAuthorizationCredentials = Depends(auth_utils.http_bearer),
     session: AsyncSession = Depends(db_helper.get_session)
 ):
     '''
     Get user list:
 
+    Parameters:
+        **limit** (int): page size (default=50)
+        **cursor** (str): next_cursor value of the previous page
+        **is_active**, **is_staff**, **is_subscriber** (bool): user flags
+        to filter by
+        **username_prefix** (str): username prefix to filter by
+
     Return value:
-        **users** (list[UserRead]): list of users with the following
-        fields: id, login, first_name, last_name and email
+        **items** (list[UserRead]): list of users ordered by username with
+        the following fields: id, login, first_name, last_name and email
+        **next_cursor** (str): cursor of the next page, null for the last page
     '''
-    return await user_crud.get_users(session)
+    return await user_crud.get_users(
+        session,
+        limit=limit,
+        cursor=cursor,
+        is_active=is_active,
+        is_staff=is_staff,
+        is_subscriber=is_subscriber,
+        username_prefix=username_prefix,
+    )
 
 
 @router.get('/user/{user_id}', response_model=UserRead)
@@ -101,12 +129,30 @@ async def get_user_auth_history(
             detail=messages.INVALID_TOKEN_ERROR
         )
 
-    stmt = select(LoginHistory).where(LoginHistory.user_id == user_id)
+    stmt = (
+        select(LoginHistory)
+        .where(LoginHistory.user_id == user_id)
+        .order_by(LoginHistory.logged_in_at.desc())
+    )
+
+    return await paginate(session, stmt)
 
-    result: Result = await session.execute(stmt)
-    login_history = result.scalars().all()
 
-    return paginate(login_history)
+@router.get('/user-agent-cache')
+@permission_required(role_required=DefaultRoleEnum.ADMIN)
+async def get_user_agent_cache_info(
+    credentials: HTTPAuthorizationCredentials = Depends(auth_utils.http_bearer),
+):
+    '''
+    Get User-Agent parsing cache statistics:
+
+    Return value:
+        **hits** (int): the amount of cache hits
+        **misses** (int): the amount of cache misses
+        **size** (int): the amount of cached User-Agent strings
+        **max_size** (int): cache capacity
+    '''
+    return auth_utils.get_user_agent_cache_info()
 
 
 @router.patch('/{user_id}/', response_model=UserRead)
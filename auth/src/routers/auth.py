@@ -14,7 +14,7 @@ from sqlalchemy import delete
 from redis.asyncio import Redis
 
 from src.utils import auth_token_utils
-from src.schemas.user import UserCreate
+from src.schemas.user import UserCreate, UserIds
 from src.schemas.token import Token
 from src.db.postgres import db_helper
 from src.db.redis import get_redis
@@ -65,7 +65,7 @@ async def login(
         username, password, session
     )
 
-    await auth_utils.parse_request_user_agent_information(request, session, user)
+    auth_utils.parse_request_user_agent_information(request, user)
 
     access_token = await auth_token_utils.create_access_token(user, session)
     refresh_token = await auth_token_utils.create_refresh_token(user, session)
@@ -149,3 +149,31 @@ async def cancel_user_subscription(
     return {
         "details": messages.USER_SUBSCRIPTION_WAS_CANCELLED,
     }
+
+
+@router.post(
+    "/subscription/users/delete/",
+)
+async def cancel_users_subscriptions(
+    user_ids_in: UserIds,
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Cancel the subscriptions of many users at once, used by the billing
+    subscription scheduler for the expired subscriptions
+
+    Parameters:
+    - **user_ids** (list[UUID]): users IDs
+
+    Return value:
+    - **number_of_updated_users** (int): number of the users which were
+    subscribers
+    """
+    number_of_updated_users = await user_crud.cancel_users_subscriptions(
+        session,
+        user_ids_in.user_ids,
+    )
+    return {
+        "details": messages.USERS_SUBSCRIPTIONS_WERE_CANCELLED,
+        "number_of_updated_users": number_of_updated_users,
+    }
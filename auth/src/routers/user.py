@@ -8,9 +8,10 @@ from fastapi import (
 )
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, Result
+from sqlalchemy import select
 from redis.asyncio import Redis
-from fastapi_pagination import Page, paginate
+from fastapi_pagination import Page
+from fastapi_pagination.ext.sqlalchemy import paginate
 
 from src.db.postgres import db_helper
 from src.db.redis import get_redis
@@ -93,11 +94,13 @@ async def get_auth_user_auth_history(
 
     user_id = payload["user_id"]
 
-    stmt = select(LoginHistory).where(LoginHistory.user_id == user_id)
-    result: Result = await session.execute(stmt)
-    login_history = result.scalars().all()
+    stmt = (
+        select(LoginHistory)
+        .where(LoginHistory.user_id == user_id)
+        .order_by(LoginHistory.logged_in_at.desc())
+    )
 
-    return paginate(login_history)
+    return await paginate(session, stmt)
 
 
 @router.patch("/update", response_model=UserRead)
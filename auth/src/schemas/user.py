@@ -1,7 +1,7 @@
 from uuid import UUID
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserBase(BaseModel):
@@ -26,6 +26,11 @@ class UserRead(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserPage(BaseModel):
+    items: list[UserRead]
+    next_cursor: str | None = None
+
+
 class UserUpdate(BaseModel):
     username: str | None = None
     first_name: str | None = None
@@ -60,3 +65,7 @@ class UserResetPassword(BaseModel):
 
 class UserEmail(BaseModel):
     email: EmailStr
+
+
+class UserIds(BaseModel):
+    user_ids: list[UUID] = Field(max_length=10_000)
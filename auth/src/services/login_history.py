@@ -0,0 +1,144 @@
+import asyncio
+import logging
+
+from sqlalchemy import insert
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.models.login_history import (
+    LoginHistory,
+    create_month_partitions,
+    drop_expired_month_partitions,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class LoginHistoryWriter:
+    '''
+        Buffers login history rows in memory and bulk-inserts them into
+        the partitioned `login_histories` table in the background, so
+        that the login request doesn't wait for the insert and commit.
+    '''
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval_seconds: float,
+        queue_max_size: int,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.queue_max_size = queue_max_size
+
+        self._queue: asyncio.Queue[dict | None] | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        # The sentinel is queued after all buffered entries, so they are
+        # flushed before the background task exits
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def add(self, entry: dict) -> None:
+        if self._queue is None:
+            raise RuntimeError('Login history writer is not started.')
+
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            logger.warning(
+                'Login history buffer is full, entry of user %s was dropped',
+                entry.get('user_id'),
+            )
+
+    def _take_batch(self, first: dict) -> tuple[list[dict], bool]:
+        batch = [first]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _run(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+
+            # Give other logins a chance to join the batch unless
+            # it is already full
+            if self._queue.qsize() + 1 < self.batch_size:
+                await asyncio.sleep(self.flush_interval_seconds)
+
+            batch, stopping = self._take_batch(entry)
+            await self._flush(batch)
+
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+
+        try:
+            async with db_helper.async_session() as session:
+                await session.execute(insert(LoginHistory), batch)
+                await session.commit()
+        except Exception:
+            logger.exception(
+                'Failed to write %d login history entries', len(batch)
+            )
+
+
+login_history_writer = LoginHistoryWriter(
+    batch_size=settings.login_history_settings.batch_size,
+    flush_interval_seconds=(
+        settings.login_history_settings.flush_interval_seconds
+    ),
+    queue_max_size=settings.login_history_settings.queue_max_size,
+)
+
+
+async def maintain_login_history_partitions() -> None:
+    async with db_helper.engine.begin() as connection:
+        await connection.run_sync(
+            create_month_partitions,
+            settings.login_history_settings.partition_months_ahead,
+        )
+        dropped_partitions = await connection.run_sync(
+            drop_expired_month_partitions,
+            settings.login_history_settings.retention_months,
+        )
+
+    if dropped_partitions:
+        logger.info(
+            'Expired login history partitions were dropped: %s',
+            ', '.join(dropped_partitions),
+        )
+
+
+async def run_login_history_partition_maintenance() -> None:
+    '''
+        Creating future monthly partitions and dropping the expired ones
+        once per maintenance interval
+    '''
+    while True:
+        try:
+            await maintain_login_history_partitions()
+        except Exception:
+            logger.exception('Login history partition maintenance failed')
+
+        await asyncio.sleep(
+            settings.login_history_settings.partition_maintenance_interval_seconds
+        )
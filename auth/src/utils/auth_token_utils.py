@@ -6,6 +6,7 @@ import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import settings
+from src.db.postgres import insert_returning
 from src.models.user import User
 from src.models.refresh_token import RefreshToken
 from src.models.user_roles import DefaultRoleEnum
@@ -114,10 +115,8 @@ async def create_refresh_token(user: User, session: AsyncSession) -> str:
         token_data=jwt_payload,
         expire_timedelta=timedelta(minutes=5),
     )
-    token_to_db = RefreshToken(id=token_id, user_id=user.id)
-    session.add(token_to_db)
+    await insert_returning(session, RefreshToken(id=token_id, user_id=user.id))
     await session.commit()
-    await session.refresh(token_to_db)
     return token
 
 
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from functools import lru_cache
 
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, OAuth2PasswordBearer
@@ -7,11 +8,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, Result
 from uaparser import UAParser
 
+from src.core.config import settings
 from src.models.user import User
-from src.models.login_history import LoginHistory
 from src.utils.messages import messages
 from src.utils import auth_token_utils
 from src.db.postgres import db_helper
+from src.services.login_history import login_history_writer
 
 
 http_bearer = HTTPBearer(auto_error=False)
@@ -79,33 +81,54 @@ async def get_current_auth_user_for_refresh(
     return user
 
 
-async def parse_request_user_agent_information(
-    request: Request,
-    session: AsyncSession,
-    user: User,
-):
-    ua_header_data = request.headers.get('User-Agent')
+@lru_cache(maxsize=settings.login_history_settings.user_agent_cache_size)
+def parse_user_agent(ua_header_data: str | None) -> tuple[str, str, str]:
+    '''
+        Parse User-Agent header into (device type, OS, browser) tuple.
+        The number of distinct User-Agent strings is small, so the parsed
+        values are kept in the LRU cache
+    '''
     login_device_information = UAParser.parse(ua_header_data)
 
-    if not login_device_information['device']['type']:
-        login_device_information['device']['type'] = 'undefined'
-
-    entry_history_to_db = LoginHistory(
-        OS=(
+    return (
+        login_device_information['device']['type'] or 'undefined',
+        (
             f"{login_device_information['os']['name']} "
             f"{login_device_information['os']['version']}"
         ),
-        browser=(
-            f"{login_device_information['browser']['name']} "
-        ),
-        device_type=login_device_information['device']['type'],
-        logged_in_at=datetime.now(timezone.utc),
-        user_id=user.id
+        f"{login_device_information['browser']['name']} ",
+    )
+
+
+def get_user_agent_cache_info() -> dict:
+    cache_info = parse_user_agent.cache_info()
+    return {
+        'hits': cache_info.hits,
+        'misses': cache_info.misses,
+        'size': cache_info.currsize,
+        'max_size': cache_info.maxsize,
+    }
+
+
+def parse_request_user_agent_information(
+    request: Request,
+    user: User,
+):
+    device_type, os_name, browser = parse_user_agent(
+        request.headers.get('User-Agent')
     )
 
-    session.add(entry_history_to_db)
-    await session.commit()
-    await session.refresh(entry_history_to_db)
+    # The entry is written to the database in batches by the background
+    # login history writer
+    login_history_writer.add(
+        {
+            'OS': os_name,
+            'browser': browser,
+            'device_type': device_type,
+            'logged_in_at': datetime.now(timezone.utc),
+            'user_id': user.id,
+        }
+    )
 
 
 async def get_user_by_username_or_raise_exception(
@@ -32,6 +32,9 @@ class Messages:
     USER_SUBSCRIPTION_WAS_CANCELLED = (
         "The user's subscription was successfully cancelled."
     )
+    USERS_SUBSCRIPTIONS_WERE_CANCELLED = (
+        "The users' subscriptions were successfully cancelled."
+    )
 
 
 messages = Messages()
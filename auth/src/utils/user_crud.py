@@ -1,8 +1,9 @@
 from typing import Annotated
+from uuid import UUID
 from datetime import datetime, timezone
 
 from fastapi import Depends, Path, status, HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
 from jwt.exceptions import ExpiredSignatureError
@@ -11,21 +12,51 @@ from src.models.user import User
 from src.schemas.user import (
     UserCreate,
     UserRead,
+    UserPage,
     UserUpdate,
     UserUpdatePassword,
     UserResetPassword,
 )
-from src.db.postgres import db_helper
+from src.db.postgres import db_helper, insert_returning
 from src.services import rabbitmq
 from src.utils.messages import messages
 from src.utils import auth_token_utils
 
 
-async def get_users(session: AsyncSession) -> list[User]:
-    stmt = select(User).order_by(User.username)
+async def get_users(
+    session: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    is_active: bool | None = None,
+    is_staff: bool | None = None,
+    is_subscriber: bool | None = None,
+    username_prefix: str | None = None,
+) -> UserPage:
+    stmt = select(User)
+
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if is_staff is not None:
+        stmt = stmt.where(User.is_staff == is_staff)
+    if is_subscriber is not None:
+        stmt = stmt.where(User.is_subscriber == is_subscriber)
+    if username_prefix:
+        stmt = stmt.where(User.username.startswith(username_prefix, autoescape=True))
+
+    # Keyset pagination: the cursor is the username of the last user
+    # of the previous page
+    if cursor:
+        stmt = stmt.where(User.username > cursor)
+
+    # One extra row shows whether there is a next page
+    stmt = stmt.order_by(User.username).limit(limit + 1)
     result: Result = await session.execute(stmt)
     users = result.scalars().all()
-    return users
+
+    return UserPage(
+        items=users[:limit],
+        next_cursor=users[limit - 1].username if len(users) > limit else None,
+    )
 
 
 async def get_user(session: AsyncSession, user_id: str) -> User | None:
@@ -63,10 +94,8 @@ async def get_user_by_email(
 
 
 async def create_user(session: AsyncSession, user_in: UserCreate) -> UserRead:
-    user = User(**user_in.model_dump())
-    session.add(user)
+    user = await insert_returning(session, User(**user_in.model_dump()))
     await session.commit()
-    await session.refresh(user)
 
     await rabbitmq.send_message_using_routing_key(
         exchange_name=rabbitmq.UserActivityExchange.EXCHANGE_NAME.value,
@@ -94,6 +123,27 @@ async def update_user(
     return user
 
 
+async def cancel_users_subscriptions(
+    session: AsyncSession,
+    user_ids: list[UUID],
+) -> int:
+    """
+    Reset the subscriber flag of the users with one UPDATE and return the
+    number of the users which were subscribers
+    """
+    stmt = (
+        update(User)
+        .where(User.id.in_(user_ids), User.is_subscriber.is_(True))
+        .values(is_subscriber=False)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await session.execute(stmt)
+    number_of_updated_users = len(result.all())
+    await session.commit()
+    return number_of_updated_users
+
+
 async def delete_user(
     session: AsyncSession,
     user: User,
@@ -0,0 +1,42 @@
+"""add server side timestamp defaults
+
+Revision ID: a91e4c6d2b57
+Revises: 50d86e280350
+Create Date: 2026-10-19 12:40:18.204713
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a91e4c6d2b57"
+down_revision: Union[str, None] = "50d86e280350"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("currencies", "currency_pairs", "profiles", "bank_accounts")
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        for column_name in ("created_at", "updated_at"):
+            op.alter_column(
+                table_name,
+                column_name,
+                server_default=sa.func.now(),
+            )
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        for column_name in ("created_at", "updated_at"):
+            op.alter_column(
+                table_name,
+                column_name,
+                server_default=None,
+            )
@@ -0,0 +1,142 @@
+"""store money in minor units
+
+Revision ID: d3f6a0b8c129
+Revises: a91e4c6d2b57
+Create Date: 2026-10-19 14:15:36.880152
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3f6a0b8c129"
+down_revision: Union[str, None] = "a91e4c6d2b57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The exponents as of this revision, copied so that the migration doesn't
+# change with src.utils.money
+CURRENCY_EXPONENTS = {
+    "RUB": 2,
+    "USD": 2,
+    "EUR": 2,
+    "CNY": 2,
+    "PNT": 2,
+}
+
+
+BALANCE_CHECK_CONSTRAINT_NAME = (
+    "ck_bank_accounts_ck_bank_accounts_balance_more_than_zero"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "currencies",
+        sa.Column(
+            "exponent",
+            sa.SmallInteger(),
+            server_default="2",
+            nullable=False,
+        ),
+    )
+    for title, exponent in CURRENCY_EXPONENTS.items():
+        op.execute(
+            sa.text(
+                "UPDATE currencies SET exponent = :exponent WHERE title = :title"
+            ).bindparams(exponent=exponent, title=title)
+        )
+
+    # Subqueries aren't allowed in ALTER COLUMN ... USING, so balances are
+    # converted through a new column with the exponent of their currency
+    op.add_column(
+        "bank_accounts",
+        sa.Column("balance_in_minor_units", sa.BigInteger(), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE bank_accounts
+        SET balance_in_minor_units = round(
+            balance::numeric * power(
+                10,
+                COALESCE(
+                    (
+                        SELECT exponent FROM currencies
+                        WHERE currencies.title = bank_accounts.currency
+                    ),
+                    2
+                )
+            )
+        )::bigint
+        """
+    )
+    op.drop_column("bank_accounts", "balance")
+    op.alter_column(
+        "bank_accounts",
+        "balance_in_minor_units",
+        new_column_name="balance",
+        nullable=False,
+        server_default="0",
+    )
+    op.create_check_constraint(
+        op.f(BALANCE_CHECK_CONSTRAINT_NAME),
+        "bank_accounts",
+        "balance >= 0",
+    )
+
+    op.alter_column(
+        "currency_pairs",
+        "exchange_rate",
+        type_=sa.Numeric(18, 8),
+        postgresql_using="exchange_rate::numeric(18, 8)",
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "currency_pairs",
+        "exchange_rate",
+        type_=sa.Float(precision=4),
+        postgresql_using="exchange_rate::real",
+        existing_nullable=False,
+    )
+
+    op.add_column(
+        "bank_accounts",
+        sa.Column("balance_in_major_units", sa.Float(precision=2), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE bank_accounts
+        SET balance_in_major_units = balance / power(
+            10,
+            COALESCE(
+                (
+                    SELECT exponent FROM currencies
+                    WHERE currencies.title = bank_accounts.currency
+                ),
+                2
+            )
+        )
+        """
+    )
+    op.drop_column("bank_accounts", "balance")
+    op.alter_column(
+        "bank_accounts",
+        "balance_in_major_units",
+        new_column_name="balance",
+        nullable=False,
+    )
+    op.create_check_constraint(
+        op.f(BALANCE_CHECK_CONSTRAINT_NAME),
+        "bank_accounts",
+        "balance >= 0",
+    )
+
+    op.drop_column("currencies", "exponent")
@@ -0,0 +1,121 @@
+"""create ledger tables
+
+Revision ID: 8e2b47c0f6d3
+Revises: d3f6a0b8c129
+Create Date: 2026-10-19 15:20:07.413962
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e2b47c0f6d3"
+down_revision: Union[str, None] = "d3f6a0b8c129"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_entries",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("journal_id", sa.UUID(), nullable=False),
+        sa.Column("entry_type", sa.String(length=32), nullable=False),
+        sa.Column("bank_account_id", sa.UUID(), nullable=True),
+        sa.Column("system_account", sa.String(length=32), nullable=True),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.CheckConstraint(
+            "(bank_account_id IS NULL) <> (system_account IS NULL)",
+            name=op.f("ck_ledger_entries_single_account"),
+        ),
+        sa.CheckConstraint(
+            "amount <> 0",
+            name=op.f("ck_ledger_entries_amount_is_not_zero"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_ledger_entries")),
+    )
+    op.create_index(
+        op.f("ix_ledger_entries_journal_id"),
+        "ledger_entries",
+        ["journal_id"],
+    )
+    op.create_index(
+        "ix_ledger_entries_bank_account_id_created_at",
+        "ledger_entries",
+        ["bank_account_id", "created_at"],
+    )
+    op.create_index(
+        "ix_ledger_entries_created_at",
+        "ledger_entries",
+        ["created_at"],
+        postgresql_using="brin",
+    )
+
+    op.create_table(
+        "ledger_snapshots",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("bank_account_id", sa.UUID(), nullable=False),
+        sa.Column("balance", sa.BigInteger(), nullable=False),
+        sa.Column("taken_until", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["bank_account_id"],
+            ["bank_accounts.id"],
+            name=op.f("fk_ledger_snapshots_bank_account_id_bank_accounts"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_ledger_snapshots")),
+        sa.UniqueConstraint("id", name=op.f("uq_ledger_snapshots_id")),
+        sa.UniqueConstraint(
+            "bank_account_id",
+            name=op.f("uq_ledger_snapshots_bank_account_id"),
+        ),
+    )
+
+    # Existing balances are carried over as opening balance journals
+    op.execute(
+        """
+        WITH opening_balances AS (
+            SELECT gen_random_uuid() AS journal_id, id, currency, balance
+            FROM bank_accounts
+            WHERE balance <> 0
+        )
+        INSERT INTO ledger_entries (
+            journal_id, entry_type, bank_account_id, system_account,
+            currency, amount
+        )
+        SELECT journal_id, 'OPENING_BALANCE', id, NULL, currency, balance
+        FROM opening_balances
+        UNION ALL
+        SELECT journal_id, 'OPENING_BALANCE', NULL, 'opening_balances',
+            currency, -balance
+        FROM opening_balances
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ledger_snapshots")
+    op.drop_index(
+        "ix_ledger_entries_created_at",
+        table_name="ledger_entries",
+    )
+    op.drop_index(
+        "ix_ledger_entries_bank_account_id_created_at",
+        table_name="ledger_entries",
+    )
+    op.drop_index(
+        op.f("ix_ledger_entries_journal_id"),
+        table_name="ledger_entries",
+    )
+    op.drop_table("ledger_entries")
@@ -0,0 +1,76 @@
+"""create transaction outbox
+
+Revision ID: 4c1f9a7e2d85
+Revises: 8e2b47c0f6d3
+Create Date: 2026-10-19 16:10:42.281573
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c1f9a7e2d85"
+down_revision: Union[str, None] = "8e2b47c0f6d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transaction_outbox",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column(
+            "document",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_transaction_outbox")),
+    )
+
+    op.create_table(
+        "outbox_checkpoints",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column(
+            "last_event_id",
+            sa.BigInteger(),
+            server_default="0",
+            nullable=False,
+        ),
+        sa.Column(
+            "number_of_projected_events",
+            sa.BigInteger(),
+            server_default="0",
+            nullable=False,
+        ),
+        sa.Column(
+            "last_projected_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_outbox_checkpoints")),
+        sa.UniqueConstraint("id", name=op.f("uq_outbox_checkpoints_id")),
+        sa.UniqueConstraint("name", name=op.f("uq_outbox_checkpoints_name")),
+    )
+    op.execute(
+        """
+        INSERT INTO outbox_checkpoints (id, name)
+        VALUES (gen_random_uuid(), 'transactions')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("outbox_checkpoints")
+    op.drop_table("transaction_outbox")
@@ -0,0 +1,115 @@
+"""create subscriptions
+
+Revision ID: b6e3d1f0a472
+Revises: 4c1f9a7e2d85
+Create Date: 2026-10-19 17:05:18.904215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e3d1f0a472"
+down_revision: Union[str, None] = "4c1f9a7e2d85"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "status",
+            sa.String(length=16),
+            server_default="ACTIVE",
+            nullable=False,
+        ),
+        sa.Column("number_of_months", sa.SmallInteger(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("price", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "auto_renew",
+            sa.Boolean(),
+            server_default=sa.text("true"),
+            nullable=False,
+        ),
+        sa.Column(
+            "current_period_start",
+            sa.DateTime(timezone=True),
+            nullable=False,
+        ),
+        sa.Column(
+            "current_period_end",
+            sa.DateTime(timezone=True),
+            nullable=False,
+        ),
+        sa.Column(
+            "auth_deactivated_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["profile_id"],
+            ["profiles.id"],
+            name=op.f("fk_subscriptions_profile_id_profiles"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_subscriptions")),
+        sa.UniqueConstraint("id", name=op.f("uq_subscriptions_id")),
+    )
+    op.create_index(
+        "uq_subscriptions_profile_id_active",
+        "subscriptions",
+        ["profile_id"],
+        unique=True,
+        postgresql_where=sa.text("status = 'ACTIVE'"),
+    )
+    op.create_index(
+        "ix_subscriptions_current_period_end_active",
+        "subscriptions",
+        ["current_period_end"],
+        postgresql_where=sa.text("status = 'ACTIVE'"),
+    )
+    op.create_index(
+        "ix_subscriptions_id_auth_deactivation_pending",
+        "subscriptions",
+        ["id"],
+        postgresql_where=sa.text(
+            "status = 'EXPIRED' AND auth_deactivated_at IS NULL"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_subscriptions_id_auth_deactivation_pending",
+        table_name="subscriptions",
+    )
+    op.drop_index(
+        "ix_subscriptions_current_period_end_active",
+        table_name="subscriptions",
+    )
+    op.drop_index(
+        "uq_subscriptions_profile_id_active",
+        table_name="subscriptions",
+    )
+    op.drop_table("subscriptions")
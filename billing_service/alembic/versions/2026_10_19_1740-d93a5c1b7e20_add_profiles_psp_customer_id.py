@@ -0,0 +1,40 @@
+"""add profiles psp_customer_id
+
+Revision ID: d93a5c1b7e20
+Revises: b6e3d1f0a472
+Create Date: 2026-10-19 17:40:27.316058
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d93a5c1b7e20"
+down_revision: Union[str, None] = "b6e3d1f0a472"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "profiles",
+        sa.Column("psp_customer_id", sa.String(length=255), nullable=True),
+    )
+    op.create_unique_constraint(
+        op.f("uq_profiles_psp_customer_id"),
+        "profiles",
+        ["psp_customer_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        op.f("uq_profiles_psp_customer_id"),
+        "profiles",
+        type_="unique",
+    )
+    op.drop_column("profiles", "psp_customer_id")
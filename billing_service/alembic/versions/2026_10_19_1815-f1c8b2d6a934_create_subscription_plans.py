@@ -0,0 +1,54 @@
+"""create subscription plans
+
+Revision ID: f1c8b2d6a934
+Revises: d93a5c1b7e20
+Create Date: 2026-10-19 18:15:42.508213
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c8b2d6a934"
+down_revision: Union[str, None] = "d93a5c1b7e20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "subscription_plans",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("number_of_months", sa.SmallInteger(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("price", sa.BigInteger(), nullable=False),
+        sa.Column("psp_product_id", sa.String(length=255), nullable=False),
+        sa.Column("psp_price_id", sa.String(length=255), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_subscription_plans")),
+        sa.UniqueConstraint("id", name=op.f("uq_subscription_plans_id")),
+        sa.UniqueConstraint(
+            "number_of_months",
+            "currency",
+            name=op.f("uq_subscription_plans_number_of_months_currency"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("subscription_plans")
@@ -0,0 +1,78 @@
+"""cut ledger snapshots by transaction id
+
+Revision ID: a7d4e9c2b815
+Revises: f1c8b2d6a934
+Create Date: 2026-10-20 10:30:51.204377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d4e9c2b815"
+down_revision: Union[str, None] = "f1c8b2d6a934"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The existing entries get the id of this transaction, the snapshots
+    # are rebuilt by the next job run
+    op.add_column(
+        "ledger_entries",
+        sa.Column(
+            "transaction_id",
+            sa.BigInteger(),
+            server_default=sa.text("pg_current_xact_id()::text::bigint"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_ledger_entries_bank_account_id_transaction_id",
+        "ledger_entries",
+        ["bank_account_id", "transaction_id"],
+    )
+    op.create_index(
+        "ix_ledger_entries_transaction_id",
+        "ledger_entries",
+        ["transaction_id"],
+        postgresql_using="brin",
+    )
+
+    op.execute("TRUNCATE ledger_snapshots")
+    op.drop_column("ledger_snapshots", "taken_until")
+    op.add_column(
+        "ledger_snapshots",
+        sa.Column(
+            "taken_until_transaction_id",
+            sa.BigInteger(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.execute("TRUNCATE ledger_snapshots")
+    op.drop_column("ledger_snapshots", "taken_until_transaction_id")
+    op.add_column(
+        "ledger_snapshots",
+        sa.Column(
+            "taken_until",
+            sa.DateTime(timezone=True),
+            nullable=False,
+        ),
+    )
+
+    op.drop_index(
+        "ix_ledger_entries_transaction_id",
+        table_name="ledger_entries",
+    )
+    op.drop_index(
+        "ix_ledger_entries_bank_account_id_transaction_id",
+        table_name="ledger_entries",
+    )
+    op.drop_column("ledger_entries", "transaction_id")
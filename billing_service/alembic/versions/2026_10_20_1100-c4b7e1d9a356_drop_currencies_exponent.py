@@ -0,0 +1,53 @@
+"""drop currencies exponent
+
+Revision ID: c4b7e1d9a356
+Revises: a7d4e9c2b815
+Create Date: 2026-10-20 11:00:12.583921
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4b7e1d9a356"
+down_revision: Union[str, None] = "a7d4e9c2b815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The exponents as of this revision, copied so that the migration doesn't
+# change with src.utils.money
+CURRENCY_EXPONENTS = {
+    "RUB": 2,
+    "USD": 2,
+    "EUR": 2,
+    "CNY": 2,
+    "PNT": 2,
+}
+
+
+def upgrade() -> None:
+    # The exponents are defined by src.utils.money only
+    op.drop_column("currencies", "exponent")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "currencies",
+        sa.Column(
+            "exponent",
+            sa.SmallInteger(),
+            server_default="2",
+            nullable=False,
+        ),
+    )
+    for title, exponent in CURRENCY_EXPONENTS.items():
+        op.execute(
+            sa.text(
+                "UPDATE currencies SET exponent = :exponent WHERE title = :title"
+            ).bindparams(exponent=exponent, title=title)
+        )
@@ -0,0 +1,43 @@
+"""create processed checkout sessions
+
+Revision ID: e5a2c8f1b374
+Revises: c4b7e1d9a356
+Create Date: 2026-10-20 12:00:18.640271
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a2c8f1b374"
+down_revision: Union[str, None] = "c4b7e1d9a356"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "processed_checkout_sessions",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("checkout_session_id", sa.String(length=255), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_processed_checkout_sessions")),
+        sa.UniqueConstraint("id", name=op.f("uq_processed_checkout_sessions_id")),
+        sa.UniqueConstraint(
+            "checkout_session_id",
+            name=op.f("uq_processed_checkout_sessions_checkout_session_id"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("processed_checkout_sessions")
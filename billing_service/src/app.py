@@ -2,10 +2,11 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-# from redis.asyncio import Redis
+from redis.asyncio import Redis
 # from fastapi_pagination import add_pagination
 
-from src.db.mongodb import get_mongodb_client
+from src.db import redis
+from src.db.mongodb import mongodb_helper
 from src.core.config import BASE_DIR, settings
 from src.routers.profile import router as profile_router
 from src.routers.currency import router as currency_router
@@ -15,22 +16,28 @@ from src.routers.admin_profiles import router as admin_profile_router
 from src.routers.admin_bank_accounts import router as admin_bank_account_router
 from src.routers.payment_service import router as payment_service_router
 from src.routers.transaction import router as transaction_router
+from src.routers.admin_metrics import router as admin_metrics_router
+from src.routers.admin_ledger import router as admin_ledger_router
+from src.routers.admin_payouts import router as admin_payouts_router
+from src.services.transaction_projector import transaction_history_projector
+from src.services.transaction_writer import transaction_bulk_writer
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    await get_mongodb_client(
-        settings.mongodb_settings.mongodb_host,
-        settings.mongodb_settings.mongodb_port,
-        settings.mongodb_settings.mongodb_db_name,
+    await mongodb_helper.connect()
+    redis.redis = Redis(
+        host=settings.redis_settings.redis_host,
+        port=settings.redis_settings.redis_port,
+        db=settings.redis_settings.redis_db,
     )
-    # redis.redis = Redis(
-    #     host=settings.service_settings.redis_host,
-    #     port=settings.service_settings.redis_port,
-    #     db=1
-    # )
+    transaction_bulk_writer.start()
+    transaction_history_projector.start()
     yield
-    # await redis.redis.close()
+    await transaction_history_projector.stop()
+    await transaction_bulk_writer.stop()
+    mongodb_helper.close()
+    await redis.redis.close()
 
 
 application = FastAPI(
@@ -86,5 +93,20 @@ application.include_router(
     prefix="/billing/transactions",
     tags=["Transaction History Endpoints"],
 )
+application.include_router(
+    admin_metrics_router,
+    prefix="/billing/admin/metrics",
+    tags=["Admin Metrics Endpoints"],
+)
+application.include_router(
+    admin_ledger_router,
+    prefix="/billing/admin/ledger",
+    tags=["Admin Ledger Endpoints"],
+)
+application.include_router(
+    admin_payouts_router,
+    prefix="/billing/admin/payouts",
+    tags=["Admin Payout Endpoints"],
+)
 
 # add_pagination(application)
@@ -49,7 +49,78 @@ class DatabaseSettings(EnvSettings):
 
 
 class RedisSettings(EnvSettings):
-    pass
+    redis_host: str = Field(default="redis")
+    redis_port: int = Field(default=6379)
+    redis_db: int = Field(default=2)
+
+
+class CacheSettings(EnvSettings):
+    cache_local_ttl_seconds: float = Field(default=5)
+    cache_local_max_size: int = Field(default=10_000)
+    cache_redis_ttl_seconds: int = Field(default=300)
+
+
+class IdempotencySettings(EnvSettings):
+    # Checkout sessions are reused for that long, they expire in 24 hours
+    idempotency_ttl_seconds: int = Field(default=3600)
+    # Requests without the Idempotency-Key header are deduplicated
+    # within the window only
+    idempotency_derived_window_seconds: int = Field(default=60)
+    idempotency_lock_timeout_seconds: float = Field(default=10)
+
+
+class BulkOperationSettings(EnvSettings):
+    bulk_operation_chunk_size: int = Field(default=1000)
+
+
+class LedgerSettings(EnvSettings):
+    ledger_snapshot_interval_seconds: int = Field(default=300)
+
+
+class OutboxSettings(EnvSettings):
+    outbox_batch_size: int = Field(default=500)
+    outbox_poll_interval_seconds: float = Field(default=1.0)
+
+
+class TransactionWriterSettings(EnvSettings):
+    transaction_writer_batch_size: int = Field(default=1000)
+    transaction_writer_flush_interval_seconds: float = Field(default=1.0)
+    transaction_writer_max_buffered_documents: int = Field(default=10000)
+    # "majority" or the number of the acknowledging replica set members
+    transaction_writer_write_concern: str = Field(default="majority")
+    transaction_writer_journal: bool = Field(default=True)
+
+
+class TransactionArchiveSettings(EnvSettings):
+    transaction_archive_dir: str = Field(
+        default=str(BASE_DIR / "archive" / "transactions"),
+    )
+    transaction_archive_after_days: int = Field(default=180)
+    transaction_archive_compression_level: int = Field(default=10)
+    transaction_archive_interval_seconds: int = Field(default=3600)
+
+
+class AnalyticsExportSettings(EnvSettings):
+    analytics_export_dir: str = Field(
+        default=str(BASE_DIR / "exports"),
+    )
+    analytics_export_batch_size: int = Field(default=10_000)
+    analytics_export_lag_seconds: int = Field(default=60)
+    analytics_export_interval_seconds: int = Field(default=3600)
+
+
+class SubscriptionSettings(EnvSettings):
+    subscription_batch_size: int = Field(default=500)
+    # Number of the batches processed at the same time
+    subscription_concurrency: int = Field(default=4)
+    subscription_scheduler_interval_seconds: int = Field(default=60)
+    # Plan prices in major units by the currency and the number of months
+    subscription_plan_prices: dict[str, dict[int, float]] = Field(
+        default={"USD": {1: 5, 3: 10, 6: 20}},
+    )
+    # Workers reload the synced PSP prices of the plans that often
+    subscription_plan_refresh_interval_seconds: float = Field(default=60)
+    subscription_plan_sync_interval_seconds: int = Field(default=3600)
 
 
 class RabbitMQSettings(EnvSettings):
@@ -60,6 +131,18 @@ class MongoDBSettings(EnvSettings):
     mongodb_host: str = Field(default="mongodb")
     mongodb_port: int = Field(default="27017")
     mongodb_db_name: str = Field(default="billing_service_database")
+    mongodb_max_pool_size: int = Field(default=100)
+    mongodb_min_pool_size: int = Field(default=0)
+    mongodb_max_idle_time_ms: int | None = Field(default=None)
+    # Comma separated list of "zstd", "snappy" and "zlib"
+    mongodb_compressors: str = Field(default="")
+    mongodb_read_preference: str = Field(default="primary")
+    mongodb_slow_command_ms: float = Field(default=100)
+
+
+class PaymentServiceSettings(EnvSettings):
+    # "stripe" or "fake", the local provider without the external calls
+    payment_service_provider: str = Field(default="stripe")
 
 
 class StripePaymentService(EnvSettings):
@@ -67,6 +150,9 @@ class StripePaymentService(EnvSettings):
     stripe_secret_key: str = Field(default="")
     stripe_webhook_secret: str = Field(default="")
     stripe_api_version: str = Field(default="2024-10-28.acacia")
+    stripe_customer_backfill_batch_size: int = Field(default=100)
+    # Concurrent Stripe API calls of the backfill
+    stripe_customer_backfill_concurrency: int = Field(default=8)
 
 
 class Settings(BaseSettings):
@@ -74,8 +160,24 @@ class Settings(BaseSettings):
     jwt_settings: AuthJWT = AuthJWT()
     db_settings: DatabaseSettings = DatabaseSettings()
     redis_settings: RedisSettings = RedisSettings()
+    cache_settings: CacheSettings = CacheSettings()
+    idempotency_settings: IdempotencySettings = IdempotencySettings()
+    bulk_operation_settings: BulkOperationSettings = BulkOperationSettings()
+    ledger_settings: LedgerSettings = LedgerSettings()
+    outbox_settings: OutboxSettings = OutboxSettings()
+    transaction_writer_settings: TransactionWriterSettings = (
+        TransactionWriterSettings()
+    )
+    transaction_archive_settings: TransactionArchiveSettings = (
+        TransactionArchiveSettings()
+    )
+    analytics_export_settings: AnalyticsExportSettings = (
+        AnalyticsExportSettings()
+    )
+    subscription_settings: SubscriptionSettings = SubscriptionSettings()
     rabbitmq_settings: RabbitMQSettings = RabbitMQSettings()
     mongodb_settings: MongoDBSettings = MongoDBSettings()
+    payment_service_settings: PaymentServiceSettings = PaymentServiceSettings()
     stripe_payment_service: StripePaymentService = StripePaymentService()
 
     auth_service_domain: str = "http://auth_backend:8000"
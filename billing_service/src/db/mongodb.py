@@ -1,23 +1,203 @@
+import logging
+from collections import defaultdict
+
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 
+from src.core.config import settings
 from src.models.transaction import Transaction
+from src.utils.metrics import LatencyHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """
+    Latency histograms of the MongoDB commands by the command name, the
+    commands slower than `slow_command_ms` are logged
+    """
+
+    def __init__(self, slow_command_ms: float):
+        self.slow_command_ms = slow_command_ms
+        self.latency: defaultdict[str, LatencyHistogram] = defaultdict(
+            LatencyHistogram
+        )
+        self.number_of_failures: defaultdict[str, int] = defaultdict(int)
+
+    def _observe(self, event, succeeded: bool) -> None:
+        milliseconds = event.duration_micros / 1000
+        self.latency[event.command_name].observe(milliseconds / 1000)
+        if not succeeded:
+            self.number_of_failures[event.command_name] += 1
+
+        if milliseconds >= self.slow_command_ms:
+            logger.warning(
+                "Slow MongoDB command %s on %s:%s took %.1f ms",
+                event.command_name,
+                *event.connection_id,
+                milliseconds,
+            )
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._observe(event, succeeded=True)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._observe(event, succeeded=False)
+
+    def get_stats(self) -> dict:
+        return {
+            command_name: {
+                **histogram.snapshot(),
+                "failures": self.number_of_failures[command_name],
+            }
+            for command_name, histogram in self.latency.items()
+        }
+
+
+class ConnectionPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters and the connection checkout latency histogram
+    """
+
+    def __init__(self):
+        self.number_of_created_connections = 0
+        self.number_of_closed_connections = 0
+        self.number_of_checked_out_connections = 0
+        self.number_of_checkout_failures = 0
+        self.checkout_latency = LatencyHistogram()
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        logger.warning("MongoDB connection pool of %s:%s was cleared", *event.address)
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self.number_of_created_connections += 1
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self.number_of_closed_connections += 1
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        self.number_of_checkout_failures += 1
+
+    def connection_checked_out(self, event) -> None:
+        self.number_of_checked_out_connections += 1
+        self.checkout_latency.observe(event.duration)
+
+    def connection_checked_in(self, event) -> None:
+        self.number_of_checked_out_connections -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            "open": (
+                self.number_of_created_connections
+                - self.number_of_closed_connections
+            ),
+            "checked_out": self.number_of_checked_out_connections,
+            "created": self.number_of_created_connections,
+            "closed": self.number_of_closed_connections,
+            "checkout_failures": self.number_of_checkout_failures,
+            "checkout_latency": self.checkout_latency.snapshot(),
+        }
+
+
+class MongoDBHelper:
+    """
+    Owner of the Motor client, the client is created and Beanie is
+    initialized on connect() from the application lifespan
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db_name: str,
+        max_pool_size: int,
+        min_pool_size: int,
+        max_idle_time_ms: int | None,
+        compressors: str,
+        read_preference: str,
+        slow_command_ms: float,
+    ):
+        self.host = host
+        self.port = port
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.max_idle_time_ms = max_idle_time_ms
+        self.compressors = compressors
+        self.read_preference = read_preference
+
+        self.command_listener = CommandLatencyListener(slow_command_ms)
+        self.pool_listener = ConnectionPoolListener()
+        self.client: AsyncIOMotorClient | None = None
+
+    async def connect(self) -> None:
+        options = {}
+        # zstd and snappy need the zstandard and python-snappy packages
+        if self.compressors:
+            options["compressors"] = self.compressors
+
+        self.client = AsyncIOMotorClient(
+            host=self.host,
+            port=self.port,
+            uuidRepresentation="standard",
+            maxPoolSize=self.max_pool_size,
+            minPoolSize=self.min_pool_size,
+            maxIdleTimeMS=self.max_idle_time_ms,
+            readPreference=self.read_preference,
+            event_listeners=[self.command_listener, self.pool_listener],
+            **options,
+        )
+        await init_beanie(
+            database=self.client[self.db_name],
+            document_models=[
+                Transaction,
+            ],
+        )
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def get_stats(self) -> dict:
+        return {
+            "pool": {
+                "max_size": self.max_pool_size,
+                "min_size": self.min_pool_size,
+                **self.pool_listener.get_stats(),
+            },
+            "commands": self.command_listener.get_stats(),
+        }
 
 
-async def get_mongodb_client(
-    mongodb_host: str,
-    mongodb_port: int,
-    mongodb_db_name: str,
-):
-    client = AsyncIOMotorClient(
-        host=mongodb_host,
-        port=mongodb_port,
-        uuidRepresentation="standard",
-    )
-    db = client[mongodb_db_name]
-    await init_beanie(
-        database=db,
-        document_models=[
-            Transaction,
-        ],
-    )
+mongodb_helper = MongoDBHelper(
+    host=settings.mongodb_settings.mongodb_host,
+    port=settings.mongodb_settings.mongodb_port,
+    db_name=settings.mongodb_settings.mongodb_db_name,
+    max_pool_size=settings.mongodb_settings.mongodb_max_pool_size,
+    min_pool_size=settings.mongodb_settings.mongodb_min_pool_size,
+    max_idle_time_ms=settings.mongodb_settings.mongodb_max_idle_time_ms,
+    compressors=settings.mongodb_settings.mongodb_compressors,
+    read_preference=settings.mongodb_settings.mongodb_read_preference,
+    slow_command_ms=settings.mongodb_settings.mongodb_slow_command_ms,
+)
@@ -1,3 +1,6 @@
+from typing import Any, AsyncIterator
+
+from sqlalchemy import insert, inspect
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -8,6 +11,49 @@ from src.core.config import settings
 from src.models.base import Base
 
 
+class LazySession:
+    """
+    Proxy to the AsyncSession which opens the session on the first
+    attribute access, so the request handlers that return before touching
+    the database don't acquire it at all.
+
+    The session checks a pooled connection out on the first statement and
+    keeps it until the transaction ends, so handlers doing long external
+    calls after their database work call release() to give the connection
+    back to the pool before the call. The next access opens a new session.
+
+    Special methods are looked up on the type, not through __getattr__, so
+    the context manager protocol is defined here: `async with session:`
+    releases the session on exit like AsyncSession closes itself.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self._session_factory = session_factory
+        self._session: AsyncSession | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    async def rollback(self) -> None:
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def release(self) -> None:
+        if self._session is None:
+            return
+
+        session, self._session = self._session, None
+        await session.close()
+
+    async def __aenter__(self) -> "LazySession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.release()
+
+
 class DatabaseHelper:
 
     def __init__(self, url: str, echo: bool = False):
@@ -27,15 +73,24 @@ class DatabaseHelper:
             expire_on_commit=False
         )
 
-    async def get_session(self) -> AsyncSession:
-        async with self.async_session() as session:
-            try:
-                yield session
-            except Exception:
-                await session.rollback()
-                raise
-            finally:
-                await session.close()
+    async def get_session(self) -> AsyncIterator[LazySession]:
+        session = LazySession(self.async_session)
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.release()
+
+    def get_pool_status(self) -> dict:
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
 
     async def create_database(self) -> None:
         async with self.engine.begin() as conn:
@@ -46,6 +101,26 @@ class DatabaseHelper:
             await conn.run_sync(Base.metadata.drop_all)
 
 
+async def insert_returning(session: AsyncSession, instance: Base) -> Base:
+    """
+    Insert the transient ORM instance with the single INSERT ... RETURNING
+    statement and return the persistent instance with the database
+    generated values, so no refresh SELECT is needed after the commit.
+
+    The services are built from their own directories and share no code,
+    so the same helper lives in auth/src/db/postgres.py; change both.
+    """
+    model = type(instance)
+    values = {
+        column_attr.key: getattr(instance, column_attr.key)
+        for column_attr in inspect(model).column_attrs
+        if getattr(instance, column_attr.key) is not None
+    }
+    stmt = insert(model).values(**values).returning(model)
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
 db_helper = DatabaseHelper(
     url=settings.db_url,
     echo=settings.db_echo,
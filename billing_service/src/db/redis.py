@@ -0,0 +1,8 @@
+from redis.asyncio import Redis
+
+
+redis: Redis | None = None
+
+
+def get_redis() -> Redis:
+    return redis
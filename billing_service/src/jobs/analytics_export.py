@@ -0,0 +1,53 @@
+import asyncio
+
+import typer
+from rich import print
+
+from src.core.config import settings
+from src.db.mongodb import mongodb_helper
+from src.services.analytics_export import EXPORT_TABLES, analytics_exporter
+
+
+async def run_analytics_export(table_names: list[str], loop: bool):
+    await mongodb_helper.connect()
+    try:
+        while True:
+            for table_name in table_names:
+                number_of_rows = await analytics_exporter.export(
+                    EXPORT_TABLES[table_name]
+                )
+                print(f"Rows of {table_name} were exported: {number_of_rows}")
+
+            if not loop:
+                return
+            await asyncio.sleep(
+                settings.analytics_export_settings.analytics_export_interval_seconds
+            )
+    finally:
+        mongodb_helper.close()
+
+
+def main(
+    table: list[str] = typer.Option(
+        list(EXPORT_TABLES),
+        help=f"Table to export, one of: {', '.join(EXPORT_TABLES)}",
+    ),
+    loop: bool = typer.Option(
+        False,
+        help="Keep exporting once per the export interval",
+    ),
+):
+    """
+    Export the rows changed since the last export of each table into
+    the Parquet files for the analytics
+    """
+    unknown_table_names = set(table) - set(EXPORT_TABLES)
+    if unknown_table_names:
+        raise typer.BadParameter(
+            f"Unknown tables: {', '.join(sorted(unknown_table_names))}"
+        )
+    asyncio.run(run_analytics_export(table, loop))
+
+
+if __name__ == "__main__":
+    typer.run(main)
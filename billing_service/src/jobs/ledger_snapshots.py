@@ -0,0 +1,41 @@
+import asyncio
+
+import typer
+from rich import print
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.utils import ledger_crud
+
+
+async def take_ledger_snapshots() -> int:
+    async with db_helper.async_session() as session:
+        return await ledger_crud.take_ledger_snapshots(session)
+
+
+async def run_ledger_snapshots(loop: bool):
+    while True:
+        number_of_snapshots = await take_ledger_snapshots()
+        print(f"Ledger snapshots were rolled forward: {number_of_snapshots}")
+
+        if not loop:
+            return
+        await asyncio.sleep(
+            settings.ledger_settings.ledger_snapshot_interval_seconds
+        )
+
+
+def main(
+    loop: bool = typer.Option(
+        False,
+        help="Keep taking snapshots once per the snapshot interval",
+    ),
+):
+    """
+    Roll the per bank account ledger balance snapshots forward
+    """
+    asyncio.run(run_ledger_snapshots(loop))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,43 @@
+import asyncio
+
+import typer
+from rich import print
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.services.plan_catalogue import plan_catalogue
+from src.services.psp.providers import get_payment_service_provider
+
+
+async def run_plan_catalogue_sync(loop: bool):
+    payment_service_provider = get_payment_service_provider()
+    while True:
+        async with db_helper.async_session() as session:
+            number_of_synced_plans = await plan_catalogue.sync(
+                payment_service_provider,
+                session,
+            )
+        print(f"Subscription plans were synced: {number_of_synced_plans}")
+
+        if not loop:
+            return
+        await asyncio.sleep(
+            settings.subscription_settings.subscription_plan_sync_interval_seconds
+        )
+
+
+def main(
+    loop: bool = typer.Option(
+        False,
+        help="Keep syncing the subscription plans once per the interval",
+    ),
+):
+    """
+    Create the PSP products and prices of the configured subscription
+    plans which weren't synced or whose price was changed
+    """
+    asyncio.run(run_plan_catalogue_sync(loop))
+
+
+if __name__ == "__main__":
+    typer.run(main)
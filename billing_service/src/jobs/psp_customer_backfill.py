@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+import typer
+from rich import print
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.services.psp.providers import get_payment_service_provider
+from src.utils import profile_crud
+
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_psp_customers() -> tuple[int, int]:
+    """
+    Store the PSP customers of the profiles which don't have one, batch
+    by batch in the profile id order. The customers of a batch are looked
+    up or created concurrently and stored with one UPDATE. The failed
+    profiles and the customers which weren't stored are skipped and
+    picked up by the next run.
+    """
+    payment_service_provider = get_payment_service_provider()
+    semaphore = asyncio.Semaphore(
+        settings.stripe_payment_service.stripe_customer_backfill_concurrency
+    )
+
+    async def get_or_create_customer(profile) -> str | None:
+        async with semaphore:
+            try:
+                # The Stripe client is blocking
+                return await asyncio.to_thread(
+                    payment_service_provider.get_or_create_customer,
+                    profile.email,
+                    str(profile.user_id),
+                    str(profile.id),
+                )
+            except Exception:
+                logger.exception(
+                    "Failed to get the PSP customer of the profile %s",
+                    profile.id,
+                )
+                return None
+
+    number_of_stored_customers = 0
+    number_of_failed_profiles = 0
+    after_profile_id = None
+    while True:
+        async with db_helper.async_session() as session:
+            profiles = await profile_crud.get_profiles_without_psp_customer(
+                after_profile_id,
+                settings.stripe_payment_service.stripe_customer_backfill_batch_size,
+                session,
+            )
+            if not profiles:
+                return number_of_stored_customers, number_of_failed_profiles
+            # The connection isn't held during the Stripe API calls
+            await session.commit()
+
+            customer_ids = await asyncio.gather(
+                *(get_or_create_customer(profile) for profile in profiles)
+            )
+            psp_customer_ids = {
+                profile.id: customer_id
+                for profile, customer_id in zip(profiles, customer_ids)
+                if customer_id is not None
+            }
+            number_of_stored_profile_customers = (
+                await profile_crud.set_psp_customer_ids(psp_customer_ids, session)
+            )
+
+        number_of_stored_customers += number_of_stored_profile_customers
+        number_of_failed_profiles += len(profiles) - number_of_stored_profile_customers
+        after_profile_id = profiles[-1].id
+
+
+def main():
+    """
+    Store the Stripe customers of the existing profiles, reusing the
+    customers created for the same profiles by the earlier runs
+    """
+    number_of_stored_customers, number_of_failed_profiles = asyncio.run(
+        backfill_psp_customers()
+    )
+    print(
+        f"PSP customers were stored: {number_of_stored_customers}, "
+        f"failed profiles: {number_of_failed_profiles}"
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
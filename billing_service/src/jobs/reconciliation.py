@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import typer
+from rich import print
+from rich.table import Table
+
+from src.core.config import settings
+from src.services.reconciliation import (
+    MAX_ID_HI,
+    get_credits_frame,
+    get_opening_balances_time,
+    join_uuids,
+    load_archived_credits,
+    reconcile_shard,
+    reconcile_synthetic_shard,
+)
+
+
+def print_report(
+    number_of_accounts: int,
+    drifted: pd.DataFrame,
+    elapsed_seconds: float,
+    output: Path | None,
+    limit: int = 20,
+):
+    print(
+        f"Bank accounts reconciled: {number_of_accounts}, "
+        f"drifted: {len(drifted)}, elapsed: {elapsed_seconds:.2f} s"
+    )
+    if drifted.empty:
+        return
+
+    drifted = drifted.assign(
+        id=[str(id_) for id_ in join_uuids(drifted)],
+    )[["id", "currency", "balance", "expected_balance", "drift"]]
+    drifted = drifted.reindex(
+        drifted["drift"].abs().sort_values(ascending=False).index
+    )
+
+    table = Table("Bank account", "Currency", "Balance", "Expected", "Drift")
+    for row in drifted.head(limit).itertuples(index=False):
+        table.add_row(
+            row.id,
+            str(row.currency),
+            str(row.balance),
+            str(row.expected_balance),
+            str(row.drift),
+        )
+    print(table)
+
+    if output is not None:
+        drifted.to_csv(output, index=False)
+        print(f"Drifted bank accounts were written to {output}")
+
+
+def run_shards(task, shard_args: list[tuple]) -> tuple[int, pd.DataFrame]:
+    number_of_shards = len(shard_args)
+    # Spawned workers don't inherit the parent's connections
+    with ProcessPoolExecutor(
+        max_workers=number_of_shards,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = [
+            executor.submit(task, shard_index, number_of_shards, *args)
+            for shard_index, args in enumerate(shard_args)
+        ]
+        results = [future.result() for future in futures]
+
+    return (
+        sum(number_of_accounts for number_of_accounts, _ in results),
+        pd.concat([drifted for _, drifted in results], ignore_index=True),
+    )
+
+
+def main(
+    shards: int = typer.Option(
+        multiprocessing.cpu_count(),
+        help="Number of the bank account id ranges reconciled in parallel",
+    ),
+    output: Path = typer.Option(
+        None,
+        help="CSV file for all drifted bank accounts",
+    ),
+    include_archive: bool = typer.Option(
+        True,
+        help="Add the credits of the archived transaction history",
+    ),
+    benchmark_accounts: int = typer.Option(
+        0,
+        help="Reconcile that many synthetic bank accounts instead of the databases",
+    ),
+    benchmark_credits_per_account: int = typer.Option(5),
+    benchmark_drift_ratio: float = typer.Option(0.001),
+):
+    """
+    Compare the bank account balances with their opening ledger balance
+    plus the net amount of their transaction history and report the
+    drifted bank accounts
+    """
+    started_at = perf_counter()
+
+    if benchmark_accounts:
+        accounts_per_shard = -(-benchmark_accounts // shards)
+        number_of_accounts, drifted = run_shards(
+            reconcile_synthetic_shard,
+            [
+                (
+                    accounts_per_shard,
+                    benchmark_credits_per_account,
+                    benchmark_drift_ratio,
+                    0,
+                )
+            ] * shards,
+        )
+        print_report(
+            number_of_accounts,
+            drifted,
+            perf_counter() - started_at,
+            output,
+        )
+        return
+
+    # The opening balances include the history written before them
+    since = asyncio.run(get_opening_balances_time())
+    if include_archive:
+        archived_credits = load_archived_credits(
+            Path(settings.transaction_archive_settings.transaction_archive_dir),
+            since,
+        )
+    else:
+        archived_credits = get_credits_frame([], [])
+
+    # Each shard gets only the archived credits of its id range
+    shard_lower_bounds = np.array(
+        [shard_index * (MAX_ID_HI // shards) for shard_index in range(1, shards)],
+        dtype=np.uint64,
+    )
+    shard_indices = np.searchsorted(
+        shard_lower_bounds,
+        archived_credits["id_hi"].to_numpy(),
+        side="right",
+    )
+
+    number_of_accounts, drifted = run_shards(
+        reconcile_shard,
+        [
+            (since, archived_credits[shard_indices == shard_index])
+            for shard_index in range(shards)
+        ],
+    )
+    print_report(number_of_accounts, drifted, perf_counter() - started_at, output)
+
+
+if __name__ == "__main__":
+    typer.run(main)
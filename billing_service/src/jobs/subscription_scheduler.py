@@ -0,0 +1,108 @@
+import asyncio
+import logging
+
+import typer
+from rich import print
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.services import auth_service
+from src.utils import subscription_crud
+
+
+logger = logging.getLogger(__name__)
+
+
+async def renew_due_subscriptions() -> tuple[int, int]:
+    """
+    Claim and process the due subscriptions batch by batch until there
+    are none left, concurrent workers take disjoint batches
+    """
+    number_of_renewed_subscriptions = 0
+    number_of_expired_subscriptions = 0
+    while True:
+        async with db_helper.async_session() as session:
+            renewed, expired = await subscription_crud.renew_due_subscriptions(
+                settings.subscription_settings.subscription_batch_size,
+                session,
+            )
+        if not renewed and not expired:
+            return number_of_renewed_subscriptions, number_of_expired_subscriptions
+
+        number_of_renewed_subscriptions += renewed
+        number_of_expired_subscriptions += expired
+
+
+async def deactivate_expired_subscriptions() -> int:
+    """
+    Report the expired subscriptions to auth with one request per batch
+    """
+    number_of_deactivated_users = 0
+    while True:
+        async with db_helper.async_session() as session:
+            subscriptions = await subscription_crud.get_subscriptions_pending_auth_deactivation(
+                settings.subscription_settings.subscription_batch_size,
+                session,
+            )
+            if not subscriptions:
+                return number_of_deactivated_users
+
+            user_ids = list({
+                subscription.user_id
+                for subscription in subscriptions
+                if not subscription.is_subscribed_again
+            })
+            # The subscriptions stay locked and pending if auth fails
+            if user_ids:
+                number_of_deactivated_users += (
+                    await auth_service.cancel_users_subscriptions(user_ids)
+                )
+            await subscription_crud.mark_subscriptions_auth_deactivated(
+                [subscription.id for subscription in subscriptions],
+                session,
+            )
+
+
+async def run_subscription_scheduler(loop: bool):
+    concurrency = settings.subscription_settings.subscription_concurrency
+    while True:
+        results = await asyncio.gather(
+            *(renew_due_subscriptions() for _ in range(concurrency))
+        )
+        print(
+            "Subscriptions were renewed: "
+            f"{sum(renewed for renewed, _ in results)}, "
+            f"expired: {sum(expired for _, expired in results)}"
+        )
+
+        try:
+            number_of_deactivated_users = await deactivate_expired_subscriptions()
+            print(
+                "Subscribers were deactivated in auth: "
+                f"{number_of_deactivated_users}"
+            )
+        except Exception:
+            logger.exception("Subscribers deactivation in auth failed")
+
+        if not loop:
+            return
+        await asyncio.sleep(
+            settings.subscription_settings.subscription_scheduler_interval_seconds
+        )
+
+
+def main(
+    loop: bool = typer.Option(
+        False,
+        help="Keep processing the due subscriptions once per the interval",
+    ),
+):
+    """
+    Renew the subscriptions whose period has ended from the Point bank
+    accounts, expire the rest and deactivate their users in auth
+    """
+    asyncio.run(run_subscription_scheduler(loop))
+
+
+if __name__ == "__main__":
+    typer.run(main)
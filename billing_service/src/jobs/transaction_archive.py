@@ -0,0 +1,41 @@
+import asyncio
+
+import typer
+from rich import print
+
+from src.core.config import settings
+from src.db.mongodb import mongodb_helper
+from src.services.transaction_archive import transaction_archive
+
+
+async def run_transaction_archive(loop: bool):
+    await mongodb_helper.connect()
+    try:
+        while True:
+            number_of_documents = await transaction_archive.archive()
+            print(f"Transactions were archived: {number_of_documents}")
+
+            if not loop:
+                return
+            await asyncio.sleep(
+                settings.transaction_archive_settings.transaction_archive_interval_seconds
+            )
+    finally:
+        mongodb_helper.close()
+
+
+def main(
+    loop: bool = typer.Option(
+        False,
+        help="Keep archiving once per the archive interval",
+    ),
+):
+    """
+    Move the transaction history documents older than the archive age
+    from MongoDB into the compressed date partitioned archive files
+    """
+    asyncio.run(run_transaction_archive(loop))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -3,7 +3,14 @@ __all__ = (
     "Profile",
     "BankAccount",
     "Currency",
-    "CurrencyPair"
+    "CurrencyPair",
+    "LedgerEntry",
+    "LedgerSnapshot",
+    "TransactionOutboxEvent",
+    "OutboxCheckpoint",
+    "Subscription",
+    "ProcessedCheckoutSession",
+    "SubscriptionPlan",
     # "Transaction",
 )
 
@@ -11,4 +18,8 @@ from .base import Base
 from .profile import Profile
 from .bank_account import BankAccount
 from .currency import Currency, CurrencyPair
+from .ledger import LedgerEntry, LedgerSnapshot
+from .outbox import TransactionOutboxEvent, OutboxCheckpoint
+from .subscription import Subscription, ProcessedCheckoutSession
+from .subscription_plan import SubscriptionPlan
 # from .transaction import Transaction
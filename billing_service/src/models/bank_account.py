@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 from sqlalchemy import (
     DateTime,
     String,
-    Float,
+    BigInteger,
     ForeignKey,
     CheckConstraint,
     UniqueConstraint,
@@ -38,9 +38,12 @@ class BankAccount(TimestampMixin, Base):
         ),
     )
 
-    balance: Mapped[float] = mapped_column(
-        Float(precision=2),
+    # Integer number of the currency minor units
+    balance: Mapped[int] = mapped_column(
+        BigInteger,
         default=0,
+        server_default="0",
+        nullable=False,
     )
     currency: Mapped[str] = mapped_column(
         String(3),
@@ -1,10 +1,19 @@
-from sqlalchemy import String, DateTime, ForeignKey, Float, UniqueConstraint
+from decimal import Decimal
+
+from sqlalchemy import (
+    String,
+    DateTime,
+    ForeignKey,
+    Numeric,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 # from sqlalchemy_utils import CurrencyType
 
 from src.models.base import Base, TimestampMixin
 from src.schemas.currency import CurrencyTitleDescription
+from src.utils.money import CURRENCY_EXPONENTS, EXCHANGE_RATE_SCALE
 
 
 class Currency(TimestampMixin, Base):
@@ -43,6 +52,13 @@ class Currency(TimestampMixin, Base):
         self.title = title.value
         self.description = title.display
 
+    @property
+    def exponent(self) -> int:
+        """
+        Number of digits of the minor unit, e.g. 2 for cents
+        """
+        return CURRENCY_EXPONENTS[self.title]
+
 
 class CurrencyPair(TimestampMixin, Base):
     __tablename__ = "currency_pairs"
@@ -71,8 +87,8 @@ class CurrencyPair(TimestampMixin, Base):
         ),
         nullable=False,
     )
-    exchange_rate: Mapped[float] = mapped_column(
-        Float(precision=4),
+    exchange_rate: Mapped[Decimal] = mapped_column(
+        Numeric(18, EXCHANGE_RATE_SCALE),
         nullable=False,
     )
 
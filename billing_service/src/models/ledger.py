@@ -0,0 +1,155 @@
+from datetime import datetime
+
+from choicesenum import ChoicesEnum
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.models.base import Base
+
+
+class LedgerEntryTypes(ChoicesEnum):
+    OPENING_BALANCE = "OPENING_BALANCE", "Balance before the ledger was introduced"
+    TOP_UP = "TOP_UP", "Topping up of the bank account"
+    TRANSFER = "TRANSFER", "Transfer to another bank account"
+    PAYOUT = "PAYOUT", "Payout to the bank account"
+    SUBSCRIPTION_PAYMENT = "SUBSCRIPTION_PAYMENT", "Subscription payment"
+
+
+class LedgerSystemAccounts(ChoicesEnum):
+    OPENING_BALANCES = "opening_balances", "Counterpart of the opening balances"
+    PSP_TOP_UPS = "psp_top_ups", "Funds received through the payment provider"
+    PAYOUTS = "payouts", "Funds distributed by the operators"
+    SUBSCRIPTIONS = "subscriptions", "Funds spent on subscriptions"
+
+
+class LedgerEntry(Base):
+    """
+    Append-only journal line. Every journal (entries with the same
+    journal_id) moves money between bank accounts and system accounts and
+    sums up to zero in each currency. The amount is signed, credits are
+    positive and debits are negative.
+
+    The journals are appended in the transaction which updates the
+    materialized `bank_accounts.balance`: the debits check the funds
+    under that row lock, a balance derived from the entries would need
+    the same per account serialization. The ledger is the audit trail
+    and the source the balances are verified against.
+    """
+
+    __tablename__ = "ledger_entries"
+
+    __table_args__ = (
+        CheckConstraint(
+            "(bank_account_id IS NULL) <> (system_account IS NULL)",
+            name="single_account",
+        ),
+        CheckConstraint(
+            "amount <> 0",
+            name="amount_is_not_zero",
+        ),
+        Index(
+            "ix_ledger_entries_bank_account_id_created_at",
+            "bank_account_id",
+            "created_at",
+        ),
+        Index(
+            "ix_ledger_entries_created_at",
+            "created_at",
+            postgresql_using="brin",
+        ),
+        Index(
+            "ix_ledger_entries_bank_account_id_transaction_id",
+            "bank_account_id",
+            "transaction_id",
+        ),
+        # Range scan of the entries added since the previous snapshots
+        Index(
+            "ix_ledger_entries_transaction_id",
+            "transaction_id",
+            postgresql_using="brin",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        Identity(),
+        primary_key=True,
+    )
+    journal_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=False,
+        index=True,
+    )
+    entry_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    # No foreign key, the entries outlive the deleted bank accounts
+    bank_account_id: Mapped[UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+    )
+    system_account: Mapped[str | None] = mapped_column(
+        String(32),
+        nullable=True,
+    )
+    currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    # Integer number of the currency minor units
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Id of the writing transaction. Unlike the entry id and the time it
+    # tells the transactions which can still commit from the finished
+    # ones, see ledger_crud.take_ledger_snapshots()
+    transaction_id: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        nullable=False,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    repr_columns = (
+        "id",
+        "journal_id",
+        "bank_account_id",
+        "system_account",
+        "currency",
+        "amount",
+    )
+
+
+class LedgerSnapshot(Base):
+    """
+    Balance of the bank account made of all its ledger entries written
+    by the transactions with ids below `taken_until_transaction_id`
+    """
+
+    __tablename__ = "ledger_snapshots"
+
+    bank_account_id: Mapped[UUID] = mapped_column(
+        ForeignKey("bank_accounts.id", ondelete="CASCADE"),
+        unique=True,
+        nullable=False,
+    )
+    # Integer number of the currency minor units
+    balance: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    taken_until_transaction_id: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
+
+    repr_columns = (
+        "bank_account_id",
+        "balance",
+        "taken_until_transaction_id",
+    )
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Identity, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+
+from src.models.base import Base
+
+
+class TransactionOutboxEvent(Base):
+    """
+    Transaction history document waiting to be projected into the Mongo
+    `transactions` collection, written in the same Postgres transaction
+    as the balance change it describes
+    """
+
+    __tablename__ = "transaction_outbox"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        Identity(),
+        primary_key=True,
+    )
+    document: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    repr_columns = (
+        "id",
+        "created_at",
+    )
+
+
+class OutboxCheckpoint(Base):
+    """
+    Progress of the outbox projector. The row is locked with
+    FOR UPDATE SKIP LOCKED while a batch is projected, so only one of the
+    service workers projects at a time.
+    """
+
+    __tablename__ = "outbox_checkpoints"
+
+    name: Mapped[str] = mapped_column(
+        String(64),
+        unique=True,
+        nullable=False,
+    )
+    last_event_id: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default="0",
+    )
+    number_of_projected_events: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default="0",
+    )
+    last_projected_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    repr_columns = (
+        "name",
+        "last_event_id",
+        "last_projected_at",
+    )
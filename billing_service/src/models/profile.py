@@ -33,6 +33,12 @@ class Profile(TimestampMixin, Base):
         nullable=False
     )
     date_of_birth: Mapped[Date] = mapped_column(Date(), nullable=True)
+    # Customer of the payment service provider, reused by the checkouts
+    psp_customer_id: Mapped[str | None] = mapped_column(
+        String(255),
+        unique=True,
+        nullable=True,
+    )
 
     bank_accounts: Mapped[list[BankAccount]] = relationship(
         "BankAccount",
@@ -0,0 +1,127 @@
+from datetime import datetime
+
+from choicesenum import ChoicesEnum
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.models.base import Base, TimestampMixin
+
+
+class SubscriptionStatuses(ChoicesEnum):
+    ACTIVE = "ACTIVE", "Active subscription"
+    EXPIRED = "EXPIRED", "Expired subscription"
+
+
+class Subscription(TimestampMixin, Base):
+    """
+    Subscription of the profile, paid up to `current_period_end`. A profile
+    has at most one active subscription, buying another one extends it.
+    """
+
+    __tablename__ = "subscriptions"
+
+    __table_args__ = (
+        Index(
+            "uq_subscriptions_profile_id_active",
+            "profile_id",
+            unique=True,
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+        # Range scan of the due subscriptions by the scheduler
+        Index(
+            "ix_subscriptions_current_period_end_active",
+            "current_period_end",
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+        # Expired subscriptions whose users are still subscribers in auth
+        Index(
+            "ix_subscriptions_id_auth_deactivation_pending",
+            "id",
+            postgresql_where=text(
+                "status = 'EXPIRED' AND auth_deactivated_at IS NULL"
+            ),
+        ),
+    )
+
+    profile_id: Mapped[UUID] = mapped_column(
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=False,
+    )
+    status: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        server_default=SubscriptionStatuses.ACTIVE.value,
+    )
+    number_of_months: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+    )
+    currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    # Integer number of the currency minor units
+    price: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Renewals are charged from the profile's Point bank account
+    auto_renew: Mapped[bool] = mapped_column(
+        Boolean,
+        nullable=False,
+        server_default=text("true"),
+    )
+    current_period_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    current_period_end: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    auth_deactivated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    repr_columns = (
+        "id",
+        "profile_id",
+        "status",
+        "current_period_end",
+    )
+
+
+class ProcessedCheckoutSession(Base):
+    """
+    Paid subscription checkout session of the payment service provider
+    whose webhook was applied. The redelivered webhooks of the session
+    find its row and don't extend the subscription again.
+    """
+
+    __tablename__ = "processed_checkout_sessions"
+
+    checkout_session_id: Mapped[str] = mapped_column(
+        String(255),
+        unique=True,
+        nullable=False,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    repr_columns = (
+        "checkout_session_id",
+        "created_at",
+    )
@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, SmallInteger, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base, TimestampMixin
+
+
+class SubscriptionPlan(TimestampMixin, Base):
+    """
+    Subscription plan synced to the payment service provider: the
+    checkouts reference its PSP price instead of sending the price inline
+    """
+
+    __tablename__ = "subscription_plans"
+
+    __table_args__ = (
+        UniqueConstraint("number_of_months", "currency"),
+    )
+
+    number_of_months: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+    )
+    currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    # Integer number of the currency minor units
+    price: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    psp_product_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    psp_price_id: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    repr_columns = (
+        "id",
+        "number_of_months",
+        "currency",
+        "price",
+        "psp_price_id",
+    )
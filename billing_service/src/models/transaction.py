@@ -4,9 +4,12 @@ from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
 from beanie import Document
-from pydantic import Field, BaseModel
+from pymongo import ASCENDING, IndexModel
+from pydantic import Field, BaseModel, model_validator
 from choicesenum import ChoicesEnum
 
+from src.utils.money import get_currency_exponent, to_minor_units
+
 
 class TransactionTypes(ChoicesEnum):
     TRANSFER = "TRANSFER", "Transfer to another bank account"
@@ -15,13 +18,50 @@ class TransactionTypes(ChoicesEnum):
         "Topping up of the bank account by another currency"
     )
     SUBSCRIPTION_PAYMENT = "SUBSCRIPTION_PAYMENT", "Subscription payment"
+    PAYOUT = "PAYOUT", "Payout to the bank account"
+
+
+def get_amount_in_minor_units(amount: int | float, currency: str) -> int:
+    """
+    The history amounts are integer numbers of the currency minor units,
+    the documents written before store floats of the major units
+    """
+    if isinstance(amount, float):
+        return to_minor_units(amount, get_currency_exponent(currency))
+    return amount
+
+
+def convert_legacy_amounts(data, *amount_fields: tuple[str, str]):
+    """
+    Convert the legacy major units of the (amount, currency) fields of the
+    raw document
+    """
+    if not isinstance(data, dict):
+        return data
+
+    data = dict(data)
+    for amount_field, currency_field in amount_fields:
+        if amount_field in data and currency_field in data:
+            data[amount_field] = get_amount_in_minor_units(
+                data[amount_field],
+                data[currency_field],
+            )
+    return data
 
 
 class SubscriptionPaymentTransactionType(BaseModel):
+    # Set when the subscription is paid from the bank account
+    bank_account_id: UUID | None = None
     description: str | TransactionTypes = TransactionTypes.SUBSCRIPTION_PAYMENT.display
     number_of_subscription_month: int
     currency: str
-    amount: float
+    # Integer number of the currency minor units
+    amount: int
+
+    @model_validator(mode="before")
+    @classmethod
+    def convert_major_units(cls, data):
+        return convert_legacy_amounts(data, ("amount", "currency"))
 
 
 class TopUpTransactionType(BaseModel):
@@ -32,35 +72,81 @@ class TopUpTransactionByAnotherCurrencyType(BaseModel):
     bank_account_id: UUID
     description: str | TransactionTypes = TransactionTypes.TOP_UP_BY_ANOTHER_CURRENCY.display
     base_currency: str
-    topped_up_amount_in_base_currency: float
+    # Integer numbers of the currencies minor units
+    topped_up_amount_in_base_currency: int
     quote_currency: str
-    credited_amount_in_quote_currency: float
+    credited_amount_in_quote_currency: int
+
+    @model_validator(mode="before")
+    @classmethod
+    def convert_major_units(cls, data):
+        return convert_legacy_amounts(
+            data,
+            ("topped_up_amount_in_base_currency", "base_currency"),
+            ("credited_amount_in_quote_currency", "quote_currency"),
+        )
 
 
 class TransferTransactionType(BaseModel):
+    bank_account_id: UUID
     description: str | TransactionTypes = TransactionTypes.TRANSFER.display
-    amount: float
+    # Integer number of the currency minor units
+    amount: int
     currency: str
     transferred_to_profile_id: UUID
     transferred_to_bank_account_id: UUID
 
+    @model_validator(mode="before")
+    @classmethod
+    def convert_major_units(cls, data):
+        return convert_legacy_amounts(data, ("amount", "currency"))
+
+
+class PayoutTransactionType(BaseModel):
+    bank_account_id: UUID
+    description: str | TransactionTypes = TransactionTypes.PAYOUT.display
+    # Integer number of the currency minor units
+    amount: int
+    currency: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def convert_major_units(cls, data):
+        return convert_legacy_amounts(data, ("amount", "currency"))
+
+
+class TransactionDocument(BaseModel):
+    """
+    Transaction history document. The Postgres writes build it for the
+    outbox without MongoDB, the projector stores it as `Transaction`.
+    """
 
-class Transaction(Document):
     id: UUID = Field(default_factory=uuid4)
     user_id: UUID
     profile_id: UUID
     transaction: Union[
         SubscriptionPaymentTransactionType,
         TopUpTransactionByAnotherCurrencyType,
-        # TransferTransactionType,
+        TransferTransactionType,
+        PayoutTransactionType,
         # TopUpTransactionType,
     ]
     timestamp: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
     )
 
-    class Settings:
-        name = "transactions"
-
     class Config:
         str_strip_whitespace = True
+
+
+class Transaction(TransactionDocument, Document):
+    class Settings:
+        name = "transactions"
+        indexes = [
+            # Bank account id range scans of the reconciliation shards
+            IndexModel([("transaction.bank_account_id", ASCENDING)]),
+            IndexModel(
+                [("transaction.transferred_to_bank_account_id", ASCENDING)],
+                sparse=True,
+            ),
+        ]
@@ -7,6 +7,7 @@ from src.db.postgres import db_helper
 from src.schemas.bank_account import (
     BankAccountRead,
     BankAccountCreate,
+    BankAccountBalanceTotal,
 )
 from src.utils import bank_account_crud
 from src.schemas.currency import CurrencyTitleDescription
@@ -195,3 +196,21 @@ async def delete_profile_bank_accounts(
         profile_id,
         session
     )
+
+
+@router.get(
+    "/balances/total/",
+    status_code=status.HTTP_200_OK,
+    response_model=list[BankAccountBalanceTotal],
+)
+async def get_bank_account_balance_totals(
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Get total balance of all bank accounts per currency [admin permissions]
+
+    Return value:
+    - **balance_totals** (list[BankAccountBalanceTotal]): currency, exact
+    total balance in the currency minor units and number of bank accounts
+    """
+    return await bank_account_crud.get_bank_account_balance_totals(session)
@@ -0,0 +1,68 @@
+from typing import Annotated
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, status, Path, Query, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.postgres import db_helper
+from src.schemas.ledger import LedgerBalanceRead, LedgerEntryRead
+from src.utils import ledger_crud
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/bank-account/{bank_account_id}/balance/",
+    status_code=status.HTTP_200_OK,
+    response_model=LedgerBalanceRead,
+)
+async def get_bank_account_ledger_balance(
+    bank_account_id: Annotated[UUID, Path(description="Bank account ID (UUID4)")],
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Get bank account balance derived from the ledger [admin permissions]
+
+    Parameters:
+    - **bank_account_id** (UUID): existing bank account ID (UUID4)
+
+    Return value:
+    - **balance** (LedgerBalanceRead): balance derived from the latest
+    snapshot and the entries appended since, and the bank account balance
+    to reconcile it with
+    """
+    return await ledger_crud.get_ledger_balance(bank_account_id, session)
+
+
+@router.get(
+    "/bank-account/{bank_account_id}/entries/",
+    status_code=status.HTTP_200_OK,
+    response_model=list[LedgerEntryRead],
+)
+async def get_bank_account_ledger_entries(
+    bank_account_id: Annotated[UUID, Path(description="Bank account ID (UUID4)")],
+    since: Annotated[datetime | None, Query(description="Entries created since")] = None,
+    until: Annotated[datetime | None, Query(description="Entries created before")] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Get ledger entries of the bank account in the time range [admin permissions]
+
+    Parameters:
+    - **bank_account_id** (UUID): bank account ID (UUID4)
+    - **since**, **until** (datetime): time range of the entries
+    - **limit** (int): maximum number of the entries
+
+    Return value:
+    - **entries** (list[LedgerEntryRead]): ledger entries ordered by time
+    """
+    return await ledger_crud.get_ledger_entries(
+        bank_account_id,
+        session,
+        since=since,
+        until=until,
+        limit=limit,
+    )
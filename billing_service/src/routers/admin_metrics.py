@@ -0,0 +1,124 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.mongodb import mongodb_helper
+from src.db.postgres import db_helper
+from src.services.cache import profile_cache, bank_accounts_cache
+from src.services.idempotency import checkout_idempotency
+from src.services.transaction_projector import transaction_history_projector
+from src.services.transaction_writer import transaction_bulk_writer
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/cache/",
+    status_code=status.HTTP_200_OK,
+)
+async def get_cache_metrics():
+    """
+    Get profile and bank account cache statistics of the current worker
+    [admin permissions]
+
+    Return value:
+    - **profile**, **bank_accounts** (dict): local and Redis hits, misses,
+    hit ratio, cache lookup and database load latency histograms
+    """
+    return {
+        "profile": profile_cache.get_stats(),
+        "bank_accounts": bank_accounts_cache.get_stats(),
+    }
+
+
+@router.get(
+    "/idempotency/",
+    status_code=status.HTTP_200_OK,
+)
+async def get_idempotency_metrics():
+    """
+    Get checkout idempotency statistics of the current worker
+    [admin permissions]
+
+    Return value:
+    - **hits** (int): repeated requests answered with the stored checkout URL
+    - **misses** (int): requests which created the checkout session
+    - **waits** (int): requests which waited for a concurrent duplicate
+    - **conflicts** (int): waiting requests answered with 409 because the
+    duplicate didn't store the checkout URL within the lock timeout
+    """
+    return checkout_idempotency.get_stats()
+
+
+@router.get(
+    "/db-pool/",
+    status_code=status.HTTP_200_OK,
+)
+async def get_db_pool_metrics():
+    """
+    Get database connection pool occupancy of the current worker
+    [admin permissions]
+
+    Return value:
+    - **size**, **checked_out**, **checked_in**, **overflow** (int): pool size,
+    number of connections in use, idle in the pool and opened above the size
+    """
+    return db_helper.get_pool_status()
+
+
+@router.get(
+    "/outbox/",
+    status_code=status.HTTP_200_OK,
+)
+async def get_outbox_metrics(
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Get transaction history outbox lag and projector progress
+    [admin permissions]
+
+    Return value:
+    - **pending_events** (int): number of events not projected into MongoDB yet
+    - **lag_seconds** (float): age of the oldest pending event
+    - **last_event_id**, **number_of_projected_events**, **last_projected_at**:
+    projector checkpoint shared by all workers
+    - **worker** (dict): batches, events and batch latency histogram of the
+    current worker
+    """
+    return await transaction_history_projector.get_lag(session)
+
+
+@router.get(
+    "/transaction-writer/",
+    status_code=status.HTTP_200_OK,
+)
+async def get_transaction_writer_metrics():
+    """
+    Get transaction history bulk writer statistics of the current worker
+    [admin permissions]
+
+    Return value:
+    - **buffered_documents** (int): documents waiting for the next flush
+    - **flushes**, **documents**, **duplicates** (int): number of insert_many
+    calls, written documents and ignored duplicate key errors
+    - **flush_latency** (dict): insert_many latency histogram
+    """
+    return transaction_bulk_writer.get_stats()
+
+
+@router.get(
+    "/mongodb/",
+    status_code=status.HTTP_200_OK,
+)
+async def get_mongodb_metrics():
+    """
+    Get MongoDB connection pool and command statistics of the current worker
+    [admin permissions]
+
+    Return value:
+    - **pool** (dict): configured pool size, open and checked out connections,
+    checkout failures and checkout latency histogram
+    - **commands** (dict): latency histogram and number of failures by the
+    command name
+    """
+    return mongodb_helper.get_stats()
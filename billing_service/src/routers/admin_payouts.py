@@ -0,0 +1,63 @@
+from fastapi import APIRouter, status, Depends, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.postgres import db_helper
+from src.schemas.payout import PayoutBatch, PayoutReport
+from src.utils import payout_crud
+
+
+router = APIRouter()
+
+
+@router.post(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_model=PayoutReport,
+)
+async def create_payouts(
+    payout_batch: PayoutBatch,
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Credit many bank accounts from the payouts system account [admin permissions]
+
+    Parameters:
+    - **items** (list[PayoutItem]): recipients, each with **profile_id** or
+    **phone_number**, **currency** and **amount** in major units
+
+    Return value:
+    - **report** (PayoutReport): numbers of the paid and failed items and
+    the status of every item by its index in the request
+    """
+    return await payout_crud.create_payouts(
+        list(enumerate(payout_batch.items)),
+        session,
+    )
+
+
+@router.post(
+    "/csv/",
+    status_code=status.HTTP_200_OK,
+    response_model=PayoutReport,
+)
+async def create_payouts_from_csv(
+    file: UploadFile,
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Credit many bank accounts using the uploaded CSV file [admin permissions]
+
+    Parameters:
+    - **file** (UploadFile): CSV file with the `profile_id`, `phone_number`,
+    `currency` and `amount` header columns
+
+    Return value:
+    - **report** (PayoutReport): numbers of the paid and failed items and
+    the status of every item by its row index in the file
+    """
+    items, invalid_items = payout_crud.parse_payout_csv(await file.read())
+    return await payout_crud.create_payouts(
+        items,
+        session,
+        invalid_items=invalid_items,
+    )
@@ -8,6 +8,8 @@ from src.schemas.profile import (
     ProfileCreate,
     ProfileRead,
     ProfileUpdate,
+    ProfileBulkDelete,
+    ProfileBulkDeleteResult,
 )
 from src.utils import auth_utils, profile_crud
 
@@ -126,3 +128,30 @@ async def delete_profile_by_profile_id(
     - **profile_id** (str): existing profile ID (UUID4)
     """
     await profile_crud.delete_profile_by_profile_id(profile_id, session)
+
+
+@router.post(
+    "/delete/bulk/",
+    status_code=status.HTTP_200_OK,
+    response_model=ProfileBulkDeleteResult,
+)
+async def delete_profiles_by_profile_ids(
+    profile_bulk_delete: ProfileBulkDelete,
+    session: AsyncSession = Depends(db_helper.get_session),
+):
+    """
+    Delete many profiles with their bank accounts using profile IDs
+    [admin permissions]
+
+    Parameters:
+    - **profile_ids** (list[UUID]): profile IDs (UUID4) to delete, processed
+    in chunks, each chunk in its own transaction
+
+    Return value:
+    - **deleted** (list[UUID]): IDs of the deleted profiles
+    - **not_found** (list[UUID]): IDs of the profiles that don't exist
+    """
+    return await profile_crud.delete_profiles_by_profile_ids(
+        profile_bulk_delete.profile_ids,
+        session,
+    )
@@ -1,4 +1,5 @@
 from typing import Annotated
+import asyncio
 import json
 
 import stripe
@@ -12,6 +13,7 @@ from fastapi import (
     Path,
     Query,
     Form,
+    Header,
 )
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -24,12 +26,15 @@ from src.utils import (
     transaction_crud,
     currency_pair_crud,
 )
-from src.db.postgres import db_helper
+from src.db.postgres import db_helper, LazySession
 from src.schemas.currency import CurrencyTitleDescription
 from src.schemas.transaction import TopUpTransactionByAnotherCurrency
-from src.services.psp.stripe import StripeProvider, get_stripe_provider
+from src.services.idempotency import checkout_idempotency
+from src.services.psp.abc import PaymentServiceProvider
+from src.services.psp.providers import get_payment_service_provider
 from src.core.config import BASE_DIR
 from src.utils.messages import messages
+from src.utils.money import get_currency_exponent, to_minor_units
 
 
 router = APIRouter()
@@ -157,9 +162,10 @@ async def top_up_bank_account(
 )
 async def create_top_up_bank_account(
     top_up_transaction: Annotated[TopUpTransactionByAnotherCurrency, Form()],
-    payment_service_provider: Annotated[StripeProvider, Depends(get_stripe_provider)],
+    payment_service_provider: Annotated[PaymentServiceProvider, Depends(get_payment_service_provider)],
+    idempotency_key: Annotated[str | None, Header()] = None,
     # user_id: str = Depends(auth_utils.get_current_auth_user_id_from_or_401),
-    session: AsyncSession = Depends(db_helper.get_session),
+    session: LazySession = Depends(db_helper.get_session),
 ):
     """
     Top up bank account with built-in currency Point using any available currency
@@ -168,32 +174,63 @@ async def create_top_up_bank_account(
     - **top_up_transaction** (TopUpTransactionByAnotherCurrency): desired
     **amount** of built-in "Point" currency and **currency** - currency, from
     converting which, bank account in built-in "Point" currency will be topped up
+    - **Idempotency-Key** (header, optional): repeated requests with the same
+    key and parameters are redirected to the same checkout session, without
+    the header the same parameters are enough. A repeated request gets 409
+    if the first one hasn't created the session within the lock timeout
     """
     user_id = "1f6f3a5e-0968-4acd-840c-e10bd2b4508a"
-    profile = await profile_crud.get_profile_by_user_id(
-        user_id,
-        session,
-    )
-
     top_up_transaction_dict = top_up_transaction.model_dump()
-
-    amount_in_base_currency = await currency_pair_crud.get_amount_in_base_currency_using_quote_currency(
-        top_up_transaction_dict["currency"].value,
+    currency = top_up_transaction_dict["currency"].value
+    point_amount = to_minor_units(
         top_up_transaction_dict["point_amount"],
-        session,
+        get_currency_exponent(CurrencyTitleDescription.PNT.value),
     )
-
-    checkout_session_url = payment_service_provider.get_top_up_bank_account_by_another_currency_checkout_session(
-        top_up_transaction_dict["currency"].value,
-        amount_in_base_currency,
-        top_up_transaction_dict["point_amount"],
+    checkout_idempotency_key = checkout_idempotency.get_key(
+        "top_up",
         user_id,
-        profile.id,
-        profile.email,
+        idempotency_key,
+        currency,
+        point_amount,
     )
 
+    async def create_checkout_session() -> str:
+        profile = await profile_crud.get_cached_profile_by_user_id(
+            user_id,
+            session,
+        )
+        amount_in_base_currency = await currency_pair_crud.get_amount_in_base_currency_using_quote_currency(
+            currency,
+            point_amount,
+            session,
+        )
+        customer_id = await profile_crud.get_or_create_psp_customer_id(
+            profile,
+            payment_service_provider,
+            session,
+        )
+        # The connection isn't needed during the Stripe API call, the
+        # blocking Stripe client is run in a thread
+        await session.release()
+
+        checkout_session = await asyncio.to_thread(
+            payment_service_provider.get_top_up_bank_account_by_another_currency_checkout_session,
+            currency,
+            amount_in_base_currency,
+            point_amount,
+            user_id,
+            profile.id,
+            customer_id,
+            idempotency_key=checkout_idempotency_key,
+        )
+        return checkout_session.url
+
+    checkout_session_url = await checkout_idempotency.get_or_create(
+        checkout_idempotency_key,
+        create_checkout_session,
+    )
     return responses.RedirectResponse(
-        checkout_session_url.url,
+        checkout_session_url,
         status_code=status.HTTP_303_SEE_OTHER,
     )
     # return checkout_session_url.url
@@ -239,8 +276,9 @@ async def transaction_processing_webhook(
             user_id: str = checkout_session.metadata.user_id
             profile_id: str = checkout_session.metadata.profile_id
             base_currency: str = checkout_session.currency
-            amount_in_base_currency: float = checkout_session.amount_total / 100
-            amount_in_quote_currency: float = float(
+            # Stripe amounts and the metadata amount are in minor units
+            amount_in_base_currency: int = checkout_session.amount_total
+            amount_in_quote_currency: int = int(
                 checkout_session.metadata.amount_in_point_currency
             )
 
@@ -259,7 +297,10 @@ async def transaction_processing_webhook(
                 CurrencyTitleDescription.PNT.value,
                 amount_in_base_currency,
                 amount_in_quote_currency,
+                session,
             )
+            await session.commit()
+            await bank_account_crud.invalidate_bank_accounts_cache(profile_id)
 
     return responses.Response(
         status_code=status.HTTP_200_OK,
@@ -1,23 +1,29 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Annotated
+from typing import Annotated
+import asyncio
 import json
+import logging
 
-from fastapi import APIRouter, Depends, Form, Query, status, HTTPException, responses, Request
+from fastapi import APIRouter, Depends, Form, Header, Query, status, HTTPException, responses, Request
 from fastapi.templating import Jinja2Templates
 import stripe
 import aiohttp
 
 from src.core.config import BASE_DIR, settings
-from src.utils import auth_utils, profile_crud, transaction_crud
-from src.db.postgres import db_helper
-from src.services.psp.stripe import StripeProvider, get_stripe_provider
+from src.utils import auth_utils, profile_crud, subscription_crud, transaction_crud
+from src.db.postgres import db_helper, LazySession
+from src.services import auth_service
+from src.services.idempotency import checkout_idempotency
+from src.services.plan_catalogue import plan_catalogue
+from src.services.psp.abc import PaymentServiceProvider
+from src.services.psp.providers import get_payment_service_provider
+from src.schemas.currency import CurrencyTitleDescription
+from src.schemas.subscription import SubscriptionPointPaymentCreate, SubscriptionRead
 from src.schemas.transaction import SubscriptionPaymentTransaction
 from src.utils.messages import messages
 
 
-if TYPE_CHECKING:
-    from sqlalchemy.ext.asyncio import AsyncSession
-
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -45,46 +51,155 @@ async def subscription_payment_page(
 )
 async def create_subscription_payment(
     subscription_payment_transaction: Annotated[SubscriptionPaymentTransaction, Form()],
-    payment_service_provider: Annotated[StripeProvider, Depends(get_stripe_provider)],
+    payment_service_provider: Annotated[PaymentServiceProvider, Depends(get_payment_service_provider)],
+    idempotency_key: Annotated[str | None, Header()] = None,
     # user_id: str = Depends(auth_utils.get_current_auth_user_id_from_or_401),
-    session: AsyncSession = Depends(db_helper.get_session),
+    session: LazySession = Depends(db_helper.get_session),
 ):
     """
     Creating subscription payment
 
     Parameters:
     - **number_of_subscription_month** (int): number of subscription months
-    - **amount** (float): price for subscription
+    - **amount** (float): price for subscription, the price of the plan with
+    that number of months is charged
+    - **Idempotency-Key** (header, optional): repeated requests with the same
+    key and parameters are redirected to the same checkout session, without
+    the header the same parameters are enough. A repeated request gets 409
+    if the first one hasn't created the session within the lock timeout
     """
     user_id = "1f6f3a5e-0968-4acd-840c-e10bd2b4508a"
-    profile = await profile_crud.get_profile_by_user_id(
-        user_id,
-        session,
-    )
     subscription_payment_transaction_dict = subscription_payment_transaction.model_dump()
-    checkout_session_url = payment_service_provider.get_subscription_payment_checkout_session(
-        subscription_payment_transaction_dict["number_of_subscription_month"],
-        subscription_payment_transaction_dict["amount"],
-        profile.email,
+    number_of_subscription_month = subscription_payment_transaction_dict["number_of_subscription_month"]
+    amount = plan_catalogue.get_price(number_of_subscription_month, "USD")
+    if amount is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.SUBSCRIPTION_PLAN_WAS_NOT_FOUND,
+        )
+    checkout_idempotency_key = checkout_idempotency.get_key(
+        "subscription",
         user_id,
-        profile.id,
+        idempotency_key,
+        number_of_subscription_month,
+        amount,
+    )
+
+    async def create_checkout_session() -> str:
+        profile = await profile_crud.get_cached_profile_by_user_id(
+            user_id,
+            session,
+        )
+        customer_id = await profile_crud.get_or_create_psp_customer_id(
+            profile,
+            payment_service_provider,
+            session,
+        )
+        price_id = await plan_catalogue.get_psp_price_id(
+            number_of_subscription_month,
+            "USD",
+            session,
+        )
+        # The connection isn't needed during the Stripe API call, the
+        # blocking Stripe client is run in a thread
+        await session.release()
+
+        checkout_session = await asyncio.to_thread(
+            payment_service_provider.get_subscription_payment_checkout_session,
+            number_of_subscription_month,
+            amount,
+            customer_id,
+            user_id,
+            profile.id,
+            idempotency_key=checkout_idempotency_key,
+            price_id=price_id,
+        )
+        return checkout_session.url
+
+    checkout_session_url = await checkout_idempotency.get_or_create(
+        checkout_idempotency_key,
+        create_checkout_session,
     )
     return responses.RedirectResponse(
-        checkout_session_url.url,
+        checkout_session_url,
         status_code=status.HTTP_303_SEE_OTHER,
     )
 
 
+@router.post(
+    "/subscription/create/points/",
+    response_model=SubscriptionRead,
+)
+async def create_subscription_payment_from_point_bank_account(
+    subscription_payment: SubscriptionPointPaymentCreate,
+    user_id: str = Depends(auth_utils.get_current_auth_user_id_from_or_401),
+    session: LazySession = Depends(db_helper.get_session),
+):
+    """
+    Paying the subscription from the user's bank account in built-in currency
+    Point, without the payment service provider
+
+    Parameters:
+    - **number_of_subscription_month** (int): number of subscription months,
+    the price of the plan is charged: its Point price, if configured, or its
+    USD price converted to Point at the current exchange rate
+
+    Return value:
+    - the active subscription of the user
+    """
+    number_of_months = subscription_payment.number_of_subscription_month
+    for currency in (
+        CurrencyTitleDescription.PNT.value,
+        CurrencyTitleDescription.USD.value,
+    ):
+        price = plan_catalogue.get_price(number_of_months, currency)
+        if price is not None:
+            break
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.SUBSCRIPTION_PLAN_WAS_NOT_FOUND,
+        )
+
+    profile = await profile_crud.get_cached_profile_by_user_id(
+        user_id,
+        session,
+    )
+    subscription = await subscription_crud.pay_subscription_from_point_bank_account(
+        profile.user_id,
+        profile.id,
+        number_of_months,
+        currency,
+        price,
+        session,
+    )
+    subscription_read = SubscriptionRead.model_validate(subscription)
+    await session.release()
+
+    # The payment is committed, a failed request is only logged: the user
+    # would be charged again on a retry
+    try:
+        await auth_service.create_user_subscription(profile.user_id)
+    except aiohttp.ClientError:
+        logger.exception(
+            "Failed to set the subscriber flag of the user %s",
+            profile.user_id,
+        )
+    return subscription_read
+
+
 @router.post(
     "/subscription/webhook/",
 )
 async def subscription_payment_processing_webhook(
     request: Request,
-    session: AsyncSession = Depends(db_helper.get_session),
+    session: LazySession = Depends(db_helper.get_session),
 ):
     """
     Webhook endpoint for tracking confirmation from the Stripe Payment System
-    and change user subscriber status
+    and change user subscriber status. Each paid checkout session activates
+    the subscription once, the redelivered events only set the subscriber
+    flag in auth again.
     """
     payload = await request.body()
     event = None
@@ -113,36 +228,51 @@ async def subscription_payment_processing_webhook(
             profile_id = checkout_session.metadata.profile_id
             number_of_subscription_month = checkout_session.metadata.number_of_subscription_month
             currency = checkout_session.metadata.currency
-            amount = checkout_session.metadata.amount
-
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.post(
-                        f"{settings.auth_service_domain}/auth/subscription/user/{user_id}/create"
-                    ) as response:
-                        response.raise_for_status()
-                        data = await response.json()
-
-                        return data
-
-                except aiohttp.ClientResponseError as e:
-                    raise HTTPException(
-                        status_code=e.status,
-                        detail=str(e),
-                    )
-                except Exception as e:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=str(e),
-                    )
-                finally:
-                    result = await transaction_crud.create_subcription_payment_transaction_history_entry(
-                        user_id,
-                        profile_id,
-                        number_of_subscription_month,
-                        currency,
-                        amount
-                    )
+            # The metadata amount is in minor units
+            amount = int(checkout_session.metadata.amount)
+
+            # The redelivered events of an applied session only retry auth
+            if await subscription_crud.mark_checkout_session_processed(
+                checkout_session.id,
+                session,
+            ):
+                await transaction_crud.create_subcription_payment_transaction_history_entry(
+                    user_id,
+                    profile_id,
+                    number_of_subscription_month,
+                    currency,
+                    amount,
+                    session,
+                )
+                await subscription_crud.activate_subscription(
+                    user_id,
+                    profile_id,
+                    int(number_of_subscription_month),
+                    currency,
+                    amount,
+                    session,
+                )
+                await session.commit()
+            await session.release()
+
+            # The subscription is committed, a failed request is answered
+            # with an error so that the PSP redelivers the event
+            try:
+                await auth_service.create_user_subscription(user_id)
+            except aiohttp.ClientResponseError as e:
+                raise HTTPException(
+                    status_code=e.status,
+                    detail=str(e),
+                )
+            except aiohttp.ClientError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=str(e),
+                )
+
+    return responses.Response(
+        status_code=status.HTTP_200_OK,
+    )
 
 
 @router.get(
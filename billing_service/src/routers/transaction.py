@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, status, Depends, Path
+from fastapi import APIRouter, status, Depends, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.schemas.transaction import (
@@ -11,7 +12,6 @@ from src.schemas.transaction import (
 from src.db.postgres import db_helper
 from src.utils import transaction_crud, auth_utils
 from src.schemas.transaction import TransactionHistoryEntry
-from src.models.transaction import Transaction
 
 
 router = APIRouter()
@@ -22,20 +22,35 @@ router = APIRouter()
     response_model=list[TransactionHistoryEntry],
 )
 async def get_profile_transaction_history_entries(
+    since: Annotated[
+        datetime | None,
+        Query(description="Start of the period, inclusive"),
+    ] = None,
+    until: Annotated[
+        datetime | None,
+        Query(description="End of the period, exclusive"),
+    ] = None,
     # user_id: str = Depends(auth_utils.get_current_auth_user_id_from_or_401),
 ):
     """
     Get transaction history entries
 
+    Parameters:
+    - **since**, **until** (datetime): optional period of the entries, the
+    archived entries are included when the period starts before the archive
+    cutoff or **since** is omitted
+
     Return value:
     - **transaction_history_entries** (list[TransactionHistoryEnty]): list of
-    transaction history entry
+    transaction history entry, the amounts are integer numbers of the
+    currency minor units
     """
     user_id = UUID("1f6f3a5e-0968-4acd-840c-e10bd2b4508a")
-    transaction_history_entries = await Transaction.find(
-        Transaction.user_id == user_id,
-    ).to_list()
-    return transaction_history_entries
+    return await transaction_crud.get_transaction_history_entries(
+        user_id,
+        since,
+        until,
+    )
 
 
 @router.post(
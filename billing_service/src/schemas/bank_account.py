@@ -1,9 +1,11 @@
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 
 from src.schemas.currency import CurrencyTitleDescription
+from src.utils.money import get_currency_exponent, to_major_units
 
 
 class BankAccountBase(BaseModel):
@@ -17,6 +19,22 @@ class BankAccountCreate(BankAccountBase):
 class BankAccountRead(BankAccountBase):
     id: UUID
     profile_id: UUID
-    balance: float
+    # Integer number of the currency minor units
+    balance: int
     updated_at: datetime
     created_at: datetime
+
+    @computed_field
+    @property
+    def balance_amount(self) -> Decimal:
+        return to_major_units(
+            self.balance,
+            get_currency_exponent(self.currency.value),
+        )
+
+
+class BankAccountBalanceTotal(BaseModel):
+    currency: str
+    # Integer number of the currency minor units
+    total_balance: int
+    number_of_bank_accounts: int
@@ -26,5 +26,6 @@ class CurrencyRead(CurrencyBase):
     id: UUID
     title: str
     description: str
+    exponent: int
     updated_at: datetime
     created_at: datetime
@@ -1,11 +1,12 @@
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CurrencyPairBase(BaseModel):
-    exchange_rate: float
+    exchange_rate: Decimal = Field(gt=0, max_digits=18, decimal_places=8)
 
 
 class CurrencyPairCreate(CurrencyPairBase):
@@ -0,0 +1,26 @@
+from uuid import UUID
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class LedgerEntryRead(BaseModel):
+    id: int
+    journal_id: UUID
+    entry_type: str
+    bank_account_id: UUID | None
+    system_account: str | None
+    currency: str
+    # Integer number of the currency minor units, credits are positive
+    amount: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LedgerBalanceRead(BaseModel):
+    bank_account_id: UUID
+    # Integer numbers of the currency minor units
+    ledger_balance: int
+    bank_account_balance: int
+    snapshot_taken_until_transaction_id: int | None
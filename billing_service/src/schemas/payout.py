@@ -0,0 +1,45 @@
+from uuid import UUID
+
+from choicesenum import ChoicesEnum
+from pydantic import BaseModel, Field, model_validator
+
+from src.schemas.currency import CurrencyTitleDescription
+
+
+class PayoutItemStatus(ChoicesEnum):
+    PAID = "PAID", "Bank account was credited"
+    NOT_FOUND = "NOT_FOUND", "Recipient bank account was not found"
+    INVALID = "INVALID", "Payout item is invalid"
+    FAILED = "FAILED", "Payout item was not applied, it can be retried"
+
+
+class PayoutItem(BaseModel):
+    profile_id: UUID | None = None
+    phone_number: str | None = None
+    currency: CurrencyTitleDescription
+    amount: float = Field(gt=0)
+
+    @model_validator(mode="after")
+    def check_recipient(self):
+        if (self.profile_id is None) == (self.phone_number is None):
+            raise ValueError(
+                "Either profile_id or phone_number must be specified."
+            )
+        return self
+
+
+class PayoutBatch(BaseModel):
+    items: list[PayoutItem] = Field(min_length=1)
+
+
+class PayoutItemResult(BaseModel):
+    index: int
+    status: str
+    bank_account_id: UUID | None = None
+    detail: str | None = None
+
+
+class PayoutReport(BaseModel):
+    number_of_paid_items: int
+    number_of_failed_items: int
+    items: list[PayoutItemResult]
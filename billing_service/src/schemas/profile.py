@@ -1,7 +1,7 @@
 from uuid import UUID
 from datetime import datetime, date
 
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 
 
 class ProfileBase(BaseModel):
@@ -31,3 +31,12 @@ class ProfileUpdate(BaseModel):
     phone_number: str | None = None
     email: EmailStr | None = None
     date_of_birth: date | None = None
+
+
+class ProfileBulkDelete(BaseModel):
+    profile_ids: list[UUID] = Field(min_length=1)
+
+
+class ProfileBulkDeleteResult(BaseModel):
+    deleted: list[UUID]
+    not_found: list[UUID]
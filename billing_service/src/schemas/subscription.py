@@ -0,0 +1,24 @@
+from uuid import UUID
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class SubscriptionPointPaymentCreate(BaseModel):
+    # The price is the one of the plan with that number of months
+    number_of_subscription_month: int = Field(gt=0)
+
+
+class SubscriptionRead(BaseModel):
+    id: UUID
+    profile_id: UUID
+    status: str
+    number_of_months: int
+    currency: str
+    # Integer number of the currency minor units
+    price: int
+    auto_renew: bool
+    current_period_start: datetime
+    current_period_end: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,7 +1,7 @@
 from uuid import UUID
 from datetime import datetime
 from typing import Union
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.schemas.currency import CurrencyTitleDescription
 from src.models.transaction import TransactionTypes
@@ -9,6 +9,8 @@ from src.models.transaction import (
     SubscriptionPaymentTransactionType,
     TopUpTransactionByAnotherCurrencyType,
     TopUpTransactionType,
+    TransferTransactionType,
+    PayoutTransactionType,
 )
 
 class TransactionBase(BaseModel):
@@ -40,13 +42,15 @@ class TransactionHistoryEntry(BaseModel):
         # TopUpTransactionByAnotherCurrency,
         SubscriptionPaymentTransactionType,
         TopUpTransactionByAnotherCurrencyType,
+        TransferTransactionType,
+        PayoutTransactionType,
         # TopUpTransactionType,
     ]
     timestamp: datetime
 
 
 class TransactionCreate(BaseModel):
-    amount: float
+    amount: float = Field(gt=0)
     currency: CurrencyTitleDescription
 
 
@@ -0,0 +1,356 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Select, String, cast, select
+from sqlalchemy.orm import aliased
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.models.bank_account import BankAccount
+from src.models.currency import Currency, CurrencyPair
+from src.models.profile import Profile
+from src.models.transaction import Transaction, get_amount_in_minor_units
+from src.utils.money import EXCHANGE_RATE_SCALE
+
+
+logger = logging.getLogger(__name__)
+
+UUID_TYPE = pa.string()
+TIMESTAMP_TYPE = pa.timestamp("us", tz="UTC")
+# Few distinct values, the Parquet column stores every value once
+# per row group and the rows keep the small integer indices
+CURRENCY_TYPE = pa.dictionary(pa.int8(), pa.string())
+
+RowBatches = AsyncIterator[list[dict[str, Any]]]
+
+
+class ExportTable:
+    """
+    Exported table: Arrow schema and the source of the row batches
+    changed within the (since, until] watermark range
+    """
+
+    def __init__(
+        self,
+        name: str,
+        schema: pa.Schema,
+        get_batches: Callable[[datetime | None, datetime, int], RowBatches],
+    ):
+        self.name = name
+        self.schema = schema
+        self.get_batches = get_batches
+
+    @property
+    def dictionary_columns(self) -> list[str]:
+        return [
+            field.name
+            for field in self.schema
+            if pa.types.is_dictionary(field.type)
+        ]
+
+
+async def get_postgres_batches(
+    stmt: Select,
+    watermark_column,
+    since: datetime | None,
+    until: datetime,
+    batch_size: int,
+) -> RowBatches:
+    stmt = stmt.where(watermark_column <= until)
+    if since is not None:
+        stmt = stmt.where(watermark_column > since)
+
+    async with db_helper.async_session() as session:
+        # Server side cursor, the rows are fetched batch_size at a time
+        result = await session.stream(
+            stmt.execution_options(yield_per=batch_size)
+        )
+        async for rows in result.mappings().partitions():
+            yield [dict(row) for row in rows]
+
+
+def get_profile_batches(
+    since: datetime | None,
+    until: datetime,
+    batch_size: int,
+) -> RowBatches:
+    # Personal data is not exported
+    stmt = select(
+        cast(Profile.id, String).label("id"),
+        cast(Profile.user_id, String).label("user_id"),
+        Profile.created_at,
+        Profile.updated_at,
+    )
+    return get_postgres_batches(
+        stmt, Profile.updated_at, since, until, batch_size
+    )
+
+
+def get_bank_account_batches(
+    since: datetime | None,
+    until: datetime,
+    batch_size: int,
+) -> RowBatches:
+    stmt = select(
+        cast(BankAccount.id, String).label("id"),
+        cast(BankAccount.profile_id, String).label("profile_id"),
+        BankAccount.currency,
+        BankAccount.balance,
+        BankAccount.created_at,
+        BankAccount.updated_at,
+    )
+    return get_postgres_batches(
+        stmt, BankAccount.updated_at, since, until, batch_size
+    )
+
+
+def get_currency_pair_batches(
+    since: datetime | None,
+    until: datetime,
+    batch_size: int,
+) -> RowBatches:
+    base_currency = aliased(Currency)
+    quote_currency = aliased(Currency)
+    stmt = (
+        select(
+            cast(CurrencyPair.id, String).label("id"),
+            base_currency.title.label("base_currency"),
+            quote_currency.title.label("quote_currency"),
+            CurrencyPair.exchange_rate,
+            CurrencyPair.created_at,
+            CurrencyPair.updated_at,
+        )
+        .join(base_currency, base_currency.id == CurrencyPair.base_currency_id)
+        .join(
+            quote_currency,
+            quote_currency.id == CurrencyPair.quote_currency_id,
+        )
+    )
+    return get_postgres_batches(
+        stmt, CurrencyPair.updated_at, since, until, batch_size
+    )
+
+
+def get_transaction_row(document: dict) -> dict[str, Any]:
+    """
+    Flatten the history document, the type specific fields are kept
+    as the JSON `details` column
+    """
+    transaction = document["transaction"]
+    currency = transaction.get("currency") or transaction.get("quote_currency")
+    amount = transaction.get(
+        "amount",
+        transaction.get("credited_amount_in_quote_currency"),
+    )
+    return {
+        "id": str(document["_id"]),
+        "user_id": str(document["user_id"]),
+        "profile_id": str(document["profile_id"]),
+        "timestamp": document["timestamp"],
+        "transaction_type": transaction.get("description"),
+        "bank_account_id": (
+            str(transaction["bank_account_id"])
+            if transaction.get("bank_account_id")
+            else None
+        ),
+        "currency": currency,
+        "amount": (
+            get_amount_in_minor_units(amount, currency)
+            if amount is not None
+            else None
+        ),
+        "details": json.dumps(transaction, default=str),
+    }
+
+
+async def get_transaction_batches(
+    since: datetime | None,
+    until: datetime,
+    batch_size: int,
+) -> RowBatches:
+    timestamp_filter = {"$lte": until}
+    if since is not None:
+        timestamp_filter["$gt"] = since
+
+    cursor = (
+        Transaction.get_motor_collection()
+        .find({"timestamp": timestamp_filter})
+        .sort("timestamp", 1)
+        .batch_size(batch_size)
+    )
+    rows = []
+    async for document in cursor:
+        rows.append(get_transaction_row(document))
+        if len(rows) >= batch_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+EXPORT_TABLES = {
+    export_table.name: export_table
+    for export_table in (
+        ExportTable(
+            name="profiles",
+            schema=pa.schema([
+                ("id", UUID_TYPE),
+                ("user_id", UUID_TYPE),
+                ("created_at", TIMESTAMP_TYPE),
+                ("updated_at", TIMESTAMP_TYPE),
+            ]),
+            get_batches=get_profile_batches,
+        ),
+        ExportTable(
+            name="bank_accounts",
+            schema=pa.schema([
+                ("id", UUID_TYPE),
+                ("profile_id", UUID_TYPE),
+                ("currency", CURRENCY_TYPE),
+                # Integer number of the currency minor units
+                ("balance", pa.int64()),
+                ("created_at", TIMESTAMP_TYPE),
+                ("updated_at", TIMESTAMP_TYPE),
+            ]),
+            get_batches=get_bank_account_batches,
+        ),
+        ExportTable(
+            name="currency_pairs",
+            schema=pa.schema([
+                ("id", UUID_TYPE),
+                ("base_currency", CURRENCY_TYPE),
+                ("quote_currency", CURRENCY_TYPE),
+                ("exchange_rate", pa.decimal128(18, EXCHANGE_RATE_SCALE)),
+                ("created_at", TIMESTAMP_TYPE),
+                ("updated_at", TIMESTAMP_TYPE),
+            ]),
+            get_batches=get_currency_pair_batches,
+        ),
+        ExportTable(
+            name="transactions",
+            schema=pa.schema([
+                ("id", UUID_TYPE),
+                ("user_id", UUID_TYPE),
+                ("profile_id", UUID_TYPE),
+                ("timestamp", TIMESTAMP_TYPE),
+                ("transaction_type", pa.dictionary(pa.int8(), pa.string())),
+                ("bank_account_id", UUID_TYPE),
+                ("currency", CURRENCY_TYPE),
+                # Integer number of the currency minor units
+                ("amount", pa.int64()),
+                ("details", pa.string()),
+            ]),
+            get_batches=get_transaction_batches,
+        ),
+    )
+}
+
+
+class AnalyticsExporter:
+    """
+    Incremental Parquet export of the billing tables for the analytics.
+
+    Every run of a table writes the rows changed since its watermark
+    (`updated_at`, `timestamp` for the transactions) up to now - lag into
+    `<export_dir>/<table>/part-<until>.parquet` and moves the watermark
+    to `until`. The parts are change sets, the latest version of a row is
+    the one with the greatest `updated_at`. Deletes are not exported.
+
+    The lag leaves time to the transactions which were started before the
+    run and are committed after it, their rows would be skipped otherwise.
+    """
+
+    def __init__(
+        self,
+        export_dir: Path,
+        batch_size: int,
+        lag_seconds: int,
+    ):
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.lag_seconds = lag_seconds
+
+    def _get_watermark_path(self, export_table: ExportTable) -> Path:
+        return self.export_dir / export_table.name / "_watermark.json"
+
+    def get_watermark(self, export_table: ExportTable) -> datetime | None:
+        watermark_path = self._get_watermark_path(export_table)
+        if not watermark_path.exists():
+            return None
+        return datetime.fromisoformat(
+            json.loads(watermark_path.read_text())["watermark"]
+        )
+
+    def _set_watermark(
+        self,
+        export_table: ExportTable,
+        watermark: datetime,
+    ) -> None:
+        watermark_path = self._get_watermark_path(export_table)
+        temporary_path = watermark_path.with_suffix(".tmp")
+        temporary_path.write_text(
+            json.dumps({"watermark": watermark.isoformat()})
+        )
+        os.replace(temporary_path, watermark_path)
+
+    async def export(self, export_table: ExportTable) -> int:
+        since = self.get_watermark(export_table)
+        until = datetime.now(timezone.utc) - timedelta(seconds=self.lag_seconds)
+        if since is not None and until <= since:
+            return 0
+
+        table_dir = self.export_dir / export_table.name
+        table_dir.mkdir(parents=True, exist_ok=True)
+        part_path = table_dir / f"part-{until:%Y%m%dT%H%M%S%f}.parquet"
+        temporary_path = table_dir / f".{part_path.name}.tmp"
+
+        number_of_rows = 0
+        writer = None
+        try:
+            async for rows in export_table.get_batches(
+                since,
+                until,
+                self.batch_size,
+            ):
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        temporary_path,
+                        export_table.schema,
+                        compression="zstd",
+                        use_dictionary=export_table.dictionary_columns,
+                    )
+                writer.write_batch(
+                    pa.RecordBatch.from_pylist(rows, schema=export_table.schema)
+                )
+                number_of_rows += len(rows)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                temporary_path.unlink(missing_ok=True)
+            raise
+
+        if writer is not None:
+            writer.close()
+            os.replace(temporary_path, part_path)
+
+        self._set_watermark(export_table, until)
+        logger.info(
+            "Exported %s rows of %s up to %s",
+            number_of_rows,
+            export_table.name,
+            until,
+        )
+        return number_of_rows
+
+
+analytics_exporter = AnalyticsExporter(
+    export_dir=Path(settings.analytics_export_settings.analytics_export_dir),
+    batch_size=settings.analytics_export_settings.analytics_export_batch_size,
+    lag_seconds=settings.analytics_export_settings.analytics_export_lag_seconds,
+)
@@ -0,0 +1,31 @@
+from uuid import UUID
+
+import aiohttp
+
+from src.core.config import settings
+
+
+async def cancel_users_subscriptions(user_ids: list[UUID]) -> int:
+    """
+    Reset the subscriber flag of the users with one request to auth and
+    return the number of the updated users
+    """
+    async with aiohttp.ClientSession() as http_session:
+        async with http_session.post(
+            f"{settings.auth_service_domain}/auth/subscription/users/delete/",
+            json={"user_ids": [str(user_id) for user_id in user_ids]},
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return data["number_of_updated_users"]
+
+
+async def create_user_subscription(user_id: UUID) -> None:
+    """
+    Set the subscriber flag of the user in auth
+    """
+    async with aiohttp.ClientSession() as http_session:
+        async with http_session.post(
+            f"{settings.auth_service_domain}/auth/subscription/user/{user_id}/create",
+        ) as response:
+            response.raise_for_status()
@@ -0,0 +1,256 @@
+import json
+import logging
+from collections import OrderedDict
+from time import monotonic, perf_counter
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import get_redis
+from src.utils.metrics import LatencyHistogram
+
+
+logger = logging.getLogger(__name__)
+
+# Both scripts use the Redis clock, so the invalidation and the load start
+# times of all the service workers are comparable
+INVALIDATE_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000000 + time[2]
+for _, key in ipairs(KEYS) do
+    redis.call('DEL', key)
+    redis.call('SET', key .. ':invalidated', now, 'EX', ARGV[1])
+end
+"""
+SET_IF_NOT_INVALIDATED_SCRIPT = """
+local invalidated_at = redis.call('GET', KEYS[1] .. ':invalidated')
+if invalidated_at and tonumber(invalidated_at) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class LoadStart(NamedTuple):
+    """
+    Times taken before the value is read from the database, comparable
+    between all the caches
+    """
+
+    local: float
+    # Microseconds of the Redis clock
+    redis: int | None
+
+
+class TwoTierCache:
+    """
+    Cache-aside storage with in-process TTL/LRU tier in front of Redis.
+
+    Values must be JSON serializable. The in-process tier is not shared
+    between the service workers, so its TTL is kept short and the writes
+    invalidate both tiers.
+
+    A value loaded before an invalidation of its key must not be stored
+    after it, otherwise the stale value would stay for the whole TTL. The
+    invalidation records its Redis time under `<key>:invalidated` and the
+    loaded value is stored only if the key wasn't invalidated since the
+    load started, the in-process tier stores only such values as well.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        local_ttl_seconds: float,
+        local_max_size: int,
+        redis_ttl_seconds: int,
+    ):
+        self.namespace = namespace
+        self.local_ttl_seconds = local_ttl_seconds
+        self.local_max_size = local_max_size
+        self.redis_ttl_seconds = redis_ttl_seconds
+
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._local_invalidated_at = 0.0
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stale_sets = 0
+        self.get_latency = LatencyHistogram()
+        self.load_latency = LatencyHistogram()
+
+    def _get_key(self, key: str) -> str:
+        return f"billing:{self.namespace}:{key}"
+
+    def _set_local(self, key: str, value: Any) -> None:
+        self._local[key] = (monotonic() + self.local_ttl_seconds, value)
+        self._local.move_to_end(key)
+        if len(self._local) > self.local_max_size:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Any | None:
+        key = self._get_key(key)
+        started_at = perf_counter()
+
+        try:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > monotonic():
+                    self._local.move_to_end(key)
+                    self.local_hits += 1
+                    return value
+                del self._local[key]
+
+            redis = get_redis()
+            if redis is not None:
+                try:
+                    raw_value = await redis.get(key)
+                except RedisError:
+                    logger.warning("Redis is unavailable, cache key %s was skipped", key)
+                    raw_value = None
+
+                if raw_value is not None:
+                    value = json.loads(raw_value)
+                    self._set_local(key, value)
+                    self.redis_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+        finally:
+            self.get_latency.observe(perf_counter() - started_at)
+
+    async def start_load(self) -> LoadStart:
+        redis = get_redis()
+        redis_time = None
+        if redis is not None:
+            try:
+                seconds, microseconds = await redis.time()
+                redis_time = seconds * 1_000_000 + microseconds
+            except RedisError:
+                logger.warning("Redis is unavailable, load start time was skipped")
+        return LoadStart(local=monotonic(), redis=redis_time)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        load_start: LoadStart | None = None,
+    ) -> None:
+        """
+        Store the value, loaded after `load_start` if it's passed: the
+        value is skipped if the key was invalidated since
+        """
+        key = self._get_key(key)
+        if load_start is not None and (
+            self._local_invalidated_at >= load_start.local
+        ):
+            self.stale_sets += 1
+            return
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                if load_start is None:
+                    await redis.setex(
+                        key,
+                        self.redis_ttl_seconds,
+                        json.dumps(value),
+                    )
+                elif load_start.redis is not None:
+                    is_stored = await redis.register_script(
+                        SET_IF_NOT_INVALIDATED_SCRIPT
+                    )(
+                        keys=[key],
+                        args=[
+                            load_start.redis,
+                            json.dumps(value),
+                            self.redis_ttl_seconds,
+                        ],
+                    )
+                    if not is_stored:
+                        self.stale_sets += 1
+                        return
+            except RedisError:
+                logger.warning("Redis is unavailable, cache key %s was not stored", key)
+
+        self._set_local(key, value)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        load_start = await self.start_load()
+        started_at = perf_counter()
+        value = await loader()
+        self.load_latency.observe(perf_counter() - started_at)
+
+        await self.set(key, value, load_start)
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        keys = [self._get_key(key) for key in keys]
+        for key in keys:
+            self._local.pop(key, None)
+        self._local_invalidated_at = monotonic()
+
+        redis = get_redis()
+        if redis is None or not keys:
+            return
+
+        try:
+            # The marker outlives any load started before the invalidation
+            await redis.register_script(INVALIDATE_SCRIPT)(
+                keys=keys,
+                args=[self.redis_ttl_seconds],
+            )
+        except RedisError:
+            logger.warning("Redis is unavailable, cache keys %s were not invalidated", keys)
+
+    def get_stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "stale_sets": self.stale_sets,
+            "hit_ratio": (
+                (self.local_hits + self.redis_hits) / lookups if lookups else 0.0
+            ),
+            "local_size": len(self._local),
+            "get_latency": self.get_latency.snapshot(),
+            "load_latency": self.load_latency.snapshot(),
+        }
+
+
+# user_id -> profile
+profile_cache = TwoTierCache(
+    "profile",
+    local_ttl_seconds=settings.cache_settings.cache_local_ttl_seconds,
+    local_max_size=settings.cache_settings.cache_local_max_size,
+    redis_ttl_seconds=settings.cache_settings.cache_redis_ttl_seconds,
+)
+
+# profile_id -> bank accounts in all currencies
+bank_accounts_cache = TwoTierCache(
+    "bank_accounts",
+    local_ttl_seconds=settings.cache_settings.cache_local_ttl_seconds,
+    local_max_size=settings.cache_settings.cache_local_max_size,
+    redis_ttl_seconds=settings.cache_settings.cache_redis_ttl_seconds,
+)
+
+# profile_id -> customer id of the payment service provider
+psp_customer_cache = TwoTierCache(
+    "psp_customer",
+    local_ttl_seconds=settings.cache_settings.cache_local_ttl_seconds,
+    local_max_size=settings.cache_settings.cache_local_max_size,
+    redis_ttl_seconds=settings.cache_settings.cache_redis_ttl_seconds,
+)
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import logging
+from time import monotonic, time
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import get_redis
+from src.utils.messages import messages
+
+
+logger = logging.getLogger(__name__)
+
+# The lock is deleted only by the request which holds it: after it has
+# expired another request may have taken it with its own token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CheckoutIdempotency:
+    """
+    Redis storage of the checkout session URLs by the idempotency key.
+
+    The key is derived from the user, the request parameters and the
+    client `Idempotency-Key` header: the repeated request gets the URL of
+    the first one instead of a new checkout session, and the client
+    starts a new purchase with the same parameters by sending a new
+    header. Without the header the key also includes the number of the
+    `derived_window_seconds` time window, so that the same purchase made
+    later on purpose gets its own session. The key is also passed to the
+    PSP, so the requests which didn't find the URL in Redis don't create
+    a second session either.
+
+    Concurrent requests with the same key wait for the one holding the
+    lock and get 409 if it doesn't store the URL within the lock timeout.
+    Without Redis every request creates the session, deduplicated by the
+    PSP only.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int,
+        derived_window_seconds: int,
+        lock_timeout_seconds: float,
+        poll_interval_seconds: float = 0.05,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.derived_window_seconds = derived_window_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.conflicts = 0
+
+    def get_key(
+        self,
+        scope: str,
+        user_id: str,
+        client_key: str | None,
+        *parameters,
+    ) -> str:
+        if client_key is None:
+            client_key = f"window:{int(time() // self.derived_window_seconds)}"
+        return hashlib.sha256(
+            "\x1f".join(
+                str(part)
+                for part in (scope, user_id, client_key, *parameters)
+            ).encode()
+        ).hexdigest()
+
+    def _get_redis_key(self, key: str) -> str:
+        return f"billing:{self.namespace}:{key}"
+
+    async def _get(self, redis, key: str) -> str | None:
+        value = await redis.get(self._get_redis_key(key))
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def get_or_create(
+        self,
+        key: str,
+        create: Callable[[], Awaitable[str]],
+    ) -> str:
+        redis = get_redis()
+        if redis is None:
+            return await create()
+
+        lock_key = self._get_redis_key(f"{key}:lock")
+        lock_token = uuid4().hex
+        try:
+            url = await self._get(redis, key)
+            if url is not None:
+                self.hits += 1
+                return url
+
+            is_locked = await redis.set(
+                lock_key,
+                lock_token,
+                nx=True,
+                px=int(self.lock_timeout_seconds * 1000),
+            )
+            if not is_locked:
+                self.waits += 1
+                deadline = monotonic() + self.lock_timeout_seconds
+                while monotonic() < deadline:
+                    await asyncio.sleep(self.poll_interval_seconds)
+                    url = await self._get(redis, key)
+                    if url is not None:
+                        self.hits += 1
+                        return url
+
+                self.conflicts += 1
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=messages.CHECKOUT_IS_IN_PROGRESS,
+                )
+        except RedisError:
+            logger.warning("Redis is unavailable, idempotency key %s was skipped", key)
+            return await create()
+
+        self.misses += 1
+        try:
+            url = await create()
+            await redis.set(self._get_redis_key(key), url, ex=self.ttl_seconds)
+        except RedisError:
+            logger.warning("Redis is unavailable, idempotency key %s was not stored", key)
+        finally:
+            try:
+                await redis.register_script(RELEASE_LOCK_SCRIPT)(
+                    keys=[lock_key],
+                    args=[lock_token],
+                )
+            except RedisError:
+                pass
+        return url
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+            "conflicts": self.conflicts,
+        }
+
+
+checkout_idempotency = CheckoutIdempotency(
+    "checkout",
+    ttl_seconds=settings.idempotency_settings.idempotency_ttl_seconds,
+    derived_window_seconds=(
+        settings.idempotency_settings.idempotency_derived_window_seconds
+    ),
+    lock_timeout_seconds=(
+        settings.idempotency_settings.idempotency_lock_timeout_seconds
+    ),
+)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import asyncio
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from src.core.config import settings
+from src.utils import subscription_plan_crud
+from src.utils.money import get_currency_exponent, to_minor_units
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from src.services.psp.abc import PaymentServiceProvider
+
+
+logger = logging.getLogger(__name__)
+
+
+class PlanCatalogue:
+    """
+    Subscription plans and their PSP products and prices.
+
+    The plan prices are configured by the currency and the number of
+    months. sync() creates a PSP product per number of months and a price
+    per plan and stores their ids in `subscription_plans`, it is run by
+    the plan catalogue job. The workers keep the stored price ids in
+    memory and reload them once per `refresh_interval_seconds`, so the
+    checkout gets the price id without a query. A plan whose configured
+    price differs from the synced one has no price id until the next
+    sync, the checkout sends its price inline meanwhile.
+    """
+
+    def __init__(
+        self,
+        plan_prices: dict[str, dict[int, float]],
+        refresh_interval_seconds: float,
+    ):
+        # (number of months, currency) -> price in minor units
+        self.prices = {
+            (number_of_months, currency): to_minor_units(
+                amount,
+                get_currency_exponent(currency),
+            )
+            for currency, plans in plan_prices.items()
+            for number_of_months, amount in plans.items()
+        }
+        self.refresh_interval_seconds = refresh_interval_seconds
+
+        # (number of months, currency) -> (synced price, PSP price id)
+        self._psp_prices: dict[tuple[int, str], tuple[int, str]] = {}
+        self._refreshed_at: float | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    def get_price(self, number_of_months: int, currency: str) -> int | None:
+        return self.prices.get((number_of_months, currency))
+
+    def _is_stale(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or monotonic() - self._refreshed_at > self.refresh_interval_seconds
+        )
+
+    async def refresh(self, session: AsyncSession) -> None:
+        plans = await subscription_plan_crud.get_subscription_plans(session)
+        self._psp_prices = {
+            (plan.number_of_months, plan.currency): (
+                plan.price,
+                plan.psp_price_id,
+            )
+            for plan in plans
+        }
+        self._refreshed_at = monotonic()
+
+    async def get_psp_price_id(
+        self,
+        number_of_months: int,
+        currency: str,
+        session: AsyncSession,
+    ) -> str | None:
+        if self._is_stale():
+            async with self._refresh_lock:
+                if self._is_stale():
+                    await self.refresh(session)
+
+        psp_price = self._psp_prices.get((number_of_months, currency))
+        if psp_price is None:
+            return None
+        synced_price, psp_price_id = psp_price
+        if synced_price != self.get_price(number_of_months, currency):
+            return None
+        return psp_price_id
+
+    async def sync(
+        self,
+        payment_service_provider: PaymentServiceProvider,
+        session: AsyncSession,
+    ) -> int:
+        """
+        Create the missing PSP products and prices of the configured plans
+        and return the number of the synced plans. The PSP objects are
+        looked up by their keys first, so a run interrupted before
+        storing the ids doesn't create them twice.
+        """
+        synced_plans = {
+            (plan.number_of_months, plan.currency): plan
+            for plan in await subscription_plan_crud.get_subscription_plans(
+                session
+            )
+        }
+        # The connection isn't held during the PSP API calls
+        await session.commit()
+
+        plans = []
+        for (number_of_months, currency), price in sorted(self.prices.items()):
+            synced_plan = synced_plans.get((number_of_months, currency))
+            if synced_plan is not None and synced_plan.price == price:
+                continue
+
+            psp_product_id = await asyncio.to_thread(
+                payment_service_provider.get_or_create_product,
+                f"subscription-{number_of_months}-months",
+                f"Subscription payment - {number_of_months} month(s)",
+            )
+            psp_price_id = await asyncio.to_thread(
+                payment_service_provider.get_or_create_price,
+                psp_product_id,
+                f"subscription-{number_of_months}-months-{currency.lower()}-{price}",
+                currency,
+                price,
+            )
+            plans.append(
+                {
+                    "number_of_months": number_of_months,
+                    "currency": currency,
+                    "price": price,
+                    "psp_product_id": psp_product_id,
+                    "psp_price_id": psp_price_id,
+                }
+            )
+            logger.info(
+                "Subscription plan %s month(s) %s was synced to the PSP price %s",
+                number_of_months,
+                currency,
+                psp_price_id,
+            )
+
+        await subscription_plan_crud.upsert_subscription_plans(plans, session)
+        await self.refresh(session)
+        return len(plans)
+
+
+plan_catalogue = PlanCatalogue(
+    plan_prices=settings.subscription_settings.subscription_plan_prices,
+    refresh_interval_seconds=(
+        settings.subscription_settings.subscription_plan_refresh_interval_seconds
+    ),
+)
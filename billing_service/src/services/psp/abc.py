@@ -9,3 +9,15 @@ class PaymentServiceProvider(ABC):
     @abstractmethod
     def get_subscription_payment_checkout_session(self):
         pass
+
+    @abstractmethod
+    def get_or_create_customer(self):
+        pass
+
+    @abstractmethod
+    def get_or_create_product(self):
+        pass
+
+    @abstractmethod
+    def get_or_create_price(self):
+        pass
@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+from typing_extensions import override
+
+from src.services.psp.abc import PaymentServiceProvider
+
+
+class FakeProvider(PaymentServiceProvider):
+    """
+    Local payment service provider without the external calls, for the
+    development and the tests. The ids are derived from the arguments,
+    so the job and the service workers agree on them without a shared
+    state, and the created objects are kept for inspection.
+    """
+
+    def __init__(self):
+        self.customers: dict[str, dict] = {}
+        self.products: dict[str, dict] = {}
+        self.prices: dict[str, dict] = {}
+        self.checkout_sessions: dict[str, dict] = {}
+
+    def _create_checkout_session(self, **checkout_session) -> SimpleNamespace:
+        checkout_session_id = f"fake_cs_{uuid4().hex}"
+        self.checkout_sessions[checkout_session_id] = checkout_session
+        return SimpleNamespace(
+            id=checkout_session_id,
+            url=f"fake://checkout/{checkout_session_id}",
+        )
+
+    @override
+    def get_top_up_bank_account_by_another_currency_checkout_session(
+        self,
+        currency: str,
+        amount_in_currency: int,
+        amount_in_point_currency: int,
+        user_id: str,
+        profile_id: str,
+        customer_id: str,
+        idempotency_key: str | None = None,
+    ):
+        return self._create_checkout_session(
+            customer=customer_id,
+            currency=currency,
+            amount=amount_in_currency,
+            metadata={
+                "user_id": user_id,
+                "profile_id": profile_id,
+                "amount_in_point_currency": amount_in_point_currency,
+            },
+        )
+
+    @override
+    def get_subscription_payment_checkout_session(
+        self,
+        number_of_subscription_month: int,
+        amount: int,
+        customer_id: str,
+        user_id: str,
+        profile_id: str,
+        currency: str = "USD",
+        idempotency_key: str | None = None,
+        price_id: str | None = None,
+    ):
+        return self._create_checkout_session(
+            customer=customer_id,
+            price=price_id,
+            currency=currency,
+            amount=amount,
+            metadata={
+                "user_id": user_id,
+                "profile_id": profile_id,
+                "number_of_subscription_month": number_of_subscription_month,
+                "currency": currency,
+                "amount": amount,
+            },
+        )
+
+    @override
+    def get_or_create_customer(
+        self,
+        email: str,
+        user_id: str,
+        profile_id: str,
+    ) -> str:
+        customer_id = f"fake_cus_{profile_id}"
+        self.customers.setdefault(
+            customer_id,
+            {"email": email, "user_id": user_id, "profile_id": profile_id},
+        )
+        return customer_id
+
+    @override
+    def get_or_create_product(
+        self,
+        product_key: str,
+        name: str,
+    ) -> str:
+        self.products.setdefault(product_key, {"name": name})
+        return product_key
+
+    @override
+    def get_or_create_price(
+        self,
+        product_id: str,
+        lookup_key: str,
+        currency: str,
+        amount: int,
+    ) -> str:
+        price_id = f"fake_price_{lookup_key}"
+        self.prices.setdefault(
+            price_id,
+            {"product": product_id, "currency": currency, "amount": amount},
+        )
+        return price_id
+
+
+fake_provider = FakeProvider()
+
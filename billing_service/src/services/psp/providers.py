@@ -0,0 +1,10 @@
+from src.core.config import settings
+from src.services.psp.abc import PaymentServiceProvider
+from src.services.psp.fake import fake_provider
+from src.services.psp.stripe import get_stripe_provider
+
+
+def get_payment_service_provider() -> PaymentServiceProvider:
+    if settings.payment_service_settings.payment_service_provider == "fake":
+        return fake_provider
+    return get_stripe_provider()
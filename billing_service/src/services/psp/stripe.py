@@ -6,6 +6,8 @@ from typing_extensions import override
 
 from src.core.config import settings
 from src.services.psp.abc import PaymentServiceProvider
+from src.schemas.currency import CurrencyTitleDescription
+from src.utils.money import get_currency_exponent, to_major_units
 
 
 stripe.api_key = settings.stripe_payment_service.stripe_secret_key
@@ -13,18 +15,63 @@ stripe.api_version = settings.stripe_payment_service.stripe_api_version
 
 
 class StripeProvider(PaymentServiceProvider):
+    @override
+    def get_or_create_customer(
+        self,
+        email: str,
+        user_id: str,
+        profile_id: str,
+    ) -> str:
+        """
+        Customer of the profile, found by the `profile_id` metadata or
+        created. The customers are never looked up by the email: it can be
+        changed and reused, and the customer found by it would expose the
+        saved cards of another profile. The profile scoped idempotency key
+        keeps concurrent calls from creating two customers while the
+        search index doesn't include the new one yet.
+        """
+        customers = stripe.Customer.search(
+            query=f"metadata['profile_id']:'{profile_id}'",
+            limit=1,
+        )
+        if customers.data:
+            return customers.data[0].id
+
+        return stripe.Customer.create(
+            idempotency_key=f"customer-{profile_id}",
+            email=email,
+            metadata={
+                "user_id": user_id,
+                "profile_id": profile_id,
+            },
+        ).id
+
     @override
     def get_top_up_bank_account_by_another_currency_checkout_session(
         self,
         currency: str,
-        amount_in_currency: float,
-        amount_in_point_currency: float,
+        amount_in_currency: int,
+        amount_in_point_currency: int,
         user_id: str,
         profile_id: str,
-        email: str,
+        customer_id: str,
+        idempotency_key: str | None = None,
     ):
+        """
+        Amounts are integer numbers of the currencies minor units. Stripe
+        returns the same checkout session for the same `idempotency_key`
+        """
+        amount = to_major_units(
+            amount_in_currency,
+            get_currency_exponent(currency),
+        )
+        point_amount = to_major_units(
+            amount_in_point_currency,
+            get_currency_exponent(CurrencyTitleDescription.PNT.value),
+        )
         return stripe.checkout.Session.create(
-            customer_creation="always",
+            idempotency_key=idempotency_key,
+            customer=customer_id,
             line_items=[
                 {
                     "price_data": {
@@ -32,17 +79,16 @@ class StripeProvider(PaymentServiceProvider):
                         "product_data": {
                             "name": "Balance account top-up",
                         },
-                        "unit_amount": int(amount_in_currency * 100),
+                        "unit_amount": amount_in_currency,
                     },
                     "quantity": 1,
                 },
             ],
             phone_number_collection={"enabled": True},
-            customer_email=email,
             mode="payment",
 
             success_url=(
-                f"http://127.0.0.1:8001/billing/bank-account/top-up/success?currency={currency}&amount={amount_in_currency}&point_amount={amount_in_point_currency}"
+                f"http://127.0.0.1:8001/billing/bank-account/top-up/success?currency={currency}&amount={amount}&point_amount={point_amount}"
             ),
             cancel_url="http://127.0.0.1:8001/billing/bank-account/top-up/cancel/",
 
@@ -60,33 +106,44 @@ class StripeProvider(PaymentServiceProvider):
     def get_subscription_payment_checkout_session(
         self,
         number_of_subscription_month: int,
-        amount: float,
-        email: str,
+        amount: int,
+        customer_id: str,
         user_id: str,
         profile_id: str,
         currency: str = "USD",
+        idempotency_key: str | None = None,
+        price_id: str | None = None,
     ):
-        return stripe.checkout.Session.create(
-            customer_creation="always",
-            line_items=[
-                {
-                    "price_data": {
-                        "currency": currency,
-                        "product_data": {
-                            "name": (
-                                f"Subscription payment - {number_of_subscription_month} month(s)"),
-                        },
-                        "unit_amount": int(amount * 100),
+        """
+        Amount is an integer number of the currency minor units. Stripe
+        returns the same checkout session for the same `idempotency_key`.
+        The plan catalogue `price_id` is referenced when it was synced,
+        the price is sent inline otherwise
+        """
+        major_amount = to_major_units(amount, get_currency_exponent(currency))
+        if price_id is not None:
+            line_item = {"price": price_id, "quantity": 1}
+        else:
+            line_item = {
+                "price_data": {
+                    "currency": currency,
+                    "product_data": {
+                        "name": (
+                            f"Subscription payment - {number_of_subscription_month} month(s)"),
                     },
-                    "quantity": 1,
+                    "unit_amount": amount,
                 },
-            ],
+                "quantity": 1,
+            }
+        return stripe.checkout.Session.create(
+            idempotency_key=idempotency_key,
+            customer=customer_id,
+            line_items=[line_item],
             phone_number_collection={"enabled": True},
-            customer_email=email,
             mode="payment",
 
             success_url=(
-                f"http://127.0.0.1:8001/billing/payment/subscription/success?month_number={number_of_subscription_month}&amount={amount}"
+                f"http://127.0.0.1:8001/billing/payment/subscription/success?month_number={number_of_subscription_month}&amount={major_amount}"
             ),
             cancel_url="http://127.0.0.1:8001/billing/payment/subscription/cancel",
             saved_payment_method_options={
@@ -101,6 +158,45 @@ class StripeProvider(PaymentServiceProvider):
             }
         )
 
+    @override
+    def get_or_create_product(
+        self,
+        product_key: str,
+        name: str,
+    ) -> str:
+        """
+        The product id is `product_key`, so the product is found without
+        storing its id
+        """
+        try:
+            return stripe.Product.retrieve(product_key).id
+        except stripe.InvalidRequestError:
+            return stripe.Product.create(id=product_key, name=name).id
+
+    @override
+    def get_or_create_price(
+        self,
+        product_id: str,
+        lookup_key: str,
+        currency: str,
+        amount: int,
+    ) -> str:
+        """
+        Amount is an integer number of the currency minor units. The prices
+        can't be changed, `lookup_key` must identify the amount as well
+        """
+        prices = stripe.Price.list(lookup_keys=[lookup_key], limit=1)
+        if prices.data:
+            return prices.data[0].id
+
+        return stripe.Price.create(
+            idempotency_key=f"price-{lookup_key}",
+            product=product_id,
+            currency=currency.lower(),
+            unit_amount=amount,
+            lookup_key=lookup_key,
+        ).id
+
 
 def get_stripe_provider():
     return StripeProvider()
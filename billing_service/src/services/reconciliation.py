@@ -0,0 +1,575 @@
+import asyncio
+import io
+import json
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+import pandas as pd
+import zstandard
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.config import settings
+from src.db.mongodb import mongodb_helper
+from src.models.bank_account import BankAccount
+from src.models.ledger import LedgerEntry, LedgerEntryTypes
+from src.models.outbox import TransactionOutboxEvent
+from src.models.transaction import (
+    Transaction,
+    TransactionTypes,
+    get_amount_in_minor_units,
+)
+from src.services.transaction_archive import as_utc
+from src.utils.money import CURRENCY_EXPONENTS
+
+
+ID_COLUMNS = ["id_hi", "id_lo"]
+MAX_ID_HI = 2 ** 64
+
+
+def split_uuids(ids: list[UUID]) -> np.ndarray:
+    """
+    128-bit ids as the (n, 2) array of big-endian uint64 halves, so the
+    ids are joined and sorted as integers instead of Python objects
+    """
+    return np.frombuffer(
+        b"".join(id_.bytes for id_ in ids),
+        dtype=">u8",
+    ).reshape(-1, 2).astype(np.uint64)
+
+
+def get_shard_bounds(
+    shard_index: int,
+    number_of_shards: int,
+) -> tuple[UUID, UUID | None]:
+    """
+    Range [lower, upper) of the shard ids, the uuid order is the same
+    bytewise order in Postgres and MongoDB
+    """
+    step = MAX_ID_HI // number_of_shards
+    lower = UUID(int=(shard_index * step) << 64)
+    if shard_index == number_of_shards - 1:
+        return lower, None
+    return lower, UUID(int=((shard_index + 1) * step) << 64)
+
+
+def get_minor_units_expression(amount: str, currency: str) -> dict:
+    """
+    Aggregation expression of the integer number of the minor units of the
+    history document amount, the same as get_amount_in_minor_units(): the
+    legacy major units floats are converted
+    """
+    exponent = {
+        "$switch": {
+            "branches": [
+                {
+                    "case": {"$eq": [{"$toUpper": currency}, title]},
+                    "then": currency_exponent,
+                }
+                for title, currency_exponent in CURRENCY_EXPONENTS.items()
+            ],
+            "default": 2,
+        },
+    }
+    return {
+        "$cond": [
+            {"$eq": [{"$type": amount}, "double"]},
+            {
+                "$toLong": {
+                    "$round": [
+                        {"$multiply": [amount, {"$pow": [10, exponent]}]},
+                        0,
+                    ],
+                },
+            },
+            amount,
+        ],
+    }
+
+
+def join_uuids(frame: pd.DataFrame) -> list[UUID]:
+    return [
+        UUID(int=(int(id_hi) << 64) | int(id_lo))
+        for id_hi, id_lo in zip(frame["id_hi"], frame["id_lo"])
+    ]
+
+
+def get_account_filter(
+    lower: UUID,
+    upper: UUID | None,
+    bank_account_ids: list[UUID] | None = None,
+) -> dict:
+    """
+    Query operator of the bank account ids: the listed ones, or else the
+    [lower, upper) range
+    """
+    if bank_account_ids is not None:
+        return {"$in": bank_account_ids}
+
+    account_filter = {"$gte": lower}
+    if upper is not None:
+        account_filter["$lt"] = upper
+    return account_filter
+
+
+def get_history_credits_pipeline(
+    account_filter: dict,
+    since: datetime | None,
+    excluded_ids: list[UUID] | None = None,
+) -> list[dict]:
+    """
+    Net amount of the history entries by the bank account: the transfers
+    debit the sender and credit the recipient, the subscription payments
+    debit the bank account, the payouts and top-ups credit it.
+    The `excluded_ids` documents are counted from the outbox instead.
+
+    The first stage selects the documents of the `account_filter` accounts
+    with the indexes of both bank account fields, so a shard reads only
+    its documents, the credits of the other side of the transfers are
+    dropped after `$unwind`.
+    """
+    amount = get_minor_units_expression(
+        "$transaction.amount",
+        "$transaction.currency",
+    )
+    document_filter = {
+        "$or": [
+            {"transaction.bank_account_id": account_filter},
+            {"transaction.transferred_to_bank_account_id": account_filter},
+        ],
+    }
+    if since is not None:
+        document_filter["timestamp"] = {"$gte": since}
+    if excluded_ids:
+        document_filter["_id"] = {"$nin": excluded_ids}
+
+    return [
+        {"$match": document_filter},
+        {
+            "$project": {
+                "credits": {
+                    "$switch": {
+                        "branches": [
+                            {
+                                "case": {
+                                    "$eq": [
+                                        "$transaction.description",
+                                        TransactionTypes.TRANSFER.display,
+                                    ],
+                                },
+                                "then": [
+                                    {
+                                        "account": "$transaction.bank_account_id",
+                                        "amount": {"$multiply": [-1, amount]},
+                                    },
+                                    {
+                                        "account": "$transaction.transferred_to_bank_account_id",
+                                        "amount": amount,
+                                    },
+                                ],
+                            },
+                            {
+                                "case": {
+                                    "$eq": [
+                                        "$transaction.description",
+                                        TransactionTypes.SUBSCRIPTION_PAYMENT.display,
+                                    ],
+                                },
+                                "then": [
+                                    {
+                                        "account": "$transaction.bank_account_id",
+                                        "amount": {"$multiply": [-1, amount]},
+                                    },
+                                ],
+                            },
+                            {
+                                "case": {
+                                    "$eq": [
+                                        "$transaction.description",
+                                        TransactionTypes.TOP_UP_BY_ANOTHER_CURRENCY.display,
+                                    ],
+                                },
+                                "then": [
+                                    {
+                                        "account": "$transaction.bank_account_id",
+                                        "amount": get_minor_units_expression(
+                                            "$transaction.credited_amount_in_quote_currency",
+                                            "$transaction.quote_currency",
+                                        ),
+                                    },
+                                ],
+                            },
+                        ],
+                        "default": [
+                            {
+                                "account": "$transaction.bank_account_id",
+                                "amount": amount,
+                            },
+                        ],
+                    },
+                },
+            },
+        },
+        {"$unwind": "$credits"},
+        {"$match": {"credits.account": account_filter}},
+        {
+            "$group": {
+                "_id": "$credits.account",
+                "amount": {"$sum": "$credits.amount"},
+            },
+        },
+    ]
+
+
+def get_credits_frame(ids: list[UUID], amounts: list[int]) -> pd.DataFrame:
+    split_ids = split_uuids(ids) if ids else np.empty((0, 2), np.uint64)
+    return pd.DataFrame({
+        "id_hi": split_ids[:, 0],
+        "id_lo": split_ids[:, 1],
+        "amount": np.asarray(amounts, dtype=np.int64),
+    })
+
+
+def reconcile_frames(
+    balances: pd.DataFrame,
+    credits: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Drifted bank accounts: the balance differs from the opening balance
+    plus the net amount of their history credits.
+
+    `balances` has the id_hi, id_lo, currency, balance and opening_balance
+    columns, `credits` has the id_hi, id_lo and amount columns with any
+    number of rows per bank account. The credits of the accounts missing
+    from `balances` (deleted ones) are dropped.
+    """
+    history = credits.groupby(ID_COLUMNS, sort=False)["amount"].sum()
+    merged = balances.merge(
+        history.rename("history_amount"),
+        left_on=ID_COLUMNS,
+        right_index=True,
+        how="left",
+    )
+    merged["history_amount"] = (
+        merged["history_amount"].fillna(0).astype(np.int64)
+    )
+    merged["expected_balance"] = (
+        merged["opening_balance"] + merged["history_amount"]
+    )
+    merged["drift"] = merged["balance"] - merged["expected_balance"]
+    return merged[merged["drift"] != 0]
+
+
+async def get_opening_balances_time() -> datetime | None:
+    engine = create_async_engine(settings.db_url)
+    try:
+        async with engine.connect() as connection:
+            return (
+                await connection.execute(
+                    select(func.min(LedgerEntry.created_at)).where(
+                        LedgerEntry.entry_type
+                        == LedgerEntryTypes.OPENING_BALANCE.value
+                    )
+                )
+            ).scalar_one()
+    finally:
+        await engine.dispose()
+
+
+async def load_shard(
+    lower: UUID,
+    upper: UUID | None,
+    since: datetime | None,
+    bank_account_ids: list[UUID] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Balances and history credits of the shard's bank accounts, or of the
+    `bank_account_ids` only
+    """
+    opening_balances = (
+        select(
+            LedgerEntry.bank_account_id,
+            func.sum(LedgerEntry.amount).label("opening_balance"),
+        )
+        .where(
+            LedgerEntry.entry_type == LedgerEntryTypes.OPENING_BALANCE.value,
+            LedgerEntry.bank_account_id.is_not(None),
+        )
+        .group_by(LedgerEntry.bank_account_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            BankAccount.id,
+            BankAccount.currency,
+            BankAccount.balance,
+            func.coalesce(opening_balances.c.opening_balance, 0),
+        )
+        .outerjoin(
+            opening_balances,
+            opening_balances.c.bank_account_id == BankAccount.id,
+        )
+    )
+    if bank_account_ids is not None:
+        stmt = stmt.where(BankAccount.id.in_(bank_account_ids))
+    else:
+        stmt = stmt.where(BankAccount.id >= lower)
+        if upper is not None:
+            stmt = stmt.where(BankAccount.id < upper)
+
+    # Every worker process has its own engine and Motor client. The
+    # balances include the history documents still waiting in the outbox,
+    # so both are read in one snapshot.
+    engine = create_async_engine(
+        settings.db_url,
+        isolation_level="REPEATABLE READ",
+    )
+    try:
+        async with engine.connect() as connection:
+            rows = (await connection.execute(stmt)).all()
+            pending_documents = (
+                await connection.execute(select(TransactionOutboxEvent.document))
+            ).scalars().all()
+    finally:
+        await engine.dispose()
+
+    ids, currencies, balances, opening = zip(*rows) if rows else ([], [], [], [])
+    split_ids = split_uuids(list(ids)) if ids else np.empty((0, 2), np.uint64)
+    balances_frame = pd.DataFrame({
+        "id_hi": split_ids[:, 0],
+        "id_lo": split_ids[:, 1],
+        "currency": pd.Categorical(currencies),
+        "balance": np.asarray(balances, dtype=np.int64),
+        "opening_balance": np.asarray(opening, dtype=np.int64),
+    })
+
+    # The documents projected since the snapshot are already counted from
+    # the outbox
+    pending_ids = [UUID(document["id"]) for document in pending_documents]
+    await mongodb_helper.connect()
+    try:
+        cursor = Transaction.get_motor_collection().aggregate(
+            get_history_credits_pipeline(
+                get_account_filter(lower, upper, bank_account_ids),
+                since,
+                pending_ids,
+            ),
+            allowDiskUse=True,
+        )
+        groups = await cursor.to_list(length=None)
+    finally:
+        mongodb_helper.close()
+
+    credits_frame = pd.concat(
+        [
+            get_credits_frame(
+                [group["_id"] for group in groups],
+                [group["amount"] for group in groups],
+            ),
+            get_documents_credits(pending_documents, since),
+        ],
+        ignore_index=True,
+    )
+    return balances_frame, credits_frame
+
+
+def reconcile_shard(
+    shard_index: int,
+    number_of_shards: int,
+    since: datetime | None,
+    archived_credits: pd.DataFrame,
+) -> tuple[int, pd.DataFrame]:
+    """
+    Process pool task: load and reconcile the bank accounts of the shard
+    """
+    lower, upper = get_shard_bounds(shard_index, number_of_shards)
+    return asyncio.run(
+        reconcile_bank_accounts(lower, upper, since, archived_credits)
+    )
+
+
+async def reconcile_bank_accounts(
+    lower: UUID,
+    upper: UUID | None,
+    since: datetime | None,
+    archived_credits: pd.DataFrame,
+) -> tuple[int, pd.DataFrame]:
+    """
+    A transfer committed after the balances snapshot but projected into
+    MongoDB before the aggregation is counted in the history only, so the
+    drifted bank accounts are loaded and reconciled again with a new
+    snapshot and only those still drifted are reported
+    """
+    balances, credits = await load_shard(lower, upper, since)
+    drifted = reconcile_frames(
+        balances,
+        pd.concat([credits, archived_credits], ignore_index=True),
+    )
+    if not drifted.empty:
+        rechecked_balances, rechecked_credits = await load_shard(
+            lower,
+            upper,
+            since,
+            bank_account_ids=join_uuids(drifted),
+        )
+        drifted = reconcile_frames(
+            rechecked_balances,
+            pd.concat([rechecked_credits, archived_credits], ignore_index=True),
+        )
+    return len(balances), drifted
+
+
+def get_documents_credits(
+    documents,
+    since: datetime | None,
+) -> pd.DataFrame:
+    """
+    Credits of the JSON history documents, the same as
+    get_history_credits_pipeline() computes for the collection
+    """
+    ids = []
+    amounts = []
+    for document in documents:
+        if since is not None and (
+            as_utc(datetime.fromisoformat(document["timestamp"])) < since
+        ):
+            continue
+
+        transaction = document["transaction"]
+        if not transaction.get("bank_account_id"):
+            continue
+
+        description = transaction.get("description")
+        if description == TransactionTypes.TOP_UP_BY_ANOTHER_CURRENCY.display:
+            currency = transaction["quote_currency"]
+            amount = transaction["credited_amount_in_quote_currency"]
+        else:
+            currency = transaction["currency"]
+            amount = transaction["amount"]
+        amount = get_amount_in_minor_units(amount, currency)
+
+        if description == TransactionTypes.TRANSFER.display:
+            ids.append(UUID(transaction["bank_account_id"]))
+            amounts.append(-amount)
+            ids.append(UUID(transaction["transferred_to_bank_account_id"]))
+            amounts.append(amount)
+        elif description == TransactionTypes.SUBSCRIPTION_PAYMENT.display:
+            ids.append(UUID(transaction["bank_account_id"]))
+            amounts.append(-amount)
+        else:
+            ids.append(UUID(transaction["bank_account_id"]))
+            amounts.append(amount)
+
+    return get_credits_frame(ids, amounts)
+
+
+def read_archived_documents(archive_dir: Path, since: datetime | None):
+    decompressor = zstandard.ZstdDecompressor()
+    # The user bucket partitions and the former date only ones
+    part_paths = [
+        *archive_dir.glob("user_bucket=*/date=*/part-*.ndjson.zst"),
+        *archive_dir.glob("date=*/part-*.ndjson.zst"),
+    ]
+    for part_path in sorted(part_paths):
+        if since is not None and part_path.parent.name < f"date={since.date()}":
+            continue
+
+        with open(part_path, "rb") as file:
+            reader = io.TextIOWrapper(
+                decompressor.stream_reader(file),
+                encoding="utf-8",
+            )
+            for line in reader:
+                yield json.loads(line)
+
+
+def load_archived_credits(
+    archive_dir: Path,
+    since: datetime | None,
+) -> pd.DataFrame:
+    """
+    Credits of the history documents moved to the archive
+    """
+    return get_documents_credits(
+        read_archived_documents(archive_dir, since),
+        since,
+    )
+
+
+def generate_synthetic_shard(
+    shard_index: int,
+    number_of_shards: int,
+    number_of_accounts: int,
+    credits_per_account: int,
+    drift_ratio: float,
+    seed: int,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Random bank accounts of the shard id range with their credits, the
+    balances of `drift_ratio` of the accounts are off by one minor unit
+    """
+    rng = np.random.default_rng(seed + shard_index)
+    step = MAX_ID_HI // number_of_shards
+    id_hi = rng.integers(
+        shard_index * step,
+        (shard_index + 1) * step,
+        size=number_of_accounts,
+        dtype=np.uint64,
+    )
+    id_lo = rng.integers(0, MAX_ID_HI, size=number_of_accounts, dtype=np.uint64)
+    opening_balance = rng.integers(0, 1_000_000, size=number_of_accounts)
+
+    account_indices = np.repeat(
+        np.arange(number_of_accounts),
+        credits_per_account,
+    )
+    amounts = rng.integers(
+        -10_000,
+        100_000,
+        size=number_of_accounts * credits_per_account,
+    )
+    balance = opening_balance + np.bincount(
+        account_indices,
+        weights=amounts,
+        minlength=number_of_accounts,
+    ).astype(np.int64)
+    drifted = rng.random(number_of_accounts) < drift_ratio
+    balance[drifted] += 1
+
+    balances = pd.DataFrame({
+        "id_hi": id_hi,
+        "id_lo": id_lo,
+        "currency": pd.Categorical.from_codes(
+            rng.integers(0, len(CURRENCY_EXPONENTS), size=number_of_accounts),
+            categories=list(CURRENCY_EXPONENTS),
+        ),
+        "balance": balance,
+        "opening_balance": opening_balance,
+    })
+    credits = pd.DataFrame({
+        "id_hi": id_hi[account_indices],
+        "id_lo": id_lo[account_indices],
+        "amount": amounts,
+    })
+    return balances, credits
+
+
+def reconcile_synthetic_shard(
+    shard_index: int,
+    number_of_shards: int,
+    number_of_accounts: int,
+    credits_per_account: int,
+    drift_ratio: float,
+    seed: int,
+) -> tuple[int, pd.DataFrame]:
+    balances, credits = generate_synthetic_shard(
+        shard_index,
+        number_of_shards,
+        number_of_accounts,
+        credits_per_account,
+        drift_ratio,
+        seed,
+    )
+    return len(balances), reconcile_frames(balances, credits)
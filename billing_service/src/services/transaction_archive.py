@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import zstandard
+
+from src.core.config import settings
+from src.models.transaction import Transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Motor returns naive UTC datetimes, the documents read back from the
+    collection are dumped without the offset
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class UserBucketParts:
+    """
+    zstd compressed NDJSON contents of the part files of one day, one per
+    user bucket, compressed as the documents are written
+    """
+
+    def __init__(self, archive: "TransactionArchive"):
+        self.archive = archive
+        self.buffers: dict[int, io.BytesIO] = {}
+        self.writers = {}
+
+    def write(self, user_id: UUID | str, line: bytes) -> None:
+        user_bucket = self.archive.get_user_bucket(user_id)
+        writer = self.writers.get(user_bucket)
+        if writer is None:
+            buffer = self.buffers[user_bucket] = io.BytesIO()
+            # A compressor runs one stream at a time
+            compressor = zstandard.ZstdCompressor(
+                level=self.archive.compression_level,
+            )
+            writer = self.writers[user_bucket] = compressor.stream_writer(
+                buffer,
+                closefd=False,
+            )
+        writer.write(line)
+
+    def close(self) -> dict[int, bytes]:
+        for writer in self.writers.values():
+            writer.close()
+        return {
+            user_bucket: buffer.getvalue()
+            for user_bucket, buffer in self.buffers.items()
+        }
+
+
+class TransactionArchive:
+    """
+    Cold storage of the transaction history documents older than
+    `archive_after_days`, moved out of the Mongo `transactions` collection.
+
+    Documents are stored as zstd compressed NDJSON files partitioned by
+    the hash bucket of the user id and the UTC date of their timestamp:
+    `<archive_dir>/user_bucket=NN/date=YYYY-MM-DD/part-<uuid>.ndjson.zst`,
+    so a user's history is read from the files of that user's bucket
+    only. The part files are renamed into place before their documents
+    are deleted from the collection, so a run interrupted in between
+    leaves duplicates, which the reads skip by the document id.
+
+    The date partitions of the former layout without the user buckets,
+    `<archive_dir>/date=YYYY-MM-DD/`, are still read and are moved into
+    the buckets by the next `archive` run.
+    """
+
+    def __init__(
+        self,
+        archive_dir: Path,
+        archive_after_days: int,
+        compression_level: int,
+        delete_batch_size: int,
+        number_of_user_buckets: int = 64,
+    ):
+        self.archive_dir = archive_dir
+        self.archive_after_days = archive_after_days
+        self.compression_level = compression_level
+        self.delete_batch_size = delete_batch_size
+        # The buckets are a part of the layout, changing the number makes
+        # the archived documents unreachable
+        self.number_of_user_buckets = number_of_user_buckets
+
+    def get_cutoff(self) -> datetime:
+        """
+        Start of the oldest UTC day which is kept in the collection, only
+        whole days are archived
+        """
+        today = datetime.now(timezone.utc).date()
+        return datetime.combine(
+            today - timedelta(days=self.archive_after_days),
+            time(),
+            tzinfo=timezone.utc,
+        )
+
+    def get_user_bucket(self, user_id: UUID | str) -> int:
+        digest = hashlib.sha256(str(user_id).encode()).digest()
+        return int.from_bytes(digest[:4], "big") % self.number_of_user_buckets
+
+    def _get_partition_dir(self, user_bucket: int, day: date) -> Path:
+        return (
+            self.archive_dir
+            / f"user_bucket={user_bucket:02d}"
+            / f"date={day.isoformat()}"
+        )
+
+    def _get_legacy_partition_dirs(self) -> list[Path]:
+        return sorted(self.archive_dir.glob("date=*"))
+
+    async def archive(self) -> int:
+        await asyncio.to_thread(self._move_legacy_partitions)
+
+        cutoff = self.get_cutoff()
+        oldest_transaction = await Transaction.find(
+            Transaction.timestamp < cutoff,
+        ).sort(+Transaction.timestamp).first_or_none()
+        if oldest_transaction is None:
+            return 0
+
+        number_of_archived_documents = 0
+        day = as_utc(oldest_transaction.timestamp).date()
+        while day < cutoff.date():
+            number_of_archived_documents += await self.archive_day(day)
+            day += timedelta(days=1)
+        return number_of_archived_documents
+
+    async def archive_day(self, day: date) -> int:
+        day_start = datetime.combine(day, time(), tzinfo=timezone.utc)
+        day_end = day_start + timedelta(days=1)
+
+        parts = UserBucketParts(self)
+        ids = []
+        async for transaction in Transaction.find(
+            Transaction.timestamp >= day_start,
+            Transaction.timestamp < day_end,
+        ).sort(+Transaction.timestamp):
+            parts.write(
+                transaction.user_id,
+                transaction.model_dump_json().encode() + b"\n",
+            )
+            ids.append(transaction.id)
+
+        if not ids:
+            return 0
+
+        await asyncio.to_thread(self._write_parts, day, parts.close())
+
+        for offset in range(0, len(ids), self.delete_batch_size):
+            await Transaction.get_motor_collection().delete_many(
+                {"_id": {"$in": ids[offset:offset + self.delete_batch_size]}}
+            )
+
+        logger.info("Archived %s transactions of %s", len(ids), day)
+        return len(ids)
+
+    def _write_parts(self, day: date, contents: dict[int, bytes]) -> None:
+        for user_bucket, content in contents.items():
+            self._write_part(self._get_partition_dir(user_bucket, day), content)
+
+    def _write_part(self, partition_dir: Path, content: bytes) -> None:
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        part_name = f"part-{uuid4()}.ndjson.zst"
+        temporary_path = partition_dir / f".{part_name}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.rename(temporary_path, partition_dir / part_name)
+
+    def _move_legacy_partitions(self) -> None:
+        """
+        Split the part files of the former date only partitions into the
+        user buckets. A part file is removed after its buckets' part files
+        are in place, an interrupted run leaves duplicates only.
+        """
+        for partition_dir in self._get_legacy_partition_dirs():
+            day = date.fromisoformat(partition_dir.name.removeprefix("date="))
+            for part_path in sorted(partition_dir.glob("part-*.ndjson.zst")):
+                parts = UserBucketParts(self)
+                for line in self._read_part(part_path):
+                    parts.write(json.loads(line)["user_id"], line.encode())
+                self._write_parts(day, parts.close())
+                part_path.unlink()
+            if not any(partition_dir.iterdir()):
+                partition_dir.rmdir()
+            logger.info("Moved the archive partition %s into the user buckets", day)
+
+    def _read_part(self, part_path: Path):
+        decompressor = zstandard.ZstdDecompressor()
+        with open(part_path, "rb") as file:
+            reader = io.TextIOWrapper(
+                decompressor.stream_reader(file),
+                encoding="utf-8",
+            )
+            yield from reader
+
+    async def find(
+        self,
+        user_id: UUID,
+        since: datetime | None,
+        until: datetime,
+    ) -> list[Transaction]:
+        """
+        Archived transactions of the user within [since, until), from the
+        oldest partition when `since` is None
+        """
+        return await asyncio.to_thread(self._find, user_id, since, until)
+
+    def _find(
+        self,
+        user_id: UUID,
+        since: datetime | None,
+        until: datetime,
+    ) -> list[Transaction]:
+        transactions = {}
+        user_bucket = self.get_user_bucket(user_id)
+        user_id = str(user_id)
+
+        since = None if since is None else as_utc(since)
+        until = as_utc(until)
+        partition_dirs = [
+            *(self.archive_dir / f"user_bucket={user_bucket:02d}").glob("date=*"),
+            *self._get_legacy_partition_dirs(),
+        ]
+        for partition_dir in partition_dirs:
+            day = date.fromisoformat(partition_dir.name.removeprefix("date="))
+            if (since is not None and day < since.date()) or day > until.date():
+                continue
+
+            for part_path in sorted(partition_dir.glob("part-*.ndjson.zst")):
+                for line in self._read_part(part_path):
+                    # The user id is checked on the raw document first,
+                    # so only the user's documents are validated
+                    document = json.loads(line)
+                    if document["user_id"] != user_id:
+                        continue
+
+                    transaction = Transaction.model_validate(document)
+                    timestamp = as_utc(transaction.timestamp)
+                    if (since is None or since <= timestamp) and timestamp < until:
+                        transactions[transaction.id] = transaction
+
+        return list(transactions.values())
+
+
+transaction_archive = TransactionArchive(
+    archive_dir=Path(
+        settings.transaction_archive_settings.transaction_archive_dir
+    ),
+    archive_after_days=(
+        settings.transaction_archive_settings.transaction_archive_after_days
+    ),
+    compression_level=(
+        settings.transaction_archive_settings.transaction_archive_compression_level
+    ),
+    delete_batch_size=settings.bulk_operation_settings.bulk_operation_chunk_size,
+)
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from time import perf_counter
+
+from pydantic import ValidationError
+from sqlalchemy import Result, select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.postgres import db_helper
+from src.models.outbox import OutboxCheckpoint, TransactionOutboxEvent
+from src.models.transaction import Transaction
+from src.services.transaction_writer import transaction_bulk_writer
+from src.utils.metrics import LatencyHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionHistoryProjector:
+    """
+    Moves the transaction history documents from the Postgres outbox into
+    the Mongo `transactions` collection in batches.
+
+    Every service worker runs the projector, the checkpoint row locked with
+    FOR UPDATE SKIP LOCKED lets only one of them project a batch at a time.
+    The projected events are deleted from the outbox in the transaction
+    that moves the checkpoint.
+    """
+
+    checkpoint_name = "transactions"
+
+    def __init__(self, batch_size: int, poll_interval_seconds: float):
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._task: asyncio.Task | None = None
+
+        self.number_of_batches = 0
+        self.number_of_events = 0
+        self.batch_latency = LatencyHistogram()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        # An interrupted batch is rolled back and projected again later
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        await self._create_checkpoint()
+
+        while True:
+            try:
+                number_of_events = await self.project_batch()
+            except Exception:
+                logger.exception("Transaction history projection failed")
+                number_of_events = 0
+
+            if number_of_events < self.batch_size:
+                await asyncio.sleep(self.poll_interval_seconds)
+
+    async def _create_checkpoint(self) -> None:
+        async with db_helper.async_session() as session:
+            await session.execute(
+                pg_insert(OutboxCheckpoint)
+                .values(name=self.checkpoint_name)
+                .on_conflict_do_nothing(index_elements=[OutboxCheckpoint.name])
+            )
+            await session.commit()
+
+    async def project_batch(self) -> int:
+        async with db_helper.async_session() as session:
+            result: Result = await session.execute(
+                select(OutboxCheckpoint)
+                .where(OutboxCheckpoint.name == self.checkpoint_name)
+                .with_for_update(skip_locked=True)
+            )
+            checkpoint: OutboxCheckpoint | None = result.scalar_one_or_none()
+            if checkpoint is None:
+                # Another worker is projecting
+                return 0
+
+            result = await session.execute(
+                select(TransactionOutboxEvent)
+                .order_by(TransactionOutboxEvent.id)
+                .limit(self.batch_size)
+            )
+            events: list[TransactionOutboxEvent] = result.scalars().all()
+            if not events:
+                return 0
+
+            started_at = perf_counter()
+            # The documents must be in MongoDB before the events are deleted,
+            # a batch interrupted before the commit is written again and its
+            # duplicates are ignored by the writer. A failed write isn't
+            # buffered, the events stay in the outbox for the next poll.
+            await transaction_bulk_writer.write(self._validate(events))
+            await session.execute(
+                delete(TransactionOutboxEvent)
+                .where(
+                    TransactionOutboxEvent.id.in_([event.id for event in events])
+                )
+                .execution_options(synchronize_session=False)
+            )
+            checkpoint.last_event_id = events[-1].id
+            checkpoint.number_of_projected_events += len(events)
+            checkpoint.last_projected_at = datetime.now(timezone.utc)
+            await session.commit()
+
+        self.batch_latency.observe(perf_counter() - started_at)
+        self.number_of_batches += 1
+        self.number_of_events += len(events)
+        return len(events)
+
+    def _validate(self, events: list[TransactionOutboxEvent]) -> list[Transaction]:
+        """
+        The events with an invalid document are logged and deleted with
+        the batch instead of failing it on every poll
+        """
+        transactions = []
+        for event in events:
+            try:
+                transactions.append(Transaction.model_validate(event.document))
+            except ValidationError:
+                logger.exception(
+                    "Outbox event %s has an invalid document: %s",
+                    event.id,
+                    event.document,
+                )
+        return transactions
+
+    async def get_lag(self, session: AsyncSession) -> dict:
+        result: Result = await session.execute(
+            select(
+                func.count(TransactionOutboxEvent.id),
+                func.min(TransactionOutboxEvent.created_at),
+                func.now(),
+            )
+        )
+        number_of_pending_events, oldest_event_created_at, now = result.one()
+
+        result = await session.execute(
+            select(OutboxCheckpoint).where(
+                OutboxCheckpoint.name == self.checkpoint_name
+            )
+        )
+        checkpoint: OutboxCheckpoint | None = result.scalar_one_or_none()
+
+        return {
+            "pending_events": number_of_pending_events,
+            "lag_seconds": (
+                (now - oldest_event_created_at).total_seconds()
+                if oldest_event_created_at
+                else 0.0
+            ),
+            "last_event_id": checkpoint.last_event_id if checkpoint else None,
+            "number_of_projected_events": (
+                checkpoint.number_of_projected_events if checkpoint else 0
+            ),
+            "last_projected_at": (
+                checkpoint.last_projected_at if checkpoint else None
+            ),
+            "worker": {
+                "batches": self.number_of_batches,
+                "events": self.number_of_events,
+                "batch_latency": self.batch_latency.snapshot(),
+            },
+        }
+
+
+transaction_history_projector = TransactionHistoryProjector(
+    batch_size=settings.outbox_settings.outbox_batch_size,
+    poll_interval_seconds=settings.outbox_settings.outbox_poll_interval_seconds,
+)
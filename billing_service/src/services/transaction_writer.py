@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from time import perf_counter
+
+from beanie.odm.utils.dump import get_dict
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError
+
+from src.core.config import settings
+from src.models.transaction import Transaction
+from src.utils.metrics import LatencyHistogram
+
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+# Write errors of an unavailable or stepping down primary, the write is
+# retried instead of rejecting the document
+RETRYABLE_WRITE_ERROR_CODES = {
+    6, 7, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436,
+}
+
+
+def get_write_concern(w: str, journal: bool) -> WriteConcern:
+    return WriteConcern(w=int(w) if w.isdigit() else w, j=journal)
+
+
+class TransactionBulkWriter:
+    """
+    Buffer of the transaction history documents written to MongoDB with
+    unordered insert_many.
+
+    The buffer is flushed when it reaches `batch_size` documents, every
+    `flush_interval_seconds` and on shutdown, and holds at most
+    `max_buffered_documents`: while MongoDB is unavailable `add` raises
+    instead of growing it. Documents keep their uuid `_id`, so duplicate
+    key errors of a replayed write are ignored. Documents rejected by
+    MongoDB for another reason are logged and counted, not retried.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval_seconds: float,
+        write_concern: WriteConcern,
+        max_buffered_documents: int,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.write_concern = write_concern
+        self.max_buffered_documents = max_buffered_documents
+
+        self._buffer: list[dict] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+        self.number_of_flushes = 0
+        self.number_of_documents = 0
+        self.number_of_duplicates = 0
+        self.number_of_rejected_documents = 0
+        self.flush_latency = LatencyHistogram()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Transaction history flush failed")
+
+    async def add(self, transactions: list[Transaction]) -> None:
+        if len(self._buffer) + len(transactions) > self.max_buffered_documents:
+            await self.flush()
+
+        # Documents are encoded when added, so a flush only sends them
+        self._buffer.extend(
+            get_dict(transaction, to_db=True) for transaction in transactions
+        )
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def write(self, transactions: list[Transaction]) -> None:
+        """
+        Write the documents in batches bypassing the buffer, nothing is
+        kept after a failure: the outbox projector writes its batch again
+        from the outbox, which stays the durable copy
+        """
+        documents = [
+            get_dict(transaction, to_db=True) for transaction in transactions
+        ]
+        async with self._lock:
+            for offset in range(0, len(documents), self.batch_size):
+                await self._insert(documents[offset:offset + self.batch_size])
+
+    async def flush(self) -> None:
+        async with self._lock:
+            while self._buffer:
+                documents = self._buffer[:self.batch_size]
+                await self._insert(documents)
+                del self._buffer[:len(documents)]
+
+    async def _insert(self, documents: list[dict]) -> None:
+        collection = Transaction.get_motor_collection().with_options(
+            write_concern=self.write_concern,
+        )
+        started_at = perf_counter()
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if e.details.get("writeConcernErrors") or any(
+                error["code"] in RETRYABLE_WRITE_ERROR_CODES
+                for error in write_errors
+            ):
+                raise
+
+            # The other documents of the unordered insert were written
+            for error in write_errors:
+                if error["code"] == DUPLICATE_KEY_ERROR_CODE:
+                    self.number_of_duplicates += 1
+                    continue
+
+                self.number_of_rejected_documents += 1
+                logger.error(
+                    "Transaction history document was rejected: %s %s",
+                    error.get("errmsg"),
+                    error.get("op"),
+                )
+
+        self.flush_latency.observe(perf_counter() - started_at)
+        self.number_of_flushes += 1
+        self.number_of_documents += len(documents)
+
+    def get_stats(self) -> dict:
+        return {
+            "buffered_documents": len(self._buffer),
+            "flushes": self.number_of_flushes,
+            "documents": self.number_of_documents,
+            "duplicates": self.number_of_duplicates,
+            "rejected_documents": self.number_of_rejected_documents,
+            "flush_latency": self.flush_latency.snapshot(),
+        }
+
+
+transaction_bulk_writer = TransactionBulkWriter(
+    batch_size=settings.transaction_writer_settings.transaction_writer_batch_size,
+    flush_interval_seconds=(
+        settings.transaction_writer_settings.transaction_writer_flush_interval_seconds
+    ),
+    write_concern=get_write_concern(
+        settings.transaction_writer_settings.transaction_writer_write_concern,
+        settings.transaction_writer_settings.transaction_writer_journal,
+    ),
+    max_buffered_documents=(
+        settings.transaction_writer_settings.transaction_writer_max_buffered_documents
+    ),
+)
@@ -2,20 +2,22 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Annotated
 
 from fastapi import HTTPException, status
-from sqlalchemy import Result, select
+from sqlalchemy import Result, select, delete, update, func
 
+from src.db.postgres import insert_returning
 from src.models.bank_account import BankAccount
+from src.models.ledger import LedgerEntryTypes, LedgerSystemAccounts
 from src.models.profile import Profile
+from src.schemas.bank_account import BankAccountRead, BankAccountBalanceTotal
+from src.schemas.profile import ProfileRead
+from src.services.cache import profile_cache, bank_accounts_cache
 from src.utils.messages import messages
-from src.utils import profile_crud, currency_pair_crud
+from src.utils import profile_crud, currency_pair_crud, ledger_crud
 
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
-    from src.schemas.bank_account import (
-        BankAccountCreate,
-        BankAccountRead,
-    )
+    from src.schemas.bank_account import BankAccountCreate
 
 
 async def create_bank_account(
@@ -23,17 +25,47 @@ async def create_bank_account(
     user_id: str,
     session: AsyncSession,
 ) -> BankAccountRead:
-    profile = await profile_crud.get_profile_by_user_id(user_id, session)
-    bank_account = BankAccount(
-        currency=bank_account_in.model_dump()["currency"].value,
-        profile_id=profile.id,
+    profile = await profile_crud.get_cached_profile_by_user_id(user_id, session)
+    bank_account = await insert_returning(
+        session,
+        BankAccount(
+            currency=bank_account_in.model_dump()["currency"].value,
+            profile_id=profile.id,
+        ),
     )
-    session.add(bank_account)
     await session.commit()
-    await session.refresh(bank_account)
+    await invalidate_bank_accounts_cache(profile.id)
     return bank_account
 
 
+async def get_cached_bank_accounts_by_profile_id(
+    profile_id: str,
+    session: AsyncSession,
+) -> list[BankAccountRead]:
+    async def load_bank_accounts() -> list[dict]:
+        stmt = select(BankAccount).where(BankAccount.profile_id == profile_id)
+        result: Result = await session.execute(stmt)
+        return [
+            BankAccountRead.model_validate(
+                bank_account,
+                from_attributes=True,
+            ).model_dump(mode="json")
+            for bank_account in result.scalars().all()
+        ]
+
+    return [
+        BankAccountRead.model_validate(bank_account)
+        for bank_account in await bank_accounts_cache.get_or_load(
+            str(profile_id),
+            load_bank_accounts,
+        )
+    ]
+
+
+async def invalidate_bank_accounts_cache(profile_id: str) -> None:
+    await bank_accounts_cache.invalidate(str(profile_id))
+
+
 async def get_bank_account_by_id(
     bank_account_id: str,
     session: AsyncSession,
@@ -49,14 +81,58 @@ async def get_bank_account_by_id(
     return bank_account
 
 
-async def get_bank_accounts_by_user_id_through_profile_id(
+async def get_cached_bank_accounts_by_user_id(
     user_id: str,
     session: AsyncSession,
-) -> list[BankAccount]:
-    profile = await profile_crud.get_profile_by_user_id(user_id, session)
-    stmt = select(BankAccount).where(BankAccount.profile_id == profile.id)
+) -> list[BankAccountRead]:
+    cached_profile = await profile_cache.get(str(user_id))
+    if cached_profile is not None:
+        return await get_cached_bank_accounts_by_profile_id(
+            cached_profile["id"],
+            session,
+        )
+
+    load_start = await bank_accounts_cache.start_load()
+    # Profile and its bank accounts are loaded with the single query,
+    # profile without bank accounts is returned as one row with NULL account
+    stmt = (
+        select(Profile, BankAccount)
+        .outerjoin(BankAccount, BankAccount.profile_id == Profile.id)
+        .where(Profile.user_id == user_id)
+    )
     result: Result = await session.execute(stmt)
-    bank_accounts: list[BankAccount] = result.scalars().all()
+    rows = result.all()
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.USER_PROFILE_WAS_NOT_FOUND,
+        )
+
+    profile: Profile = rows[0].Profile
+    bank_accounts = [
+        BankAccountRead.model_validate(row.BankAccount, from_attributes=True)
+        for row in rows
+        if row.BankAccount is not None
+    ]
+
+    await profile_cache.set(
+        str(user_id),
+        ProfileRead.model_validate(profile).model_dump(mode="json"),
+        load_start,
+    )
+    await bank_accounts_cache.set(
+        str(profile.id),
+        [bank_account.model_dump(mode="json") for bank_account in bank_accounts],
+        load_start,
+    )
+    return bank_accounts
+
+
+async def get_bank_accounts_by_user_id_through_profile_id(
+    user_id: str,
+    session: AsyncSession,
+) -> list[BankAccountRead]:
+    bank_accounts = await get_cached_bank_accounts_by_user_id(user_id, session)
     if not bank_accounts:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,20 +145,16 @@ async def get_bank_account_by_user_id_through_profile_id_and_currency(
     user_id: str,
     currency: str,
     session: AsyncSession,
-):
-    profile: Profile = await profile_crud.get_profile_by_user_id(user_id, session)
-    stmt = select(BankAccount).where(
-        BankAccount.profile_id == profile.id,
-        BankAccount.currency == currency,
+) -> BankAccountRead:
+    bank_accounts = await get_cached_bank_accounts_by_user_id(user_id, session)
+    for bank_account in bank_accounts:
+        if bank_account.currency.value == currency:
+            return bank_account
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=messages.USER_PROFILE_BANK_ACCOUNT_WITH_CURRENCY_ENTERED_WAS_NOT_FOUND,
     )
-    result: Result = await session.execute(stmt)
-    bank_account: BankAccount = result.scalars().one_or_none()
-    if not bank_account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=messages.USER_PROFILE_BANK_ACCOUNT_WITH_CURRENCY_ENTERED_WAS_NOT_FOUND,
-        )
-    return bank_account
 
 
 async def get_bank_accounts(
@@ -162,23 +234,58 @@ async def delete_bank_account_by_id(
     bank_account_id: str,
     session: AsyncSession,
 ):
-    profile: Profile = await profile_crud.get_profile_by_user_id(
-        user_id,
-        session,
+    stmt = (
+        delete(BankAccount)
+        .where(
+            BankAccount.id == bank_account_id,
+            BankAccount.profile_id == Profile.id,
+            Profile.user_id == user_id,
+        )
+        .returning(BankAccount.profile_id)
+        .execution_options(synchronize_session=False)
     )
-    bank_account = await get_bank_account_by_id(
-        bank_account_id,
-        session,
+    result: Result = await session.execute(stmt)
+    profile_id = result.scalar_one_or_none()
+
+    if profile_id is None:
+        await raise_bank_account_deletion_error(user_id, bank_account_id, session)
+
+    await session.commit()
+    await invalidate_bank_accounts_cache(profile_id)
+
+
+async def raise_bank_account_deletion_error(
+    user_id: str,
+    bank_account_id: str,
+    session: AsyncSession,
+):
+    """
+    Find out why the bank account wasn't deleted: user doesn't have profile,
+    bank account doesn't exist or belongs to another profile
+    """
+    stmt = (
+        select(Profile.id, BankAccount.profile_id)
+        .select_from(Profile)
+        .outerjoin(BankAccount, BankAccount.id == bank_account_id)
+        .where(Profile.user_id == user_id)
     )
+    result: Result = await session.execute(stmt)
+    row = result.one_or_none()
 
-    if not bank_account.profile_id == profile.id:
+    if row is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=messages.USER_DOES_NOT_HAVE_APPROPRIATE_PERMISSIONS,
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.USER_PROFILE_WAS_NOT_FOUND,
         )
-
-    await session.delete(bank_account)
-    await session.commit()
+    if row.profile_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.BANK_ACCOUNT_WITH_THAT_ID_WAS_NOT_FOUND,
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=messages.USER_DOES_NOT_HAVE_APPROPRIATE_PERMISSIONS,
+    )
 
 
 async def delete_bank_account_by_admin(
@@ -191,34 +298,91 @@ async def delete_bank_account_by_admin(
     )
     await session.delete(bank_account)
     await session.commit()
+    await invalidate_bank_accounts_cache(bank_account.profile_id)
 
 
 async def delete_profile_bank_accounts(
     profile_id: str,
     session: AsyncSession,
 ):
-    bank_accounts = await get_bank_accounts_by_profile_id(
-        profile_id,
-        session,
+    stmt = (
+        delete(BankAccount)
+        .where(BankAccount.profile_id == profile_id)
+        .returning(BankAccount.id)
+        .execution_options(synchronize_session=False)
     )
-
-    for bank_account in bank_accounts:
-        await session.delete(bank_account)
+    result: Result = await session.execute(stmt)
+    if not result.scalars().all():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.USER_PROFILE_BANK_ACCOUNTS_WERE_NOT_FOUND,
+        )
 
     await session.commit()
+    await invalidate_bank_accounts_cache(profile_id)
 
 
 async def update_bank_account_balance(
     bank_account_profile_id: str,
     bank_account_currency: str,
-    amount_to_top_up: float,
+    amount_to_top_up: int,
     session: AsyncSession,
+    entry_type: str = LedgerEntryTypes.TOP_UP.value,
+    system_account: str = LedgerSystemAccounts.PSP_TOP_UPS.value,
 ):
-    bank_account: BankAccount = await get_bank_account_by_profile_id_with_specified_currency(
-        bank_account_profile_id,
+    """
+    Credit the bank account with the atomic UPDATE ... RETURNING and append
+    the matching ledger journal from the system account. The caller commits,
+    so the transaction history event can join the same transaction, and
+    invalidates the bank accounts cache afterwards.
+    """
+    stmt = (
+        update(BankAccount)
+        .where(
+            BankAccount.profile_id == bank_account_profile_id,
+            BankAccount.currency == bank_account_currency,
+        )
+        .values(balance=BankAccount.balance + amount_to_top_up)
+        .returning(BankAccount)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await session.execute(stmt)
+    bank_account: BankAccount = result.scalars().one_or_none()
+    if not bank_account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.PROFILE_WITH_SPECIFIED_ID_DOES_NOT_HAVE_BANK_ACCOUNT_WITH_THAT_CURRENCY,
+        )
+
+    await ledger_crud.append_journal(
+        entry_type,
         bank_account_currency,
+        amount_to_top_up,
         session,
+        from_system_account=system_account,
+        to_bank_account_id=bank_account.id,
     )
-    bank_account.balance += amount_to_top_up
-    await session.commit()
     return bank_account
+
+
+async def get_bank_account_balance_totals(
+    session: AsyncSession,
+) -> list[BankAccountBalanceTotal]:
+    stmt = (
+        select(
+            BankAccount.currency,
+            func.sum(BankAccount.balance).label("total_balance"),
+            func.count().label("number_of_bank_accounts"),
+        )
+        .group_by(BankAccount.currency)
+        .order_by(BankAccount.currency)
+    )
+    result: Result = await session.execute(stmt)
+    return [
+        BankAccountBalanceTotal(
+            currency=row.currency,
+            total_balance=int(row.total_balance),
+            number_of_bank_accounts=row.number_of_bank_accounts,
+        )
+        for row in result
+    ]
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 from fastapi import HTTPException, status
 from sqlalchemy import select, Result
 
+from src.db.postgres import insert_returning
 from src.models.currency import Currency
 from src.utils.messages import messages
 
@@ -20,12 +21,13 @@ async def create_currency(
     currency_in: CurrencyCreate,
     session: AsyncSession,
 ) -> CurrencyRead:
-    currency = Currency(
-        **currency_in.model_dump(),
+    currency = await insert_returning(
+        session,
+        Currency(
+            **currency_in.model_dump(),
+        ),
     )
-    session.add(currency)
     await session.commit()
-    await session.refresh(currency)
 
     return currency
 
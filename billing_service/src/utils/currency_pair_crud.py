@@ -1,14 +1,23 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
+from decimal import Decimal
 
-from sqlalchemy import select, Result
+from sqlalchemy import case, select, Result
+from sqlalchemy.orm import aliased
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import HTTPException, status
 
+from src.db.postgres import insert_returning
 from src.models.currency import Currency, CurrencyPair
 from src.schemas.currency import CurrencyTitleDescription
 from src.utils import currency_crud
 from src.utils.messages import messages
+from src.utils.money import (
+    CURRENCY_EXPONENTS,
+    EXCHANGE_RATE_SCALE,
+    convert_minor_units,
+    convert_minor_units_inversely,
+)
 
 
 if TYPE_CHECKING:
@@ -23,12 +32,13 @@ async def create_currency_pair(
     currency_pair_in: CurrencyPairCreate,
     session: AsyncSession,
 ) -> CurrencyPairRead:
-    currency_pair = CurrencyPair(
-        **currency_pair_in.model_dump()
+    currency_pair = await insert_returning(
+        session,
+        CurrencyPair(
+            **currency_pair_in.model_dump()
+        ),
     )
-    session.add(currency_pair)
     await session.commit()
-    await session.refresh(currency_pair)
 
     return currency_pair
 
@@ -86,6 +96,9 @@ async def set_exchange_rate_currencies_to_point_currency(
     exchange_rates_to_usd: dict,
     session: AsyncSession,
 ):
+    exchange_rate_usd_to_point = Decimal(str(exchange_rate_usd_to_point))
+    exchange_rate_quantum = Decimal(1).scaleb(-EXCHANGE_RATE_SCALE)
+
     # Retreive Point currency to find it's id in the `data` dictionary forming
     point_currency: Currency = await currency_crud.get_currency_by_title(
         CurrencyTitleDescription.PNT.value, session
@@ -125,7 +138,10 @@ async def set_exchange_rate_currencies_to_point_currency(
             data = {
                 "base_currency_id": base_currency.id,
                 "quote_currency_id": point_currency.id,
-                "exchange_rate": exchange_rate_usd_to_point / exchange_rate_to_usd[1]
+                "exchange_rate": (
+                    exchange_rate_usd_to_point
+                    / Decimal(str(exchange_rate_to_usd[1]))
+                ).quantize(exchange_rate_quantum),
             }
 
         stmt = pg_insert(CurrencyPair).values(data)
@@ -144,39 +160,72 @@ async def set_exchange_rate_currencies_to_point_currency(
     }
 
 
-async def get_amount_in_quote_currency_using_base_currency(
+async def get_exchange_rate_with_currency_exponents(
     base_currency_title: str,
-    amount_in_base_currency: float,
     session: AsyncSession,
 ):
-    base_currency: Currency = await currency_crud.get_currency_by_title(
-        base_currency_title,
-        session,
+    base_currency = aliased(Currency)
+    quote_currency = aliased(Currency)
+    stmt = (
+        select(
+            CurrencyPair.exchange_rate,
+            case(CURRENCY_EXPONENTS, value=base_currency.title).label(
+                "base_exponent"
+            ),
+            case(CURRENCY_EXPONENTS, value=quote_currency.title).label(
+                "quote_exponent"
+            ),
+        )
+        .join(base_currency, CurrencyPair.base_currency_id == base_currency.id)
+        .join(quote_currency, CurrencyPair.quote_currency_id == quote_currency.id)
+        .where(base_currency.title == base_currency_title)
     )
-    currency_pair: CurrencyPair = await get_currency_pair_by_base_currency_id(
-        base_currency.id,
+    result: Result = await session.execute(stmt)
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.CURRENCY_PAIR_WITH_THAT_BASE_CURRENCY_ID_WAS_NOT_FOUND,
+        )
+
+    return row
+
+
+async def get_amount_in_quote_currency_using_base_currency(
+    base_currency_title: str,
+    amount_in_base_currency: int,
+    session: AsyncSession,
+) -> int:
+    """
+    Amounts are integer numbers of the currencies minor units
+    """
+    row = await get_exchange_rate_with_currency_exponents(
+        base_currency_title,
         session,
     )
-    amount_in_quote_currency = (
-        currency_pair.exchange_rate * amount_in_base_currency
+    return convert_minor_units(
+        amount_in_base_currency,
+        row.exchange_rate,
+        row.base_exponent,
+        row.quote_exponent,
     )
-    return amount_in_quote_currency
 
 
 async def get_amount_in_base_currency_using_quote_currency(
     base_currency_title: str,
-    amount_in_quote_currency: float,
+    amount_in_quote_currency: int,
     session: AsyncSession,
-):
-    base_currency: Currency = await currency_crud.get_currency_by_title(
+) -> int:
+    """
+    Amounts are integer numbers of the currencies minor units
+    """
+    row = await get_exchange_rate_with_currency_exponents(
         base_currency_title,
         session,
     )
-    currency_pair: CurrencyPair = await get_currency_pair_by_base_currency_id(
-        base_currency.id,
-        session,
-    )
-    amount_in_base_currency = (
-        amount_in_quote_currency / currency_pair.exchange_rate
+    return convert_minor_units_inversely(
+        amount_in_quote_currency,
+        row.exchange_rate,
+        row.quote_exponent,
+        row.base_exponent,
     )
-    return amount_in_base_currency
@@ -0,0 +1,249 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, Result, String, select, insert, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.models.bank_account import BankAccount
+from src.models.ledger import LedgerEntry, LedgerSnapshot
+from src.schemas.ledger import LedgerBalanceRead
+from src.utils.messages import messages
+
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def append_journal(
+    entry_type: str,
+    currency: str,
+    amount: int,
+    session: AsyncSession,
+    from_bank_account_id: UUID | None = None,
+    from_system_account: str | None = None,
+    to_bank_account_id: UUID | None = None,
+    to_system_account: str | None = None,
+) -> UUID:
+    """
+    Append the balanced pair of entries moving `amount` minor units from
+    one account to another. Exactly one of the bank account or system
+    account must be passed for each side. The entries are committed by
+    the caller together with the bank account balance update.
+    """
+    if (from_bank_account_id is None) == (from_system_account is None) or (
+        (to_bank_account_id is None) == (to_system_account is None)
+    ):
+        raise ValueError("Each side of the journal needs exactly one account.")
+
+    journal_id = uuid4()
+    await session.execute(
+        insert(LedgerEntry),
+        [
+            {
+                "journal_id": journal_id,
+                "entry_type": entry_type,
+                "bank_account_id": from_bank_account_id,
+                "system_account": from_system_account,
+                "currency": currency,
+                "amount": -amount,
+            },
+            {
+                "journal_id": journal_id,
+                "entry_type": entry_type,
+                "bank_account_id": to_bank_account_id,
+                "system_account": to_system_account,
+                "currency": currency,
+                "amount": amount,
+            },
+        ],
+    )
+    return journal_id
+
+
+async def append_system_account_journals(
+    entry_type: str,
+    system_account: str,
+    credits: list[tuple[UUID, str, int]],
+    session: AsyncSession,
+) -> None:
+    """
+    Append one journal per (bank_account_id, currency, amount) credit from
+    the system account, all of them with a single multi-row INSERT
+    """
+    entries = []
+    for bank_account_id, currency, amount in credits:
+        journal_id = uuid4()
+        entries.append(
+            {
+                "journal_id": journal_id,
+                "entry_type": entry_type,
+                "bank_account_id": None,
+                "system_account": system_account,
+                "currency": currency,
+                "amount": -amount,
+            }
+        )
+        entries.append(
+            {
+                "journal_id": journal_id,
+                "entry_type": entry_type,
+                "bank_account_id": bank_account_id,
+                "system_account": None,
+                "currency": currency,
+                "amount": amount,
+            }
+        )
+
+    if entries:
+        await session.execute(insert(LedgerEntry), entries)
+
+
+async def get_ledger_balance(
+    bank_account_id: UUID,
+    session: AsyncSession,
+) -> LedgerBalanceRead:
+    """
+    Balance derived from the latest snapshot and the entries appended
+    since, compared with the materialized bank account balance
+    """
+    stmt = (
+        select(
+            BankAccount.balance,
+            LedgerSnapshot.balance.label("snapshot_balance"),
+            LedgerSnapshot.taken_until_transaction_id,
+        )
+        .outerjoin(
+            LedgerSnapshot,
+            LedgerSnapshot.bank_account_id == BankAccount.id,
+        )
+        .where(BankAccount.id == bank_account_id)
+    )
+    result: Result = await session.execute(stmt)
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.BANK_ACCOUNT_WITH_THAT_ID_WAS_NOT_FOUND,
+        )
+
+    delta_stmt = select(
+        func.coalesce(func.sum(LedgerEntry.amount), 0)
+    ).where(LedgerEntry.bank_account_id == bank_account_id)
+    if row.taken_until_transaction_id is not None:
+        delta_stmt = delta_stmt.where(
+            LedgerEntry.transaction_id >= row.taken_until_transaction_id
+        )
+    delta = (await session.execute(delta_stmt)).scalar_one()
+
+    return LedgerBalanceRead(
+        bank_account_id=bank_account_id,
+        ledger_balance=(row.snapshot_balance or 0) + int(delta),
+        bank_account_balance=row.balance,
+        snapshot_taken_until_transaction_id=row.taken_until_transaction_id,
+    )
+
+
+async def get_ledger_entries(
+    bank_account_id: UUID,
+    session: AsyncSession,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 100,
+) -> list[LedgerEntry]:
+    stmt = (
+        select(LedgerEntry)
+        .where(LedgerEntry.bank_account_id == bank_account_id)
+        .order_by(LedgerEntry.created_at, LedgerEntry.id)
+        .limit(limit)
+    )
+    if since is not None:
+        stmt = stmt.where(LedgerEntry.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(LedgerEntry.created_at < until)
+
+    result: Result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def take_ledger_snapshots(session: AsyncSession) -> int:
+    """
+    Roll the snapshots of all bank accounts with new entries forward in
+    one INSERT ... SELECT ... ON CONFLICT statement.
+
+    The cutoff is the xmin of the current snapshot: the transactions with
+    lower ids have all committed or rolled back, so their entries are
+    final, while any later one can still commit. A time or entry id
+    cutoff can't tell that, a long transaction commits its entries
+    behind it. Every run covers the entries between the previous cutoff
+    (the latest `taken_until_transaction_id`) and the new one, so it is
+    a range scan of the recent entries only. Concurrent runs are
+    serialized with the advisory lock, otherwise the same range would be
+    added twice.
+    """
+    await session.execute(
+        select(func.pg_advisory_xact_lock(func.hashtext("ledger_snapshots")))
+    )
+
+    previous_cutoff = (
+        await session.execute(
+            select(func.max(LedgerSnapshot.taken_until_transaction_id))
+        )
+    ).scalar_one()
+    cutoff = (
+        await session.execute(
+            select(
+                func.pg_snapshot_xmin(func.pg_current_snapshot())
+                .cast(String)
+                .cast(BigInteger)
+            )
+        )
+    ).scalar_one()
+    if previous_cutoff is not None and cutoff <= previous_cutoff:
+        return 0
+
+    deltas = (
+        select(
+            func.gen_random_uuid().label("id"),
+            LedgerEntry.bank_account_id,
+            literal(cutoff, BigInteger).label("taken_until_transaction_id"),
+            func.sum(LedgerEntry.amount).label("balance"),
+        )
+        .where(
+            LedgerEntry.bank_account_id.is_not(None),
+            LedgerEntry.transaction_id < cutoff,
+        )
+        .group_by(LedgerEntry.bank_account_id)
+    )
+    if previous_cutoff is not None:
+        deltas = deltas.where(LedgerEntry.transaction_id >= previous_cutoff)
+
+    # Entries of the deleted bank accounts are kept, but have no snapshot
+    deltas = deltas.where(
+        select(BankAccount.id)
+        .where(BankAccount.id == LedgerEntry.bank_account_id)
+        .exists()
+    )
+
+    stmt = pg_insert(LedgerSnapshot).from_select(
+        ["id", "bank_account_id", "taken_until_transaction_id", "balance"],
+        deltas,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LedgerSnapshot.bank_account_id],
+        set_={
+            "balance": LedgerSnapshot.balance + stmt.excluded.balance,
+            "taken_until_transaction_id": (
+                stmt.excluded.taken_until_transaction_id
+            ),
+        },
+    ).returning(LedgerSnapshot.bank_account_id)
+
+    result: Result = await session.execute(stmt)
+    number_of_snapshots = len(result.all())
+    await session.commit()
+    return number_of_snapshots
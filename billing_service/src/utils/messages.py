@@ -74,6 +74,42 @@ class Messages:
     TRANSACTION_HISTORY_ENTRY_WAS_CREATED = (
         "Transaction history entry was created successfully."
     )
+    RECIPIENT_BANK_ACCOUNT_WITH_THAT_CURRENCY_WAS_NOT_FOUND = (
+        "Recipient with the specified phone number doesn\'t have "
+        "bank account with that currency."
+    )
+    TRANSFER_TO_THE_SAME_BANK_ACCOUNT_IS_NOT_ALLOWED = (
+        "Transfer to the same bank account is not allowed."
+    )
+    INSUFFICIENT_FUNDS_IN_THE_BANK_ACCOUNT = (
+        "Insufficient funds in the bank account."
+    )
+    TRANSFER_AMOUNT_IS_TOO_SMALL = (
+        "Transfer amount is less than the currency minor unit."
+    )
+    PSP_CUSTOMER_BELONGS_TO_ANOTHER_PROFILE = (
+        "Payment service customer of the profile belongs to another profile."
+    )
+    CHECKOUT_IS_IN_PROGRESS = (
+        "Checkout with the same parameters is still being created, "
+        "retry the request later."
+    )
+    PAYOUT_CSV_IS_INVALID = (
+        "Payout file is not a UTF-8 CSV with the profile_id, phone_number, "
+        "currency and amount header columns."
+    )
+    PAYOUT_ROW_HAS_EXTRA_COLUMNS = (
+        "Payout row has more columns than the header."
+    )
+    PAYOUT_CHUNK_FAILED = (
+        "Payout was not applied because of a database error, it can be retried."
+    )
+    SUBSCRIPTION_PLAN_WAS_NOT_FOUND = (
+        "Subscription plan with that number of months was not found."
+    )
+    SUBSCRIPTION_PRICE_IS_TOO_SMALL = (
+        "Subscription price is less than the Point currency minor unit."
+    )
 
 
 messages = Messages()
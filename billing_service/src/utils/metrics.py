@@ -0,0 +1,42 @@
+from bisect import bisect_left
+
+
+DEFAULT_LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class LatencyHistogram:
+    """
+    Cumulative latency histogram with fixed bucket upper bounds
+    in milliseconds
+    """
+
+    def __init__(self, buckets_ms: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.bucket_counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        milliseconds = seconds * 1000
+        self.bucket_counts[bisect_left(self.buckets_ms, milliseconds)] += 1
+        self.count += 1
+        self.sum_ms += milliseconds
+        self.max_ms = max(self.max_ms, milliseconds)
+
+    def snapshot(self) -> dict:
+        buckets = {}
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(
+            (*self.buckets_ms, "+Inf"),
+            self.bucket_counts,
+        ):
+            cumulative_count += bucket_count
+            buckets[f"le_{upper_bound}"] = cumulative_count
+
+        return {
+            "count": self.count,
+            "avg_ms": self.sum_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "buckets": buckets,
+        }
@@ -0,0 +1,91 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from src.schemas.currency import CurrencyTitleDescription
+
+
+# Number of digits after the decimal point of the currency minor unit,
+# amounts are stored as integer numbers of minor units
+CURRENCY_EXPONENTS = {
+    CurrencyTitleDescription.RUB.value: 2,
+    CurrencyTitleDescription.USD.value: 2,
+    CurrencyTitleDescription.EUR.value: 2,
+    CurrencyTitleDescription.CNY.value: 2,
+    CurrencyTitleDescription.PNT.value: 2,
+}
+
+# Exchange rates are stored as NUMERIC(18, 8)
+EXCHANGE_RATE_SCALE = 8
+
+
+def get_currency_exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS[currency.upper()]
+
+
+def to_minor_units(amount: Decimal | float | str, exponent: int) -> int:
+    """
+    Convert the amount in major units to the integer number of minor units,
+    floats are converted through their shortest string representation
+    """
+    amount = Decimal(str(amount)).scaleb(exponent)
+    return int(amount.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_major_units(amount_in_minor_units: int, exponent: int) -> Decimal:
+    return Decimal(amount_in_minor_units).scaleb(-exponent)
+
+
+def get_exchange_rate_in_scaled_units(exchange_rate: Decimal) -> int:
+    return to_minor_units(exchange_rate, EXCHANGE_RATE_SCALE)
+
+
+def divide_rounding_half_up(numerator, denominator):
+    """
+    Integer division of non-negative numbers rounding half up, uses only
+    the integer operators, so it also works element-wise on numpy arrays
+    """
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def convert_minor_units(
+    amount_in_minor_units,
+    exchange_rate: Decimal,
+    from_exponent: int,
+    to_exponent: int,
+):
+    """
+    Convert the amount of the base currency to the quote currency, where
+    `exchange_rate` is the quote currency amount for the base currency unit.
+
+    The rate is scaled to an integer, so the conversion is exact integer
+    arithmetic rounded once at the end. `amount_in_minor_units` may be an
+    integer or a numpy array, the intermediate product exceeds int64 for
+    amounts above ~10^8 minor units, so use the object dtype for such arrays
+    """
+    numerator = (
+        amount_in_minor_units
+        * get_exchange_rate_in_scaled_units(exchange_rate)
+        * 10 ** to_exponent
+    )
+    denominator = 10 ** (EXCHANGE_RATE_SCALE + from_exponent)
+    return divide_rounding_half_up(numerator, denominator)
+
+
+def convert_minor_units_inversely(
+    amount_in_minor_units,
+    exchange_rate: Decimal,
+    from_exponent: int,
+    to_exponent: int,
+):
+    """
+    Convert the amount of the quote currency back to the base currency,
+    `exchange_rate` is the same base/quote rate as in convert_minor_units()
+    """
+    numerator = (
+        amount_in_minor_units
+        * 10 ** (EXCHANGE_RATE_SCALE + to_exponent)
+    )
+    denominator = (
+        get_exchange_rate_in_scaled_units(exchange_rate)
+        * 10 ** from_exponent
+    )
+    return divide_rounding_half_up(numerator, denominator)
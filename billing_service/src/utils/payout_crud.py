@@ -0,0 +1,291 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from collections import defaultdict
+import csv
+import io
+import logging
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import (
+    BigInteger,
+    Result,
+    column,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.core.config import settings
+from src.models.bank_account import BankAccount
+from src.models.ledger import LedgerEntryTypes, LedgerSystemAccounts
+from src.models.profile import Profile
+from src.models.transaction import TransactionDocument, PayoutTransactionType
+from src.schemas.payout import (
+    PayoutItem,
+    PayoutItemResult,
+    PayoutItemStatus,
+    PayoutReport,
+)
+from src.services.cache import bank_accounts_cache
+from src.utils import ledger_crud, transaction_crud
+from src.utils.messages import messages
+from src.utils.money import get_currency_exponent, to_minor_units
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = logging.getLogger(__name__)
+
+PAYOUT_CSV_REQUIRED_COLUMNS = {"currency", "amount"}
+
+
+def parse_payout_csv(
+    content: bytes,
+) -> tuple[list[tuple[int, PayoutItem]], list[PayoutItemResult]]:
+    """
+    Parse the CSV with the `profile_id`, `phone_number`, `currency` and
+    `amount` header columns into the payout items, invalid rows are
+    returned as failed item results. A file which isn't a UTF-8 CSV with
+    that header is rejected with 400.
+    """
+    items = []
+    invalid_items = []
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+        if not PAYOUT_CSV_REQUIRED_COLUMNS <= set(reader.fieldnames or ()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=messages.PAYOUT_CSV_IS_INVALID,
+            )
+
+        for index, row in enumerate(reader):
+            # DictReader puts the values beyond the header under None
+            if None in row:
+                invalid_items.append(
+                    PayoutItemResult(
+                        index=index,
+                        status=PayoutItemStatus.INVALID.value,
+                        detail=messages.PAYOUT_ROW_HAS_EXTRA_COLUMNS,
+                    )
+                )
+                continue
+
+            try:
+                items.append(
+                    (
+                        index,
+                        PayoutItem.model_validate(
+                            {key: value or None for key, value in row.items()}
+                        ),
+                    )
+                )
+            except ValidationError as e:
+                invalid_items.append(
+                    PayoutItemResult(
+                        index=index,
+                        status=PayoutItemStatus.INVALID.value,
+                        detail=str(e.errors()[0]["msg"]),
+                    )
+                )
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.PAYOUT_CSV_IS_INVALID,
+        )
+
+    return items, invalid_items
+
+
+async def create_payouts(
+    items: list[tuple[int, PayoutItem]],
+    session: AsyncSession,
+    invalid_items: list[PayoutItemResult] | None = None,
+) -> PayoutReport:
+    """
+    Credit the recipients' bank accounts from the payouts system account.
+
+    Items are applied in chunks of `bulk_operation_chunk_size`, every chunk
+    in its own transaction with two set-based statements: the recipients'
+    bank accounts are resolved and locked in id order, like the transfers
+    do, and then credited with one UPDATE ... FROM (VALUES ...). The ledger
+    journals and the history outbox events are inserted in the same
+    transaction with one multi-row INSERT each.
+
+    A chunk which fails with a database error is rolled back and its
+    items are reported FAILED, the other chunks are still applied, so
+    the report tells which items the client may submit again.
+    """
+    results = list(invalid_items or [])
+    chunk_size = settings.bulk_operation_settings.bulk_operation_chunk_size
+
+    for offset in range(0, len(items), chunk_size):
+        chunk = items[offset:offset + chunk_size]
+        try:
+            results.extend(await create_payouts_chunk(chunk, session))
+        except SQLAlchemyError:
+            logger.exception("Payout chunk at the item %s failed", chunk[0][0])
+            await session.rollback()
+            results.extend(
+                PayoutItemResult(
+                    index=index,
+                    status=PayoutItemStatus.FAILED.value,
+                    detail=messages.PAYOUT_CHUNK_FAILED,
+                )
+                for index, _ in chunk
+            )
+
+    results.sort(key=lambda result: result.index)
+    number_of_paid_items = sum(
+        result.status == PayoutItemStatus.PAID.value for result in results
+    )
+    return PayoutReport(
+        number_of_paid_items=number_of_paid_items,
+        number_of_failed_items=len(results) - number_of_paid_items,
+        items=results,
+    )
+
+
+async def create_payouts_chunk(
+    items: list[tuple[int, PayoutItem]],
+    session: AsyncSession,
+) -> list[PayoutItemResult]:
+    results = []
+    payable_items = []
+    for index, item in items:
+        amount = to_minor_units(
+            item.amount,
+            get_currency_exponent(item.currency.value),
+        )
+        if amount <= 0:
+            results.append(
+                PayoutItemResult(
+                    index=index,
+                    status=PayoutItemStatus.INVALID.value,
+                    detail=messages.TRANSFER_AMOUNT_IS_TOO_SMALL,
+                )
+            )
+        else:
+            payable_items.append((index, item, amount))
+
+    if not payable_items:
+        return results
+
+    profile_ids = list(
+        {item.profile_id for _, item, _ in payable_items if item.profile_id}
+    )
+    phone_numbers = list(
+        {item.phone_number for _, item, _ in payable_items if item.phone_number}
+    )
+    currencies = list({item.currency.value for _, item, _ in payable_items})
+    stmt = (
+        select(
+            BankAccount.id,
+            BankAccount.profile_id,
+            BankAccount.currency,
+            Profile.user_id,
+            Profile.phone_number,
+        )
+        .join(Profile, Profile.id == BankAccount.profile_id)
+        .where(
+            BankAccount.currency.in_(currencies),
+            or_(
+                Profile.id.in_(profile_ids),
+                Profile.phone_number.in_(phone_numbers),
+            ),
+        )
+        .order_by(BankAccount.id)
+        .with_for_update(of=BankAccount)
+    )
+    result: Result = await session.execute(stmt)
+    bank_accounts_by_profile_id = {}
+    bank_accounts_by_phone_number = {}
+    for row in result:
+        bank_accounts_by_profile_id[(row.profile_id, row.currency)] = row
+        bank_accounts_by_phone_number[(row.phone_number, row.currency)] = row
+
+    paid_items = []
+    amounts_by_bank_account_id = defaultdict(int)
+    for index, item, amount in payable_items:
+        if item.profile_id:
+            bank_account = bank_accounts_by_profile_id.get(
+                (item.profile_id, item.currency.value)
+            )
+        else:
+            bank_account = bank_accounts_by_phone_number.get(
+                (item.phone_number, item.currency.value)
+            )
+
+        if bank_account is None:
+            results.append(
+                PayoutItemResult(
+                    index=index,
+                    status=PayoutItemStatus.NOT_FOUND.value,
+                    detail=messages.RECIPIENT_BANK_ACCOUNT_WITH_THAT_CURRENCY_WAS_NOT_FOUND,
+                )
+            )
+            continue
+
+        paid_items.append((index, bank_account, amount))
+        amounts_by_bank_account_id[bank_account.id] += amount
+
+    if not paid_items:
+        return results
+
+    # Several items to the same bank account are summed up, the UPDATE
+    # applies only one joined row per target row
+    payouts = values(
+        column("bank_account_id", UUID(as_uuid=True)),
+        column("amount", BigInteger),
+        name="payouts",
+    ).data(list(amounts_by_bank_account_id.items()))
+    await session.execute(
+        update(BankAccount)
+        .where(BankAccount.id == payouts.c.bank_account_id)
+        .values(balance=BankAccount.balance + payouts.c.amount)
+        .execution_options(synchronize_session=False)
+    )
+    await ledger_crud.append_system_account_journals(
+        LedgerEntryTypes.PAYOUT.value,
+        LedgerSystemAccounts.PAYOUTS.value,
+        [
+            (bank_account.id, bank_account.currency, amount)
+            for _, bank_account, amount in paid_items
+        ],
+        session,
+    )
+    await transaction_crud.add_transaction_history_events(
+        [
+            TransactionDocument(
+                user_id=bank_account.user_id,
+                profile_id=bank_account.profile_id,
+                transaction=PayoutTransactionType(
+                    bank_account_id=bank_account.id,
+                    amount=amount,
+                    currency=bank_account.currency,
+                ),
+            )
+            for _, bank_account, amount in paid_items
+        ],
+        session,
+    )
+    await session.commit()
+
+    await bank_accounts_cache.invalidate(
+        *{str(bank_account.profile_id) for _, bank_account, _ in paid_items}
+    )
+
+    results.extend(
+        PayoutItemResult(
+            index=index,
+            status=PayoutItemStatus.PAID.value,
+            bank_account_id=bank_account.id,
+        )
+        for index, bank_account, _ in paid_items
+    )
+    return results
@@ -1,15 +1,29 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
+import asyncio
 
 from fastapi import HTTPException, status
-from sqlalchemy import Result, select
+from sqlalchemy import Result, String, column, select, delete, update, values
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.orm import aliased
 
+from src.db.postgres import insert_returning
 from src.models.profile import Profile
+from src.core.config import settings
+from src.schemas.profile import ProfileRead, ProfileBulkDeleteResult
+from src.services.cache import (
+    profile_cache,
+    bank_accounts_cache,
+    psp_customer_cache,
+)
 from src.utils.messages import messages
 
 
 if TYPE_CHECKING:
+    from uuid import UUID
+
     from sqlalchemy.ext.asyncio import AsyncSession
+    from src.services.psp.abc import PaymentServiceProvider
     from src.schemas.profile import (
         ProfileCreate,
         ProfileUpdate,
@@ -32,6 +46,138 @@ async def get_profile_by_user_id(
     return profile
 
 
+async def get_cached_profile_by_user_id(
+    user_id: str,
+    session: AsyncSession,
+) -> ProfileRead:
+    async def load_profile() -> dict:
+        profile = await get_profile_by_user_id(user_id, session)
+        return ProfileRead.model_validate(profile).model_dump(mode="json")
+
+    return ProfileRead.model_validate(
+        await profile_cache.get_or_load(str(user_id), load_profile)
+    )
+
+
+async def invalidate_profile_cache(
+    user_id: str,
+    profile_id: str | None = None,
+) -> None:
+    await profile_cache.invalidate(str(user_id))
+    if profile_id:
+        await bank_accounts_cache.invalidate(str(profile_id))
+
+
+async def get_cached_psp_customer_id(
+    profile_id: UUID,
+    session: AsyncSession,
+) -> str | None:
+    async def load_psp_customer_id() -> str | None:
+        result: Result = await session.execute(
+            select(Profile.psp_customer_id).where(Profile.id == profile_id)
+        )
+        return result.scalar_one_or_none()
+
+    return await psp_customer_cache.get_or_load(
+        str(profile_id),
+        load_psp_customer_id,
+    )
+
+
+async def set_psp_customer_ids(
+    psp_customer_ids: dict[UUID, str],
+    session: AsyncSession,
+) -> int:
+    """
+    Store the PSP customers of the profiles with one UPDATE ... FROM
+    (VALUES ...) and return the number of stored ones. The customer
+    stored first is kept, the PSP returns the same one for the same
+    profile anyway. A customer already stored on another profile is
+    skipped.
+    """
+    if not psp_customer_ids:
+        return 0
+
+    other_profile = aliased(Profile)
+
+    customers = values(
+        column("profile_id", PostgresUUID(as_uuid=True)),
+        column("psp_customer_id", String),
+        name="customers",
+    ).data(list(psp_customer_ids.items()))
+    result: Result = await session.execute(
+        update(Profile)
+        .where(
+            Profile.id == customers.c.profile_id,
+            Profile.psp_customer_id.is_(None),
+            ~select(other_profile.id)
+            .where(
+                other_profile.psp_customer_id == customers.c.psp_customer_id
+            )
+            .exists(),
+        )
+        .values(psp_customer_id=customers.c.psp_customer_id)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    await psp_customer_cache.invalidate(
+        *(str(profile_id) for profile_id in psp_customer_ids)
+    )
+    return result.rowcount
+
+
+async def get_or_create_psp_customer_id(
+    profile: ProfileRead,
+    payment_service_provider: PaymentServiceProvider,
+    session: AsyncSession,
+) -> str:
+    """
+    PSP customer of the profile for the checkout, created on the first
+    checkout of the profiles which weren't backfilled. The stored customer
+    is returned, so a customer which wasn't stored because it belongs to
+    another profile is never used.
+    """
+    psp_customer_id = await get_cached_psp_customer_id(profile.id, session)
+    if psp_customer_id is not None:
+        return psp_customer_id
+
+    # The connection isn't held during the PSP API call
+    await session.commit()
+    # The Stripe client is blocking
+    psp_customer_id = await asyncio.to_thread(
+        payment_service_provider.get_or_create_customer,
+        profile.email,
+        str(profile.user_id),
+        str(profile.id),
+    )
+    await set_psp_customer_ids({profile.id: psp_customer_id}, session)
+
+    psp_customer_id = await get_cached_psp_customer_id(profile.id, session)
+    if psp_customer_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=messages.PSP_CUSTOMER_BELONGS_TO_ANOTHER_PROFILE,
+        )
+    return psp_customer_id
+
+
+async def get_profiles_without_psp_customer(
+    after_profile_id: UUID | None,
+    batch_size: int,
+    session: AsyncSession,
+) -> list:
+    stmt = (
+        select(Profile.id, Profile.user_id, Profile.email)
+        .where(Profile.psp_customer_id.is_(None))
+        .order_by(Profile.id)
+        .limit(batch_size)
+    )
+    if after_profile_id is not None:
+        stmt = stmt.where(Profile.id > after_profile_id)
+    result: Result = await session.execute(stmt)
+    return result.all()
+
+
 async def get_profile_by_profile_id(
     profile_id: str,
     session: AsyncSession,
@@ -71,13 +217,14 @@ async def create_profile(
     session: AsyncSession,
 ) -> Profile:
 
-    profile = Profile(
-        **profile_in.model_dump(),
-        user_id=user_id,
+    profile = await insert_returning(
+        session,
+        Profile(
+            **profile_in.model_dump(),
+            user_id=user_id,
+        ),
     )
-    session.add(profile)
     await session.commit()
-    await session.refresh(profile)
 
     return profile
 
@@ -85,8 +232,8 @@ async def create_profile(
 async def get_profile(
     user_id: str,
     session: AsyncSession,
-) -> Profile:
-    return await get_profile_by_user_id(
+) -> ProfileRead:
+    return await get_cached_profile_by_user_id(
         user_id,
         session,
     )
@@ -115,6 +262,7 @@ async def update_profile(
     for name, value in profile_update.model_dump(exclude_unset=True).items():
         setattr(profile, name, value)
     await session.commit()
+    await invalidate_profile_cache(user_id)
     return profile
 
 
@@ -122,15 +270,84 @@ async def delete_profile_by_user_id(
     user_id: str,
     session: AsyncSession,
 ) -> None:
-    profile: Profile = await get_profile_by_user_id(user_id, session)
-    await session.delete(profile)
+    # Bank accounts are removed by the ON DELETE CASCADE foreign key
+    stmt = (
+        delete(Profile)
+        .where(Profile.user_id == user_id)
+        .returning(Profile.id)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await session.execute(stmt)
+    profile_id = result.scalar_one_or_none()
+    if profile_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.USER_PROFILE_WAS_NOT_FOUND
+        )
+
     await session.commit()
+    await invalidate_profile_cache(user_id, profile_id)
 
 
 async def delete_profile_by_profile_id(
     profile_id: str,
     session: AsyncSession,
 ) -> None:
-    profile: Profile = await get_profile_by_profile_id(profile_id, session)
-    await session.delete(profile)
+    stmt = (
+        delete(Profile)
+        .where(Profile.id == profile_id)
+        .returning(Profile.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    result: Result = await session.execute(stmt)
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.USER_PROFILE_WAS_NOT_FOUND
+        )
+
     await session.commit()
+    await invalidate_profile_cache(user_id, profile_id)
+
+
+async def delete_profiles_by_profile_ids(
+    profile_ids: list[UUID],
+    session: AsyncSession,
+) -> ProfileBulkDeleteResult:
+    """
+    Delete profiles with one DELETE ... RETURNING statement per chunk of
+    IDs, committing every chunk in its own transaction
+    """
+    profile_ids = list(dict.fromkeys(profile_ids))
+    chunk_size = settings.bulk_operation_settings.bulk_operation_chunk_size
+    deleted_profile_ids = set()
+
+    for offset in range(0, len(profile_ids), chunk_size):
+        stmt = (
+            delete(Profile)
+            .where(Profile.id.in_(profile_ids[offset:offset + chunk_size]))
+            .returning(Profile.id, Profile.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        result: Result = await session.execute(stmt)
+        rows = result.all()
+        await session.commit()
+
+        if rows:
+            await profile_cache.invalidate(*(str(row.user_id) for row in rows))
+            await bank_accounts_cache.invalidate(*(str(row.id) for row in rows))
+        deleted_profile_ids.update(row.id for row in rows)
+
+    return ProfileBulkDeleteResult(
+        deleted=[
+            profile_id
+            for profile_id in profile_ids
+            if profile_id in deleted_profile_ids
+        ],
+        not_found=[
+            profile_id
+            for profile_id in profile_ids
+            if profile_id not in deleted_profile_ids
+        ],
+    )
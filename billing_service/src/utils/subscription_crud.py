@@ -0,0 +1,486 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import logging
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    BigInteger,
+    Result,
+    column,
+    func,
+    literal_column,
+    select,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.orm import aliased
+
+from src.models.bank_account import BankAccount
+from src.models.ledger import LedgerEntryTypes, LedgerSystemAccounts
+from src.models.profile import Profile
+from src.models.subscription import (
+    ProcessedCheckoutSession,
+    Subscription,
+    SubscriptionStatuses,
+)
+from src.models.transaction import TransactionDocument, SubscriptionPaymentTransactionType
+from src.schemas.currency import CurrencyTitleDescription
+from src.services.cache import bank_accounts_cache
+from src.utils import currency_pair_crud, ledger_crud, transaction_crud
+from src.utils.messages import messages
+from src.utils.money import convert_minor_units
+
+
+if TYPE_CHECKING:
+    from uuid import UUID as PythonUUID
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = logging.getLogger(__name__)
+
+# The statuses are compared with the literals, so that the generic plans
+# of the prepared statements still match the partial index predicates
+ACTIVE_STATUS = literal_column(f"'{SubscriptionStatuses.ACTIVE.value}'")
+EXPIRED_STATUS = literal_column(f"'{SubscriptionStatuses.EXPIRED.value}'")
+
+
+async def activate_subscription(
+    user_id: PythonUUID,
+    profile_id: PythonUUID,
+    number_of_months: int,
+    currency: str,
+    price: int,
+    session: AsyncSession,
+) -> Subscription:
+    """
+    Create the active subscription of the profile or extend the existing
+    one by `number_of_months` in one INSERT ... ON CONFLICT statement.
+    The price is in the currency minor units, the caller commits.
+
+    The profile row is locked FOR SHARE first: while an auth deactivation
+    batch holds the profile, the activation waits for it, so the
+    subscriber flag set after this commit isn't reset by that batch.
+    """
+    await session.execute(
+        select(Profile.id)
+        .where(Profile.id == profile_id)
+        .with_for_update(read=True)
+    )
+    period = func.make_interval(0, number_of_months)
+    stmt = pg_insert(Subscription).values(
+        user_id=user_id,
+        profile_id=profile_id,
+        number_of_months=number_of_months,
+        currency=currency,
+        price=price,
+        current_period_start=func.now(),
+        current_period_end=func.now() + period,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Subscription.profile_id],
+        index_where=text("status = 'ACTIVE'"),
+        set_={
+            "number_of_months": stmt.excluded.number_of_months,
+            "currency": stmt.excluded.currency,
+            "price": stmt.excluded.price,
+            "current_period_end": (
+                func.greatest(Subscription.current_period_end, func.now())
+                + period
+            ),
+            "updated_at": func.now(),
+        },
+    ).returning(Subscription)
+    result: Result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+async def mark_checkout_session_processed(
+    checkout_session_id: str,
+    session: AsyncSession,
+) -> bool:
+    """
+    Record the paid checkout session and return whether it is recorded
+    for the first time. The webhook applies the session only then, in the
+    same transaction, so the redelivered webhooks are skipped.
+    """
+    result: Result = await session.execute(
+        pg_insert(ProcessedCheckoutSession)
+        .values(checkout_session_id=checkout_session_id)
+        .on_conflict_do_nothing(
+            index_elements=[ProcessedCheckoutSession.checkout_session_id],
+        )
+        .returning(ProcessedCheckoutSession.id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def get_prices_in_point_currency(
+    subscriptions: list,
+    session: AsyncSession,
+) -> dict[PythonUUID, int]:
+    """
+    Prices of the subscriptions in Point minor units at the current
+    exchange rates. The subscriptions in a currency without a currency
+    pair to Point are logged and left out.
+    """
+    point_currency = CurrencyTitleDescription.PNT.value
+    exchange_rates = {}
+    for currency in {
+        subscription.currency for subscription in subscriptions
+    } - {point_currency}:
+        try:
+            exchange_rates[currency] = (
+                await currency_pair_crud.get_exchange_rate_with_currency_exponents(
+                    currency,
+                    session,
+                )
+            )
+        except HTTPException:
+            logger.error("No exchange rate of %s to %s", currency, point_currency)
+
+    prices = {}
+    for subscription in subscriptions:
+        if subscription.currency == point_currency:
+            prices[subscription.id] = subscription.price
+            continue
+
+        row = exchange_rates.get(subscription.currency)
+        if row is None:
+            continue
+        prices[subscription.id] = convert_minor_units(
+            subscription.price,
+            row.exchange_rate,
+            row.base_exponent,
+            row.quote_exponent,
+        )
+    return prices
+
+
+async def pay_subscription_from_point_bank_account(
+    user_id: PythonUUID,
+    profile_id: PythonUUID,
+    number_of_months: int,
+    currency: str,
+    price: int,
+    session: AsyncSession,
+) -> Subscription:
+    """
+    Pay the subscription from the profile's Point bank account and
+    activate it, without the payment service provider.
+
+    The price in `currency` minor units is converted to Point at the
+    current exchange rate and debited with one conditional
+    UPDATE ... WHERE balance >= price RETURNING: the row lock is held
+    only by that statement's transaction and the balance can't go
+    negative, so no SELECT ... FOR UPDATE is needed beforehand.
+    """
+    point_currency = CurrencyTitleDescription.PNT.value
+    if currency == point_currency:
+        point_price = price
+    else:
+        row = await currency_pair_crud.get_exchange_rate_with_currency_exponents(
+            currency,
+            session,
+        )
+        point_price = convert_minor_units(
+            price,
+            row.exchange_rate,
+            row.base_exponent,
+            row.quote_exponent,
+        )
+    if point_price <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.SUBSCRIPTION_PRICE_IS_TOO_SMALL,
+        )
+
+    bank_account_filter = (
+        BankAccount.profile_id == profile_id,
+        BankAccount.currency == point_currency,
+    )
+    result: Result = await session.execute(
+        update(BankAccount)
+        .where(*bank_account_filter, BankAccount.balance >= point_price)
+        .values(balance=BankAccount.balance - point_price)
+        .returning(BankAccount.id)
+        .execution_options(synchronize_session=False)
+    )
+    bank_account_id = result.scalar_one_or_none()
+    if bank_account_id is None:
+        # Only the failed payments tell the missing account from the funds
+        result = await session.execute(
+            select(BankAccount.id).where(*bank_account_filter)
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=messages.USER_PROFILE_BANK_ACCOUNT_WITH_CURRENCY_ENTERED_WAS_NOT_FOUND,
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.INSUFFICIENT_FUNDS_IN_THE_BANK_ACCOUNT,
+        )
+
+    await ledger_crud.append_journal(
+        LedgerEntryTypes.SUBSCRIPTION_PAYMENT.value,
+        point_currency,
+        point_price,
+        session,
+        from_bank_account_id=bank_account_id,
+        to_system_account=LedgerSystemAccounts.SUBSCRIPTIONS.value,
+    )
+    await transaction_crud.add_transaction_history_events(
+        [
+            TransactionDocument(
+                user_id=user_id,
+                profile_id=profile_id,
+                transaction=SubscriptionPaymentTransactionType(
+                    bank_account_id=bank_account_id,
+                    number_of_subscription_month=number_of_months,
+                    currency=point_currency,
+                    amount=point_price,
+                ),
+            )
+        ],
+        session,
+    )
+    subscription = await activate_subscription(
+        user_id,
+        profile_id,
+        number_of_months,
+        currency,
+        price,
+        session,
+    )
+    await session.commit()
+
+    await bank_accounts_cache.invalidate(str(profile_id))
+    return subscription
+
+
+async def renew_due_subscriptions(
+    batch_size: int,
+    session: AsyncSession,
+) -> tuple[int, int]:
+    """
+    Renew or expire up to `batch_size` active subscriptions whose period
+    has ended and return the numbers of the renewed and expired ones.
+
+    The due subscriptions are claimed with an index range scan FOR UPDATE
+    SKIP LOCKED, so concurrent batches take disjoint rows. The renewals
+    are charged from the profiles' Point bank accounts at the current
+    exchange rate: the accounts are locked in id order, like the transfers
+    do, and debited with one UPDATE ... FROM (VALUES ...). Subscriptions
+    without auto renewal, funds or the exchange rate are expired with one
+    UPDATE.
+    """
+    stmt = (
+        select(
+            Subscription.id,
+            Subscription.user_id,
+            Subscription.profile_id,
+            Subscription.number_of_months,
+            Subscription.currency,
+            Subscription.price,
+            Subscription.auto_renew,
+        )
+        .where(
+            Subscription.status == ACTIVE_STATUS,
+            Subscription.current_period_end <= func.now(),
+        )
+        .order_by(Subscription.current_period_end)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result: Result = await session.execute(stmt)
+    due_subscriptions = result.all()
+    if not due_subscriptions:
+        return 0, 0
+
+    renewable_subscriptions = [
+        subscription
+        for subscription in due_subscriptions
+        if subscription.auto_renew
+    ]
+    prices = await get_prices_in_point_currency(
+        renewable_subscriptions,
+        session,
+    )
+
+    point_currency = CurrencyTitleDescription.PNT.value
+    result = await session.execute(
+        select(BankAccount.id, BankAccount.profile_id, BankAccount.balance)
+        .where(
+            BankAccount.profile_id.in_(
+                [subscription.profile_id for subscription in renewable_subscriptions]
+            ),
+            BankAccount.currency == point_currency,
+        )
+        .order_by(BankAccount.id)
+        .with_for_update()
+    )
+    bank_accounts = {row.profile_id: row for row in result}
+
+    renewed_subscriptions = []
+    for subscription in renewable_subscriptions:
+        bank_account = bank_accounts.get(subscription.profile_id)
+        # Without the exchange rate the subscription is expired, so that
+        # it doesn't stay first in the due order and block the renewals
+        price = prices.get(subscription.id, 0)
+        if bank_account is not None and 0 < price <= bank_account.balance:
+            renewed_subscriptions.append((subscription, bank_account, price))
+
+    renewed_ids = {subscription.id for subscription, _, _ in renewed_subscriptions}
+    expired_ids = [
+        subscription.id
+        for subscription in due_subscriptions
+        if subscription.id not in renewed_ids
+    ]
+
+    if renewed_subscriptions:
+        charges = values(
+            column("bank_account_id", UUID(as_uuid=True)),
+            column("amount", BigInteger),
+            name="charges",
+        ).data(
+            [
+                (bank_account.id, price)
+                for _, bank_account, price in renewed_subscriptions
+            ]
+        )
+        await session.execute(
+            update(BankAccount)
+            .where(BankAccount.id == charges.c.bank_account_id)
+            .values(balance=BankAccount.balance - charges.c.amount)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            update(Subscription)
+            .where(Subscription.id.in_(renewed_ids))
+            .values(
+                current_period_start=Subscription.current_period_end,
+                current_period_end=(
+                    Subscription.current_period_end
+                    + func.make_interval(0, Subscription.number_of_months)
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await ledger_crud.append_system_account_journals(
+            LedgerEntryTypes.SUBSCRIPTION_PAYMENT.value,
+            LedgerSystemAccounts.SUBSCRIPTIONS.value,
+            [
+                (bank_account.id, point_currency, -price)
+                for _, bank_account, price in renewed_subscriptions
+            ],
+            session,
+        )
+        await transaction_crud.add_transaction_history_events(
+            [
+                TransactionDocument(
+                    user_id=subscription.user_id,
+                    profile_id=subscription.profile_id,
+                    transaction=SubscriptionPaymentTransactionType(
+                        bank_account_id=bank_account.id,
+                        number_of_subscription_month=subscription.number_of_months,
+                        currency=point_currency,
+                        amount=price,
+                    ),
+                )
+                for subscription, bank_account, price in renewed_subscriptions
+            ],
+            session,
+        )
+
+    if expired_ids:
+        await session.execute(
+            update(Subscription)
+            .where(Subscription.id.in_(expired_ids))
+            .values(status=SubscriptionStatuses.EXPIRED.value)
+            .execution_options(synchronize_session=False)
+        )
+
+    await session.commit()
+
+    if renewed_subscriptions:
+        await bank_accounts_cache.invalidate(
+            *{
+                str(subscription.profile_id)
+                for subscription, _, _ in renewed_subscriptions
+            }
+        )
+    return len(renewed_subscriptions), len(expired_ids)
+
+
+async def get_subscriptions_pending_auth_deactivation(
+    batch_size: int,
+    session: AsyncSession,
+) -> list:
+    """
+    Expired subscriptions not yet reported to auth, locked until the
+    caller marks them deactivated and commits. `is_subscribed_again` is
+    set for the users who bought a new subscription since, they must stay
+    subscribers.
+
+    Their profiles are locked FOR NO KEY UPDATE before the new
+    subscriptions are looked up with a separate statement: the
+    activations committed before the lock are seen, the later ones wait
+    for the caller's commit, which comes after the auth request.
+    """
+    stmt = (
+        select(Subscription.id, Subscription.profile_id)
+        .where(
+            Subscription.status == EXPIRED_STATUS,
+            Subscription.auth_deactivated_at.is_(None),
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result: Result = await session.execute(stmt)
+    subscriptions = result.all()
+    if not subscriptions:
+        return []
+
+    await session.execute(
+        select(Profile.id)
+        .where(
+            Profile.id.in_(
+                {subscription.profile_id for subscription in subscriptions}
+            )
+        )
+        .order_by(Profile.id)
+        .with_for_update(key_share=True)
+    )
+
+    active_subscription = aliased(Subscription)
+    stmt = select(
+        Subscription.id,
+        Subscription.user_id,
+        select(active_subscription.id)
+        .where(
+            active_subscription.profile_id == Subscription.profile_id,
+            active_subscription.status == ACTIVE_STATUS,
+        )
+        .exists()
+        .label("is_subscribed_again"),
+    ).where(
+        Subscription.id.in_([subscription.id for subscription in subscriptions])
+    )
+    result = await session.execute(stmt)
+    return result.all()
+
+
+async def mark_subscriptions_auth_deactivated(
+    subscription_ids: list[PythonUUID],
+    session: AsyncSession,
+) -> None:
+    await session.execute(
+        update(Subscription)
+        .where(Subscription.id.in_(subscription_ids))
+        .values(auth_deactivated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Result, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.models.subscription_plan import SubscriptionPlan
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def get_subscription_plans(session: AsyncSession) -> list:
+    result: Result = await session.execute(
+        select(
+            SubscriptionPlan.number_of_months,
+            SubscriptionPlan.currency,
+            SubscriptionPlan.price,
+            SubscriptionPlan.psp_product_id,
+            SubscriptionPlan.psp_price_id,
+        )
+    )
+    return result.all()
+
+
+async def upsert_subscription_plans(
+    plans: list[dict],
+    session: AsyncSession,
+) -> None:
+    if not plans:
+        return
+
+    stmt = pg_insert(SubscriptionPlan).values(plans)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            SubscriptionPlan.number_of_months,
+            SubscriptionPlan.currency,
+        ],
+        set_={
+            "price": stmt.excluded.price,
+            "psp_product_id": stmt.excluded.psp_product_id,
+            "psp_price_id": stmt.excluded.psp_price_id,
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+    await session.commit()
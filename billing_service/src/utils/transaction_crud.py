@@ -1,17 +1,93 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+from fastapi import HTTPException, status
+from sqlalchemy import Result, select, insert, update, case, or_
+
+from src.models.bank_account import BankAccount
+from src.models.ledger import LedgerEntryTypes
+from src.models.outbox import TransactionOutboxEvent
+from src.models.profile import Profile
 from src.models.transaction import (
     Transaction,
+    TransactionDocument,
     TopUpTransactionByAnotherCurrencyType,
     SubscriptionPaymentTransactionType,
+    TransferTransactionType,
 )
+from src.schemas.transaction import TransactionRead
+from src.services.cache import bank_accounts_cache
+from src.services.transaction_archive import as_utc, transaction_archive
+from src.utils import ledger_crud
 from src.utils.messages import messages
+from src.utils.money import get_currency_exponent, to_minor_units, to_major_units
 
 
 if TYPE_CHECKING:
+    from datetime import datetime
     from uuid import UUID
 
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from src.schemas.transaction import TransactionCreate
+
+
+async def add_transaction_history_events(
+    transactions: list[TransactionDocument],
+    session: AsyncSession,
+) -> None:
+    """
+    Write the transaction history documents to the outbox, they are
+    committed together with the balance change by the caller and
+    projected into MongoDB by the outbox projector
+    """
+    if not transactions:
+        return
+
+    await session.execute(
+        insert(TransactionOutboxEvent),
+        [
+            {"document": transaction.model_dump(mode="json")}
+            for transaction in transactions
+        ],
+    )
+
+
+async def get_transaction_history_entries(
+    user_id: UUID,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[Transaction]:
+    """
+    Transaction history of the user ordered by the timestamp. The archive
+    is read through only when the range starts before the archive cutoff
+    or has no start, the documents which are not archived yet are found
+    in the collection
+    """
+    filters = [Transaction.user_id == user_id]
+    if since is not None:
+        filters.append(Transaction.timestamp >= since)
+    if until is not None:
+        filters.append(Transaction.timestamp < until)
+    transactions = {
+        transaction.id: transaction
+        for transaction in await Transaction.find(*filters).to_list()
+    }
+
+    cutoff = transaction_archive.get_cutoff()
+    if since is None or as_utc(since) < cutoff:
+        archive_until = cutoff if until is None else min(as_utc(until), cutoff)
+        for transaction in await transaction_archive.find(
+            user_id,
+            since,
+            archive_until,
+        ):
+            transactions.setdefault(transaction.id, transaction)
+
+    return sorted(
+        transactions.values(),
+        key=lambda transaction: as_utc(transaction.timestamp),
+    )
+
 
 async def create_top_up_bank_account_by_another_currency_transaction_history_entry(
     user_id: UUID,
@@ -19,10 +95,14 @@ async def create_top_up_bank_account_by_another_currency_transaction_history_ent
     profile_bank_account_id: UUID,
     base_currency: str,
     quote_currency: str,
-    topped_up_amount_in_base_currency: float,
-    credited_amount_in_quote_currency: float,
+    topped_up_amount_in_base_currency: int,
+    credited_amount_in_quote_currency: int,
+    session: AsyncSession,
 ):
-    transaction = Transaction(
+    """
+    Amounts are integer numbers of the currencies minor units
+    """
+    transaction = TransactionDocument(
         user_id=user_id,
         profile_id=profile_id,
         transaction=TopUpTransactionByAnotherCurrencyType(
@@ -33,7 +113,7 @@ async def create_top_up_bank_account_by_another_currency_transaction_history_ent
             credited_amount_in_quote_currency=credited_amount_in_quote_currency,
         ),
     )
-    _: Transaction = await transaction.create()
+    await add_transaction_history_events([transaction], session)
     return {
         "details": messages.TRANSACTION_HISTORY_ENTRY_WAS_CREATED,
     }
@@ -44,9 +124,13 @@ async def create_subcription_payment_transaction_history_entry(
     profile_id: UUID,
     number_of_subscription_month: int,
     currency: str,
-    amount: float,
+    amount: int,
+    session: AsyncSession,
 ):
-    transaction = Transaction(
+    """
+    Amount is an integer number of the currency minor units
+    """
+    transaction = TransactionDocument(
         user_id=user_id,
         profile_id=profile_id,
         transaction=SubscriptionPaymentTransactionType(
@@ -55,7 +139,130 @@ async def create_subcription_payment_transaction_history_entry(
             amount=amount,
         )
     )
-    _: Transaction = await transaction.create()
+    await add_transaction_history_events([transaction], session)
     return {
         "details": messages.TRANSACTION_HISTORY_ENTRY_WAS_CREATED,
     }
+
+
+async def create_transaction_by_receipent_phonenumber(
+    transaction_in: TransactionCreate,
+    phone_number: str,
+    user_id: str,
+    session: AsyncSession,
+) -> TransactionRead:
+    """
+    Transfer the amount from the user's bank account to the bank account
+    in the same currency of the profile with the specified phone number.
+
+    Both bank account rows are locked with the single SELECT ... ORDER BY id
+    FOR UPDATE, so concurrent cross transfers always take the locks in the
+    same order and can't deadlock, and the balances are checked and changed
+    under the locks, so no update is lost. The history entry is written to
+    the outbox in the same transaction.
+    """
+    currency = transaction_in.currency.value
+    exponent = get_currency_exponent(currency)
+    amount = to_minor_units(transaction_in.amount, exponent)
+    if amount <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.TRANSFER_AMOUNT_IS_TOO_SMALL,
+        )
+
+    stmt = (
+        select(
+            BankAccount.id,
+            BankAccount.profile_id,
+            BankAccount.balance,
+            Profile.user_id,
+            Profile.phone_number,
+        )
+        .join(Profile, Profile.id == BankAccount.profile_id)
+        .where(
+            BankAccount.currency == currency,
+            or_(
+                Profile.user_id == user_id,
+                Profile.phone_number == phone_number,
+            ),
+        )
+        .order_by(BankAccount.id)
+        .with_for_update(of=BankAccount)
+    )
+    result: Result = await session.execute(stmt)
+    rows = result.all()
+
+    sender = next(
+        (row for row in rows if str(row.user_id) == str(user_id)),
+        None,
+    )
+    recipient = next(
+        (row for row in rows if row.phone_number == phone_number),
+        None,
+    )
+    if sender is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.USER_PROFILE_BANK_ACCOUNT_WITH_CURRENCY_ENTERED_WAS_NOT_FOUND,
+        )
+    if recipient is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=messages.RECIPIENT_BANK_ACCOUNT_WITH_THAT_CURRENCY_WAS_NOT_FOUND,
+        )
+    if sender.id == recipient.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.TRANSFER_TO_THE_SAME_BANK_ACCOUNT_IS_NOT_ALLOWED,
+        )
+    if sender.balance < amount:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=messages.INSUFFICIENT_FUNDS_IN_THE_BANK_ACCOUNT,
+        )
+
+    await session.execute(
+        update(BankAccount)
+        .where(BankAccount.id.in_((sender.id, recipient.id)))
+        .values(
+            balance=BankAccount.balance + case(
+                (BankAccount.id == sender.id, -amount),
+                else_=amount,
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await ledger_crud.append_journal(
+        LedgerEntryTypes.TRANSFER.value,
+        currency,
+        amount,
+        session,
+        from_bank_account_id=sender.id,
+        to_bank_account_id=recipient.id,
+    )
+    transaction = TransactionDocument(
+        user_id=sender.user_id,
+        profile_id=sender.profile_id,
+        transaction=TransferTransactionType(
+            bank_account_id=sender.id,
+            amount=amount,
+            currency=currency,
+            transferred_to_profile_id=recipient.profile_id,
+            transferred_to_bank_account_id=recipient.id,
+        ),
+    )
+    await add_transaction_history_events([transaction], session)
+    await session.commit()
+    await bank_accounts_cache.invalidate(
+        str(sender.profile_id),
+        str(recipient.profile_id),
+    )
+
+    return TransactionRead(
+        id=transaction.id,
+        amount=float(to_major_units(amount, exponent)),
+        currency=currency,
+        profile_id=sender.profile_id,
+        bank_account_id=sender.id,
+        timestamp=transaction.timestamp,
+    )
@@ -0,0 +1,163 @@
+from typing import Annotated
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import Header
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, event, insert, text
+from sqlalchemy.exc import DBAPIError
+
+from src.app import application
+from src.db.postgres import db_helper
+from src.models.bank_account import BankAccount
+from src.models.profile import Profile
+from src.services.cache import (
+    profile_cache,
+    bank_accounts_cache,
+    psp_customer_cache,
+)
+from src.utils import auth_utils
+
+
+class QueryCounter:
+    """
+    Statements sent to PostgreSQL by the service engine, counted with the
+    `before_cursor_execute` event
+    """
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+@pytest.fixture(autouse=True)
+async def dispose_engine():
+    # The pooled connections belong to the event loop of the test
+    yield
+    await db_helper.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clear_local_caches():
+    # The tests run without Redis, only the in-process tier is used
+    for cache in (profile_cache, bank_accounts_cache, psp_customer_cache):
+        cache._local.clear()
+
+
+@pytest.fixture
+async def database():
+    """
+    The service database migrated to the head revision, the tests are
+    skipped without it
+    """
+    try:
+        async with db_helper.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except (OSError, DBAPIError) as error:
+        pytest.skip(f"PostgreSQL is unavailable: {error}")
+    return db_helper.engine
+
+
+@pytest.fixture
+def query_counter(database):
+    counter = QueryCounter()
+    event.listen(database.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(database.sync_engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+async def create_profile(database):
+    """
+    Factory of the profiles with the bank accounts of the given
+    {currency: balance}, the profiles are deleted with their bank
+    accounts, ledger journals and history events afterwards
+    """
+    profile_ids: list[UUID] = []
+    bank_account_ids: list[UUID] = []
+
+    async def create(balances: dict[str, int]) -> tuple[Profile, dict[str, UUID]]:
+        profile_id = uuid4()
+        async with database.begin() as connection:
+            await connection.execute(
+                insert(Profile).values(
+                    id=profile_id,
+                    user_id=uuid4(),
+                    first_name="Test",
+                    last_name="Profile",
+                    email=f"{profile_id.hex[:16]}@example.com",
+                    phone_number=profile_id.hex[:16],
+                )
+            )
+            profile = (
+                await connection.execute(
+                    Profile.__table__.select().where(Profile.id == profile_id)
+                )
+            ).one()
+            accounts = {}
+            for currency, balance in balances.items():
+                accounts[currency] = (
+                    await connection.execute(
+                        insert(BankAccount)
+                        .values(
+                            profile_id=profile_id,
+                            currency=currency,
+                            balance=balance,
+                        )
+                        .returning(BankAccount.id)
+                    )
+                ).scalar_one()
+
+        profile_ids.append(profile_id)
+        bank_account_ids.extend(accounts.values())
+        return profile, accounts
+
+    yield create
+
+    async with database.begin() as connection:
+        await connection.execute(
+            text(
+                "DELETE FROM ledger_entries WHERE journal_id IN ("
+                "SELECT journal_id FROM ledger_entries "
+                "WHERE bank_account_id = ANY(:ids))"
+            ),
+            {"ids": bank_account_ids},
+        )
+        await connection.execute(
+            text(
+                "DELETE FROM transaction_outbox "
+                "WHERE (document ->> 'profile_id')::uuid = ANY(:ids)"
+            ),
+            {"ids": profile_ids},
+        )
+        await connection.execute(
+            delete(Profile).where(Profile.id.in_(profile_ids))
+        )
+
+
+@pytest.fixture
+async def client():
+    """
+    Client of the application without the lifespan, the authenticated
+    user is set with the `User-Id` header
+    """
+    def get_user_id(user_id: Annotated[str, Header()]):
+        return user_id
+
+    application.dependency_overrides[
+        auth_utils.get_current_auth_user_id_from_or_401
+    ] = get_user_id
+    async with AsyncClient(
+        transport=ASGITransport(app=application),
+        base_url="http://test",
+    ) as client:
+        yield client
+    application.dependency_overrides.clear()
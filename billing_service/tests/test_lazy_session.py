@@ -0,0 +1,19 @@
+from sqlalchemy import text
+
+from src.db.postgres import db_helper, LazySession
+
+
+async def test_lazy_session_context_manager_releases_connection():
+    """
+    `async with` on the lazy session reaches the wrapped session and gives
+    its connection back to the pool on exit
+    """
+    checked_out = db_helper.get_pool_status()["checked_out"]
+
+    session = LazySession(db_helper.async_session)
+    async with session as entered_session:
+        assert entered_session is session
+        assert (await session.execute(text("SELECT 1"))).scalar() == 1
+        assert db_helper.get_pool_status()["checked_out"] == checked_out + 1
+
+    assert db_helper.get_pool_status()["checked_out"] == checked_out
@@ -0,0 +1,94 @@
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+from src.core.config import settings
+from src.models.bank_account import BankAccount
+from src.utils import ledger_crud
+
+
+async def test_failed_payout_chunk_is_reported(
+    client,
+    create_profile,
+    database,
+    monkeypatch,
+):
+    """
+    A chunk failing with a database error is rolled back and reported
+    FAILED while the other chunks are paid
+    """
+    profiles = [await create_profile({"USD": 0}) for _ in range(3)]
+    monkeypatch.setattr(
+        settings.bulk_operation_settings,
+        "bulk_operation_chunk_size",
+        1,
+    )
+    append_system_account_journals = ledger_crud.append_system_account_journals
+    calls = []
+
+    async def fail_second_chunk(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            raise DBAPIError("INSERT", {}, Exception("connection was lost"))
+        return await append_system_account_journals(*args, **kwargs)
+
+    monkeypatch.setattr(
+        ledger_crud,
+        "append_system_account_journals",
+        fail_second_chunk,
+    )
+
+    response = await client.post(
+        "/billing/admin/payouts/",
+        json={
+            "items": [
+                {"profile_id": str(profile.id), "currency": "USD", "amount": 1}
+                for profile, _ in profiles
+            ],
+        },
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert [item["status"] for item in report["items"]] == [
+        "PAID",
+        "FAILED",
+        "PAID",
+    ]
+    assert report["number_of_paid_items"] == 2
+
+    async with database.connect() as connection:
+        balances = (
+            await connection.execute(
+                select(BankAccount.balance).where(
+                    BankAccount.id.in_(
+                        [accounts["USD"] for _, accounts in profiles]
+                    )
+                )
+            )
+        ).scalars().all()
+    assert sorted(balances) == [0, 100, 100]
+
+
+async def test_malformed_payout_csv(client, create_profile):
+    profile, _ = await create_profile({"USD": 0})
+
+    response = await client.post(
+        "/billing/admin/payouts/csv/",
+        files={"file": ("payouts.csv", b"\xff\xfe\x00", "text/csv")},
+    )
+    assert response.status_code == 400
+
+    response = await client.post(
+        "/billing/admin/payouts/csv/",
+        files={
+            "file": (
+                "payouts.csv",
+                (
+                    "profile_id,phone_number,currency,amount\n"
+                    f"{profile.id},,USD,1,2\n"
+                ).encode(),
+                "text/csv",
+            ),
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["status"] == "INVALID"
@@ -0,0 +1,75 @@
+from uuid import uuid4
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("path", "budget"),
+    [
+        ("/billing/bank-account/", 1),
+        ("/billing/bank-account/currency/PNT/", 1),
+    ],
+)
+async def test_user_bank_account_lookups(
+    client,
+    create_profile,
+    query_counter,
+    path,
+    budget,
+):
+    profile, _ = await create_profile({"PNT": 100, "USD": 0})
+    headers = {"User-Id": str(profile.user_id)}
+
+    query_counter.reset()
+    response = await client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert len(query_counter) <= budget, query_counter.statements
+
+    # Both caches were filled by the joined query
+    query_counter.reset()
+    response = await client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert len(query_counter) == 0, query_counter.statements
+
+
+async def test_user_bank_account_lookup_without_profile(client, query_counter):
+    query_counter.reset()
+    response = await client.get(
+        "/billing/bank-account/",
+        headers={"User-Id": str(uuid4())},
+    )
+    assert response.status_code == 404
+    assert len(query_counter) <= 1, query_counter.statements
+
+
+async def test_delete_user_bank_account(client, create_profile, query_counter):
+    profile, accounts = await create_profile({"USD": 0})
+
+    query_counter.reset()
+    response = await client.delete(
+        f"/billing/bank-account/delete/{accounts['USD']}",
+        headers={"User-Id": str(profile.user_id)},
+    )
+    assert response.status_code == 204
+    assert len(query_counter) <= 1, query_counter.statements
+
+
+@pytest.mark.parametrize("owner", ["another_profile", "nobody"])
+async def test_delete_user_bank_account_errors(
+    client,
+    create_profile,
+    query_counter,
+    owner,
+):
+    profile, _ = await create_profile({"USD": 0})
+    _, accounts = await create_profile({"USD": 0})
+    bank_account_id = accounts["USD"] if owner == "another_profile" else uuid4()
+
+    query_counter.reset()
+    response = await client.delete(
+        f"/billing/bank-account/delete/{bank_account_id}",
+        headers={"User-Id": str(profile.user_id)},
+    )
+    assert response.status_code == (403 if owner == "another_profile" else 404)
+    # The failed DELETE and the query finding out why
+    assert len(query_counter) <= 2, query_counter.statements
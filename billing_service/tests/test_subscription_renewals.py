@@ -0,0 +1,135 @@
+import asyncio
+
+from sqlalchemy import func, insert, select, text
+
+from src.db.postgres import db_helper
+from src.models.bank_account import BankAccount
+from src.models.subscription import Subscription, SubscriptionStatuses
+from src.utils import subscription_crud
+
+
+async def test_renewals_expire_subscriptions_without_exchange_rate(
+    create_profile,
+    database,
+):
+    """
+    A due subscription in a currency without a currency pair to Point is
+    expired instead of failing the batch of the other renewals
+    """
+    profiles = [await create_profile({"PNT": 1000}) for _ in range(2)]
+    async with database.begin() as connection:
+        subscription_ids = [
+            (
+                await connection.execute(
+                    insert(Subscription)
+                    .values(
+                        user_id=profile.user_id,
+                        profile_id=profile.id,
+                        number_of_months=1,
+                        currency=currency,
+                        price=100,
+                        current_period_start=func.now() - text("interval '31 days'"),
+                        current_period_end=func.now() - text("interval '1 day'"),
+                    )
+                    .returning(Subscription.id)
+                )
+            ).scalar_one()
+            for (profile, _), currency in zip(profiles, ("PNT", "XXX"))
+        ]
+
+    async with db_helper.async_session() as session:
+        renewed, expired = await subscription_crud.renew_due_subscriptions(
+            100,
+            session,
+        )
+    assert renewed >= 1 and expired >= 1
+
+    async with database.connect() as connection:
+        statuses = dict(
+            (
+                await connection.execute(
+                    select(Subscription.id, Subscription.status).where(
+                        Subscription.id.in_(subscription_ids)
+                    )
+                )
+            ).all()
+        )
+        balances = (
+            await connection.execute(
+                select(BankAccount.balance)
+                .where(
+                    BankAccount.id.in_(
+                        [accounts["PNT"] for _, accounts in profiles]
+                    )
+                )
+                .order_by(BankAccount.balance)
+            )
+        ).scalars().all()
+    assert statuses == {
+        subscription_ids[0]: SubscriptionStatuses.ACTIVE.value,
+        subscription_ids[1]: SubscriptionStatuses.EXPIRED.value,
+    }
+    assert balances == [900, 1000]
+
+
+async def test_activation_waits_for_auth_deactivation_batch(
+    create_profile,
+    database,
+):
+    """
+    A subscription bought while its profile's expired subscription is
+    being reported to auth is activated only after that batch commits, so
+    the batch can't reset the new subscriber flag
+    """
+    profile, _ = await create_profile({})
+    async with database.begin() as connection:
+        expired_subscription_id = (
+            await connection.execute(
+                insert(Subscription)
+                .values(
+                    user_id=profile.user_id,
+                    profile_id=profile.id,
+                    status=SubscriptionStatuses.EXPIRED.value,
+                    number_of_months=1,
+                    currency="PNT",
+                    price=100,
+                    current_period_start=func.now() - text("interval '31 days'"),
+                    current_period_end=func.now() - text("interval '1 day'"),
+                )
+                .returning(Subscription.id)
+            )
+        ).scalar_one()
+
+    async def activate():
+        async with db_helper.async_session() as session:
+            await subscription_crud.activate_subscription(
+                profile.user_id,
+                profile.id,
+                1,
+                "PNT",
+                100,
+                session,
+            )
+            await session.commit()
+
+    async with db_helper.async_session() as session:
+        subscriptions = await subscription_crud.get_subscriptions_pending_auth_deactivation(
+            100,
+            session,
+        )
+        subscription = next(
+            subscription
+            for subscription in subscriptions
+            if subscription.id == expired_subscription_id
+        )
+        assert not subscription.is_subscribed_again
+
+        activation = asyncio.create_task(activate())
+        await asyncio.sleep(0.5)
+        assert not activation.done()
+
+        await subscription_crud.mark_subscriptions_auth_deactivated(
+            [subscription.id for subscription in subscriptions],
+            session,
+        )
+    await asyncio.wait_for(activation, timeout=5)
@@ -0,0 +1,94 @@
+import json
+from uuid import uuid4
+
+import aiohttp
+from sqlalchemy import delete, func, select
+
+from src.models.outbox import TransactionOutboxEvent
+from src.models.subscription import ProcessedCheckoutSession, Subscription
+from src.services import auth_service
+
+
+async def test_redelivered_checkout_session_is_applied_once(
+    client,
+    create_profile,
+    database,
+    monkeypatch,
+):
+    profile, _ = await create_profile({})
+    checkout_session_id = f"cs_test_{uuid4().hex}"
+    event = {
+        "id": f"evt_{uuid4().hex}",
+        "object": "event",
+        "type": "checkout.session.completed",
+        "data": {
+            "object": {
+                "id": checkout_session_id,
+                "object": "checkout.session",
+                "payment_status": "paid",
+                "metadata": {
+                    "user_id": str(profile.user_id),
+                    "profile_id": str(profile.id),
+                    "number_of_subscription_month": "1",
+                    "currency": "USD",
+                    "amount": "500",
+                },
+            },
+        },
+    }
+    auth_calls = []
+
+    async def create_user_subscription(user_id):
+        auth_calls.append(user_id)
+        if len(auth_calls) == 1:
+            raise aiohttp.ClientConnectionError("auth is unavailable")
+
+    monkeypatch.setattr(
+        auth_service,
+        "create_user_subscription",
+        create_user_subscription,
+    )
+
+    try:
+        # The failed auth call makes the PSP redeliver the event
+        response = await client.post(
+            "/billing/payment/subscription/webhook/",
+            content=json.dumps(event),
+        )
+        assert response.status_code == 500
+        response = await client.post(
+            "/billing/payment/subscription/webhook/",
+            content=json.dumps(event),
+        )
+        assert response.status_code == 200
+        assert len(auth_calls) == 2
+
+        async with database.connect() as connection:
+            subscription = (
+                await connection.execute(
+                    select(
+                        Subscription.number_of_months,
+                        Subscription.current_period_end
+                        - Subscription.current_period_start,
+                    ).where(Subscription.profile_id == profile.id)
+                )
+            ).one()
+            number_of_history_events = (
+                await connection.execute(
+                    select(func.count()).where(
+                        TransactionOutboxEvent.document["profile_id"].astext
+                        == str(profile.id)
+                    )
+                )
+            ).scalar_one()
+        assert subscription[0] == 1
+        assert subscription[1].days <= 31
+        assert number_of_history_events == 1
+    finally:
+        async with database.begin() as connection:
+            await connection.execute(
+                delete(ProcessedCheckoutSession).where(
+                    ProcessedCheckoutSession.checkout_session_id
+                    == checkout_session_id
+                )
+            )
@@ -0,0 +1,69 @@
+import asyncio
+import random
+from collections import Counter
+
+from src.db.postgres import db_helper
+from src.schemas.transaction import TransactionCreate
+from src.utils import ledger_crud, transaction_crud
+
+
+NUMBER_OF_PROFILES = 4
+NUMBER_OF_TRANSFERS = 2000
+INITIAL_BALANCE = 1_000_000
+# Capacity of the default engine pool: 5 connections and 10 overflow
+CONCURRENCY = 15
+
+
+async def test_concurrent_cross_transfers(create_profile):
+    """
+    Concurrent transfers in both directions between the same bank
+    accounts neither deadlock nor lose updates: every transfer succeeds,
+    the total is conserved and each balance matches its ledger
+    """
+    profiles = [
+        await create_profile({"PNT": INITIAL_BALANCE})
+        for _ in range(NUMBER_OF_PROFILES)
+    ]
+    rng = random.Random(0)
+    transfers = []
+    for _ in range(NUMBER_OF_TRANSFERS):
+        sender, recipient = rng.sample(range(NUMBER_OF_PROFILES), 2)
+        transfers.append((sender, recipient, rng.randint(1, 100)))
+
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def transfer(sender: int, recipient: int, amount: int):
+        async with semaphore, db_helper.async_session() as session:
+            return await transaction_crud.create_transaction_by_receipent_phonenumber(
+                TransactionCreate(amount=amount / 100, currency="PNT"),
+                profiles[recipient][0].phone_number,
+                str(profiles[sender][0].user_id),
+                session,
+            )
+
+    results = await asyncio.gather(
+        *(transfer(*parameters) for parameters in transfers),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    assert not errors, errors[:5]
+
+    expected_deltas = Counter()
+    for sender, recipient, amount in transfers:
+        expected_deltas[sender] -= amount
+        expected_deltas[recipient] += amount
+
+    async with db_helper.async_session() as session:
+        balances = [
+            await ledger_crud.get_ledger_balance(accounts["PNT"], session)
+            for _, accounts in profiles
+        ]
+    for index, balance in enumerate(balances):
+        assert balance.bank_account_balance == (
+            INITIAL_BALANCE + expected_deltas[index]
+        )
+        # The initial balances were inserted without the ledger entries
+        assert balance.ledger_balance == expected_deltas[index]
+    assert sum(balance.bank_account_balance for balance in balances) == (
+        NUMBER_OF_PROFILES * INITIAL_BALANCE
+    )